@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+D-Bus transport latency
+-----------------------
+
+Compares the native asyncio D-Bus transport with the ``txdbus`` one, on a
+private D-Bus daemon:
+
+* method call latency: sequential calls of ``GetId`` on the bus daemon.
+* signal latency: from sending a signal until the match rule callback runs,
+  for signals sent one at a time.
+* signal throughput: signals delivered per second, for a burst of signals.
+
+Run with::
+
+    python benchmarks/dbus_transport.py --calls 2000 --signals 20000
+
+Requires the ``dbus-daemon`` executable, and ``txdbus`` for its measurements.
+
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+
+from bleak.backends.bluezdbus import connection
+from bleak.backends.bluezdbus.aiodbus.message import SIGNAL, Message
+from bleak.backends.bluezdbus.mock import PrivateBus
+
+_INTERFACE = "org.bleak.Benchmark"
+
+
+async def bench_calls(bus, n):
+    samples = []
+    for _ in range(n):
+        t = time.perf_counter()
+        await bus.call_remote(
+            "/org/freedesktop/DBus",
+            "GetId",
+            interface="org.freedesktop.DBus",
+            destination="org.freedesktop.DBus",
+        )
+        samples.append(time.perf_counter() - t)
+    samples.sort()
+    return {
+        "call_latency_us": statistics.median(samples) * 1e6,
+        "call_latency_p95_us": samples[int(0.95 * (len(samples) - 1))] * 1e6,
+    }
+
+
+async def bench_signals(bus, sender, loop, n):
+    latencies = []
+    waiter = [None]
+    received = [0]
+
+    def _callback(message):
+        latencies.append(time.perf_counter() - message.body[0])
+        received[0] += 1
+        if waiter[0] is not None and not waiter[0].done():
+            waiter[0].set_result(None)
+
+    rule = await bus.add_match(
+        _callback, interface=_INTERFACE, member="Tick", sender=sender.unique_name
+    )
+    try:
+        # One at a time, for latency
+        for _ in range(min(n, 1000)):
+            waiter[0] = loop.create_future()
+            sender.send(_tick())
+            await asyncio.wait_for(waiter[0], 5.0)
+        latency = sorted(latencies)
+
+        # A burst, for throughput
+        received[0] = 0
+        waiter[0] = None
+        t = time.perf_counter()
+        for i in range(n):
+            sender.send(_tick())
+            if i % 100 == 0:
+                await asyncio.sleep(0)
+        deadline = t + 60.0
+        while received[0] < n and time.perf_counter() < deadline:
+            await asyncio.sleep(0.001)
+        elapsed = time.perf_counter() - t
+    finally:
+        await bus.del_match(rule)
+
+    return {
+        "signal_latency_us": statistics.median(latency) * 1e6,
+        "signal_latency_p95_us": latency[int(0.95 * (len(latency) - 1))] * 1e6,
+        "signals_per_sec": received[0] / elapsed,
+    }
+
+
+def _tick():
+    return Message(
+        SIGNAL,
+        path="/org/bleak/Benchmark",
+        interface=_INTERFACE,
+        member="Tick",
+        signature="d",
+        body=[time.perf_counter()],
+    )
+
+
+async def run(args, loop):
+    results = {}
+    with PrivateBus() as private_bus:
+        sender = await connection.connect(loop, private_bus.address, "native")
+        try:
+            for transport in args.transports:
+                bus = await connection.connect(loop, private_bus.address, transport)
+                try:
+                    result = await bench_calls(bus, args.calls)
+                    result.update(await bench_signals(bus, sender, loop, args.signals))
+                finally:
+                    bus.disconnect()
+                results[transport] = result
+        finally:
+            sender.disconnect()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--calls", type=int, default=2000, help="Method calls made")
+    parser.add_argument("--signals", type=int, default=20000, help="Signals sent")
+    parser.add_argument(
+        "--transports",
+        nargs="+",
+        default=list(connection.TRANSPORTS),
+        choices=connection.TRANSPORTS,
+        help="Transports to measure",
+    )
+    args = parser.parse_args()
+
+    logging.getLogger("bleak").setLevel(logging.WARNING)
+    loop = asyncio.get_event_loop()
+    results = loop.run_until_complete(run(args, loop))
+    names = sorted(set(k for r in results.values() for k in r))
+    print("{0:>24}".format("") + "".join("{0:>14}".format(t) for t in results))
+    for name in names:
+        print(
+            "{0:>24}".format(name)
+            + "".join("{0:14.1f}".format(r[name]) for r in results.values())
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Find device latency
+-------------------
+
+Benchmark comparing how long it takes to obtain a known device with
+``discover`` versus ``BleakScanner.find_device_by_address`` on the BlueZ
+backend, using a mocked system bus which emits advertisements at a fixed
+rate. The target device shows up after ``--delay`` seconds.
+
+Run with::
+
+    python benchmarks/find_device.py --devices 200 --rate 500 --delay 0.25
+
+"""
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from unittest import mock
+
+from bleak.backends.bluezdbus import connection as bluez_connection
+from bleak.backends.bluezdbus import discovery as bluez_discovery
+from bleak.backends.bluezdbus import scanner as bluez_scanner
+from bleak.backends.bluezdbus import defs
+from bleak.utils import mac_int_2_str
+
+ADAPTER_PATH = "/org/bluez/hci0"
+
+
+class _Signal(object):
+    def __init__(self, path, interface, member, body):
+        self.path = path
+        self.interface = interface
+        self.member = member
+        self.body = body
+
+
+class MockBlueZBus(object):
+    """A stand-in system bus emitting BlueZ discovery signals.
+
+    Args:
+        loop: The event loop to emit signals on.
+        n_devices (int): Number of distinct background devices advertising.
+        rate (float): Advertisements per second, in total.
+        target (str): Address of the device that is sought.
+        delay (float): Seconds after ``StartDiscovery`` before the target appears.
+
+    """
+
+    def __init__(self, loop, n_devices, rate, target, delay):
+        self.loop = loop
+        self.n_devices = n_devices
+        self.rate = rate
+        self.target = target
+        self.delay = delay
+        self._callbacks = {}
+        self._rule_ids = itertools.count()
+        self._handles = []
+
+    async def add_match(self, callback, **kwargs):
+        rule_id = next(self._rule_ids)
+        self._callbacks[rule_id] = (callback, kwargs.get("member"))
+        return rule_id
+
+    async def del_match(self, rule_id):
+        self._callbacks.pop(rule_id, None)
+
+    def disconnect(self):
+        for h in self._handles:
+            h.cancel()
+
+    async def call_remote(self, path, method, **kwargs):
+        if method == "GetManagedObjects":
+            return {ADAPTER_PATH: {defs.ADAPTER_INTERFACE: {"Address": "00:00:00:00:00:01"}}}
+        if method == "StartDiscovery":
+            self._handles.append(self.loop.call_soon(self._emit_background, 0))
+            self._handles.append(
+                self.loop.call_later(self.delay, self._emit_device, self.target, -40)
+            )
+        elif method == "StopDiscovery":
+            self.disconnect()
+
+    def _dispatch(self, signal):
+        for callback, member in list(self._callbacks.values()):
+            if member == signal.member:
+                callback(signal)
+
+    def _emit_device(self, address, rssi):
+        path = "{0}/dev_{1}".format(ADAPTER_PATH, address.replace(":", "_"))
+        self._dispatch(
+            _Signal(
+                path,
+                defs.PROPERTIES_INTERFACE,
+                "PropertiesChanged",
+                [defs.DEVICE_INTERFACE, {"Address": address, "RSSI": rssi}, []],
+            )
+        )
+
+    def _emit_background(self, i):
+        self._emit_device(mac_int_2_str(0x100000 + (i % self.n_devices)), -80)
+        self._handles.append(
+            self.loop.call_later(1.0 / self.rate, self._emit_background, i + 1)
+        )
+
+
+async def _time(coro):
+    t = time.perf_counter()
+    result = await coro
+    return time.perf_counter() - t, result
+
+
+async def run(args, loop):
+    target = "AA:BB:CC:DD:EE:FF"
+    results = {"discover": [], "find_device_by_address": []}
+    for _ in range(args.repeat):
+        for name in results:
+            bus = MockBlueZBus(loop, args.devices, args.rate, target, args.delay)
+
+            async def _connect(*_args, **_kwargs):
+                return bus
+
+            with mock.patch.object(bluez_connection, "connect", _connect):
+                if name == "discover":
+                    coro = bluez_discovery.discover(timeout=args.timeout, loop=loop)
+                else:
+                    coro = bluez_scanner.BleakScannerBlueZDBus.find_device_by_address(
+                        target, timeout=args.timeout, loop=loop
+                    )
+                elapsed, found = await _time(coro)
+            assert found, "Target device was not found by {0}".format(name)
+            results[name].append(elapsed)
+
+    for name, samples in results.items():
+        print(
+            "{0:>24}: median {1:8.1f} ms, max {2:8.1f} ms".format(
+                name, statistics.median(samples) * 1000, max(samples) * 1000
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--devices", type=int, default=200, help="Background devices")
+    parser.add_argument("--rate", type=float, default=500.0, help="Adverts per second")
+    parser.add_argument("--delay", type=float, default=0.25, help="Target appears after")
+    parser.add_argument("--timeout", type=float, default=2.0, help="Scan timeout")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetitions")
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(run(args, loop))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite
+---------------
+
+Measures the hot paths of the BlueZ backend against the stand-in BlueZ service
+from :py:mod:`bleak.backends.bluezdbus.mock`, on a private D-Bus daemon:
+
+* ``adverts_per_sec``: advertisement signals parsed and ingested by the scanner,
+  replayed from a capture of the stand-in as fast as possible.
+* ``peak_memory_per_10k_devices_mb``: peak memory allocated while ingesting that
+  capture, scaled to 10000 devices.
+* ``connect_latency_ms`` and ``connect_latency_p95_ms``: from calling ``connect``
+  until services are resolved and ready to use.
+* ``notifications_per_sec``: notifications delivered to a callback.
+* ``writes_per_sec``: write requests, i.e. with response, completed.
+* ``bulk_write_kb_per_sec``: 4 kB payloads written without response, which the client
+  splits into writes of the MTU.
+
+Run the suite, optionally saving the results as a baseline::
+
+    python benchmarks/suite.py run --save baseline.json
+
+and compare against a saved baseline, either a fresh run or saved results,
+with a non-zero exit status if anything regressed more than the threshold::
+
+    python benchmarks/suite.py compare baseline.json
+    python benchmarks/suite.py compare baseline.json results.json --threshold 0.2
+
+Requires the ``dbus-daemon`` executable.
+
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+from bleak.backends.bluezdbus.capture import (
+    CaptureRecorder,
+    CaptureReplayer,
+    parse_message,
+)
+from bleak.backends.bluezdbus.client import BleakClientBlueZDBus
+from bleak.backends.bluezdbus.mock import (
+    ECHO_WRITE_UUID,
+    STREAM_NOTIFY_UUID,
+    MockBlueZ,
+    PrivateBus,
+)
+from bleak.backends.bluezdbus.scanner import BleakScannerBlueZDBus
+
+#: Name, unit and whether higher is better, of all measurements.
+METRICS = [
+    ("adverts_per_sec", "adverts/s", True),
+    ("peak_memory_per_10k_devices_mb", "MB", False),
+    ("connect_latency_ms", "ms", False),
+    ("connect_latency_p95_ms", "ms", False),
+    ("notifications_per_sec", "notifications/s", True),
+    ("writes_per_sec", "writes/s", True),
+    ("bulk_write_kb_per_sec", "kB/s", True),
+]
+
+
+async def _with_mock(bus, loop, func, n_devices, **kwargs):
+    mock = MockBlueZ(bus.address, loop, **kwargs)
+    await mock.start()
+    mock.add_devices(n_devices)
+    try:
+        return await func(mock)
+    finally:
+        await mock.stop()
+
+
+async def _capture_adverts(mock, loop, n_signals, timeout=60.0):
+    f = io.BytesIO()
+    recorder = CaptureRecorder(f)
+    scanner = BleakScannerBlueZDBus(loop=loop, recorder=recorder)
+    await scanner.start()
+    deadline = loop.time() + timeout
+    while recorder.count < n_signals and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+    await scanner.stop()
+    recorder.close()
+    f.seek(0)
+    return [raw for _, raw in CaptureReplayer(f).raw_messages()]
+
+
+def bench_scan_ingest(raw_messages, loop):
+    """Ingest rate and peak memory of a scanner parsing captured signals."""
+    scanner = BleakScannerBlueZDBus(loop=loop)
+    t = time.perf_counter()
+    for raw in raw_messages:
+        scanner.parse_msg(parse_message(raw))
+    elapsed = time.perf_counter() - t
+
+    scanner = BleakScannerBlueZDBus(loop=loop)
+    tracemalloc.start()
+    for raw in raw_messages:
+        scanner.parse_msg(parse_message(raw))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "adverts_per_sec": len(raw_messages) / elapsed,
+        "peak_memory_per_10k_devices_mb": peak
+        / 2 ** 20
+        * 10000
+        / max(len(scanner._devices), 1),
+    }
+
+
+async def bench_connect(mock, loop, repeat):
+    address = mock.devices[0].address
+    samples = []
+    for _ in range(repeat):
+        client = BleakClientBlueZDBus(address, loop=loop)
+        t = time.perf_counter()
+        await client.connect(timeout=10.0)
+        samples.append(time.perf_counter() - t)
+        await client.disconnect()
+    samples.sort()
+    return {
+        "connect_latency_ms": statistics.median(samples) * 1000,
+        "connect_latency_p95_ms": samples[int(0.95 * (len(samples) - 1))] * 1000,
+    }
+
+
+async def bench_gatt(mock, loop, duration):
+    client = BleakClientBlueZDBus(mock.devices[0].address, loop=loop)
+    await client.connect(timeout=10.0)
+    try:
+        received = [0]
+
+        def _callback(sender, data):
+            received[0] += 1
+
+        await client.start_notify(STREAM_NOTIFY_UUID, _callback)
+        await asyncio.sleep(duration)
+        n_notifications = received[0]
+        await client.stop_notify(STREAM_NOTIFY_UUID)
+
+        data = bytearray(20)
+        n_writes = 0
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            await client.write_gatt_char(ECHO_WRITE_UUID, data, response=True)
+            n_writes += 1
+
+        # Bulk data, split into writes of the MTU by the client.
+        data = bytearray(4096)
+        n_bytes = 0
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            await client.write_gatt_char(ECHO_WRITE_UUID, data, response=False)
+            n_bytes += len(data)
+    finally:
+        await client.disconnect()
+    return {
+        "notifications_per_sec": n_notifications / duration,
+        "writes_per_sec": n_writes / duration,
+        "bulk_write_kb_per_sec": n_bytes / duration / 1024,
+    }
+
+
+async def run(args, loop):
+    results = {}
+    with PrivateBus() as bus:
+        bus.set_as_system_bus()
+
+        print("Capturing advertisements of {0} devices...".format(args.devices))
+        raw_messages = await _with_mock(
+            bus,
+            loop,
+            lambda mock: _capture_adverts(mock, loop, 2 * args.devices),
+            args.devices,
+            advertisement_rate=1e6,
+        )
+        results.update(bench_scan_ingest(raw_messages, loop))
+
+        print("Connecting {0} times...".format(args.repeat))
+        results.update(
+            await _with_mock(
+                bus,
+                loop,
+                lambda mock: bench_connect(mock, loop, args.repeat),
+                5,
+                advertisement_rate=1000.0,
+            )
+        )
+
+        print("Notifying and writing for {0} s each...".format(args.duration))
+        results.update(
+            await _with_mock(
+                bus,
+                loop,
+                lambda mock: bench_gatt(mock, loop, args.duration),
+                1,
+                advertisement_rate=1000.0,
+                notification_rate=1e6,
+            )
+        )
+    return results
+
+
+def _print_results(results):
+    for name, unit, _ in METRICS:
+        if name in results:
+            print("{0:>32}: {1:12.1f} {2}".format(name, results[name], unit))
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> int:
+    """Print a comparison of results against a baseline.
+
+    Returns:
+        Number of measurements that regressed more than ``threshold``, relatively.
+
+    """
+    regressions = 0
+    for name, unit, higher_is_better in METRICS:
+        before = baseline["results"].get(name)
+        after = current["results"].get(name)
+        if before is None or after is None:
+            continue
+        change = (after - before) / before if before else 0.0
+        worse = -change if higher_is_better else change
+        if worse > threshold:
+            verdict = "REGRESSION"
+            regressions += 1
+        elif worse < -threshold:
+            verdict = "improvement"
+        else:
+            verdict = ""
+        print(
+            "{0:>32}: {1:12.1f} -> {2:12.1f} {3:<16} {4:+7.1%} {5}".format(
+                name, before, after, unit, change, verdict
+            )
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    subparsers = parser.add_subparsers(dest="command")
+    p_run = subparsers.add_parser("run", help="Run the suite")
+    p_run.add_argument("--save", help="Save the results to this JSON file")
+    p_cmp = subparsers.add_parser("compare", help="Compare against a baseline")
+    p_cmp.add_argument("baseline", help="Saved baseline results")
+    p_cmp.add_argument(
+        "results", nargs="?", help="Saved results; runs the suite if omitted"
+    )
+    p_cmp.add_argument(
+        "--threshold", type=float, default=0.1, help="Allowed relative regression"
+    )
+    for p in (p_run, p_cmp):
+        p.add_argument("--devices", type=int, default=10000, help="Devices scanned")
+        p.add_argument("--repeat", type=int, default=20, help="Connections made")
+        p.add_argument(
+            "--duration", type=float, default=3.0, help="Seconds per throughput test"
+        )
+    args = parser.parse_args()
+    if args.command is None:
+        parser.print_help()
+        return 0
+
+    # Bleak logs at debug level by default; measure without log output.
+    logging.getLogger("bleak").setLevel(logging.WARNING)
+    if args.command == "compare" and args.results:
+        with open(args.results) as f:
+            current = json.load(f)
+    else:
+        loop = asyncio.get_event_loop()
+        current = {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {
+                "devices": args.devices,
+                "repeat": args.repeat,
+                "duration": args.duration,
+            },
+            "results": loop.run_until_complete(run(args, loop)),
+        }
+        _print_results(current["results"])
+
+    if args.command == "run":
+        if args.save:
+            with open(args.save, "w") as f:
+                json.dump(current, f, indent=2)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    return 1 if compare(baseline, current, args.threshold) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
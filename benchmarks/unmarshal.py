@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+D-Bus unmarshalling
+-------------------
+
+Microbenchmark of decoding the bodies of BlueZ messages, comparing the generic
+decoders of :py:mod:`bleak.backends.bluezdbus.aiodbus.marshal` with the
+specialised ones for ``a{sv}``, ``a{sa{sv}}`` and ``a{oa{sa{sv}}}``, with and
+without skipping unread properties, and ``txdbus`` if installed.
+
+The payloads are captured from :py:mod:`bleak.backends.bluezdbus.mock` on a private
+D-Bus daemon: ``PropertiesChanged`` and ``InterfacesAdded`` signals and a
+``GetManagedObjects`` reply. Signals can instead be taken from a capture file
+recorded from real hardware with :py:mod:`bleak.backends.bluezdbus.capture`::
+
+    python benchmarks/unmarshal.py --devices 1000
+    python benchmarks/unmarshal.py --capture scan.blecap
+
+"""
+import argparse
+import asyncio
+import io
+import logging
+import sys
+import time
+
+from bleak.backends.bluezdbus import connection, defs
+from bleak.backends.bluezdbus.aiodbus.marshal import (
+    decoder,
+    generic_decoder,
+    interfaces_decoder,
+    managed_objects_decoder,
+    properties_decoder,
+    split_signature,
+    unmarshal,
+)
+from bleak.backends.bluezdbus.aiodbus.message import METHOD_RETURN
+from bleak.backends.bluezdbus.capture import CaptureRecorder, CaptureReplayer
+
+#: Properties read by the scanner, for the decoders skipping everything else.
+SCANNER_KEYS = (
+    "Address",
+    "Alias",
+    "Name",
+    "RSSI",
+    "UUIDs",
+    "ManufacturerData",
+    "ServiceData",
+)
+
+
+def _filtered(signature, endian):
+    if signature == "a{sv}":
+        return properties_decoder(endian, SCANNER_KEYS)
+    if signature == "a{sa{sv}}":
+        return interfaces_decoder(endian, (defs.DEVICE_INTERFACE,), SCANNER_KEYS)
+    if signature == "a{oa{sa{sv}}}":
+        return managed_objects_decoder(endian, (defs.DEVICE_INTERFACE,), SCANNER_KEYS)
+    return decoder(signature, endian)
+
+
+DECODERS = [
+    ("generic", generic_decoder),
+    ("specialised", decoder),
+    ("specialised, filtered", _filtered),
+]
+
+
+def _split_body(raw):
+    """Signature and offset of the body of a message in wire format."""
+    endian = "<" if raw[:1] == b"l" else ">"
+    (fields,), offset = unmarshal("a(yv)", raw, 12, endian)
+    offset += -offset % 8
+    return dict(fields).get(8, ""), offset, endian
+
+
+def _decode_all(payloads, lookup, repeat):
+    prepared = []
+    for raw, signature, offset, endian in payloads:
+        prepared.append(
+            (raw, offset, [lookup(t, endian) for t in split_signature(signature)])
+        )
+    t = time.perf_counter()
+    for _ in range(repeat):
+        for raw, offset, decoders in prepared:
+            off = offset
+            for dec in decoders:
+                _, off = dec(raw, off, ())
+    return time.perf_counter() - t
+
+
+def _txdbus_decode_all(payloads, repeat):
+    from txdbus.marshal import unmarshal as tx_unmarshal
+
+    t = time.perf_counter()
+    for _ in range(repeat):
+        for raw, signature, offset, endian in payloads:
+            tx_unmarshal(signature, raw, offset, lendian=endian == "<")
+    return time.perf_counter() - t
+
+
+async def _capture_mock(n_devices, loop):
+    from bleak.backends.bluezdbus.mock import ADAPTER_PATH, MockBlueZ, PrivateBus
+
+    signals = io.BytesIO()
+    replies = []
+    with PrivateBus() as private_bus:
+        mock = MockBlueZ(private_bus.address, loop, advertisement_rate=1e6)
+        await mock.start()
+        mock.add_devices(n_devices)
+        bus = await connection.connect(loop, private_bus.address, "native")
+
+        # Keep the raw GetManagedObjects reply as well as the signals.
+        dispatch = bus._dispatch
+
+        def _dispatch(raw):
+            if raw[1] == METHOD_RETURN and len(raw) > 1024:
+                replies.append(raw)
+            dispatch(raw)
+
+        bus._dispatch = _dispatch
+        recorder = CaptureRecorder(signals)
+        recorder.attach(bus)
+        rules = []
+        for interface, member in (
+            (defs.OBJECT_MANAGER_INTERFACE, "InterfacesAdded"),
+            (defs.PROPERTIES_INTERFACE, "PropertiesChanged"),
+        ):
+            rules.append(
+                await bus.add_match(lambda m: None, interface=interface, member=member)
+            )
+        await bus.call_remote(
+            ADAPTER_PATH,
+            "StartDiscovery",
+            interface=defs.ADAPTER_INTERFACE,
+            destination=defs.BLUEZ_SERVICE,
+        )
+        deadline = loop.time() + 60.0
+        while recorder.count < 2 * n_devices and loop.time() < deadline:
+            await asyncio.sleep(0.05)
+        recorder.close()
+        await bus.call_remote(
+            "/",
+            "GetManagedObjects",
+            interface=defs.OBJECT_MANAGER_INTERFACE,
+            destination=defs.BLUEZ_SERVICE,
+        )
+        for rule in rules:
+            await bus.del_match(rule)
+        bus.disconnect()
+        await mock.stop()
+    signals.seek(0)
+    return [raw for _, raw in CaptureReplayer(signals).raw_messages()], replies
+
+
+def _categories(signals, replies):
+    out = {}
+    for raw in signals:
+        signature, offset, endian = _split_body(raw)
+        out.setdefault(signature, []).append((raw, signature, offset, endian))
+    for raw in replies:
+        signature, offset, endian = _split_body(raw)
+        out.setdefault(signature, []).append((raw, signature, offset, endian))
+    return out
+
+
+def run(args, loop):
+    if args.capture:
+        replayer = CaptureReplayer(args.capture)
+        signals, replies = [raw for _, raw in replayer.raw_messages()], []
+    else:
+        signals, replies = loop.run_until_complete(_capture_mock(args.devices, loop))
+
+    try:
+        import txdbus  # noqa: F401
+
+        decoders = DECODERS + [("txdbus", None)]
+    except ImportError:
+        decoders = DECODERS
+
+    for signature, payloads in sorted(_categories(signals, replies).items()):
+        n_bytes = sum(len(raw) - offset for raw, _, offset, _ in payloads)
+        repeat = max(1, int(args.bytes / max(n_bytes, 1)))
+        print(
+            "{0} ({1} messages, {2} bytes of bodies):".format(
+                signature, len(payloads), n_bytes
+            )
+        )
+        baseline = None
+        for name, lookup in decoders:
+            if lookup is None:
+                elapsed = min(
+                    _txdbus_decode_all(payloads, repeat) for _ in range(args.rounds)
+                )
+            else:
+                elapsed = min(
+                    _decode_all(payloads, lookup, repeat) for _ in range(args.rounds)
+                )
+            per_sec = len(payloads) * repeat / elapsed
+            baseline = baseline or per_sec
+            print(
+                "{0:>24}: {1:12.0f} messages/s {2:8.1f} MB/s {3:6.2f}x".format(
+                    name,
+                    per_sec,
+                    n_bytes * repeat / elapsed / 2 ** 20,
+                    per_sec / baseline,
+                )
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--devices", type=int, default=1000, help="Devices of the mock")
+    parser.add_argument("--capture", help="Take signals from this capture file")
+    parser.add_argument(
+        "--bytes", type=float, default=2e7, help="Bytes decoded per measurement"
+    )
+    parser.add_argument(
+        "--rounds", type=int, default=3, help="Measurements, of which the best is kept"
+    )
+    args = parser.parse_args()
+
+    logging.getLogger("bleak").setLevel(logging.WARNING)
+    run(args, asyncio.get_event_loop())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,5 @@
 from asyncio import AbstractEventLoop
 
-from twisted.internet.asyncioreactor import AsyncioSelectorReactor
-
 _reactors = {}
 
 
@@ -14,6 +12,9 @@ def get_reactor(loop: AbstractEventLoop):
     event loop anyway, but in the case someone has different loops, this
     construct still works without leaking resources.
 
+    Only used with the ``txdbus`` D-Bus transport, see
+    :py:mod:`bleak.backends.bluezdbus.connection`.
+
     Args:
         loop (asyncio.events.AbstractEventLoop): The event loop to use.
 
@@ -23,6 +24,8 @@ def get_reactor(loop: AbstractEventLoop):
 
     """
     if loop not in _reactors:
+        from twisted.internet.asyncioreactor import AsyncioSelectorReactor
+
         _reactors[loop] = AsyncioSelectorReactor(loop)
 
     return _reactors[loop]
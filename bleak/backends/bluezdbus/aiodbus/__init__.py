@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+A D-Bus client implemented directly on the asyncio event loop.
+
+It implements the parts of the D-Bus protocol that the BlueZ backend needs:
+authentication with the ``EXTERNAL`` mechanism over Unix sockets, the wire
+format, method calls and match rules for signals. Messages are read and written
+in callbacks of the event loop, without the Twisted reactor and ``Deferred``
+objects of ``txdbus``.
+
+.. code-block:: python
+
+    bus = await connect("system")
+    objects = await bus.call_remote(
+        "/",
+        "GetManagedObjects",
+        interface="org.freedesktop.DBus.ObjectManager",
+        destination="org.bluez",
+    )
+    bus.disconnect()
+
+"""
+from bleak.backends.bluezdbus.aiodbus.bus import MessageBus, connect  # noqa: F401
+from bleak.backends.bluezdbus.aiodbus.marshal import (  # noqa: F401
+    MarshallingError,
+    Variant,
+)
+from bleak.backends.bluezdbus.aiodbus.message import (  # noqa: F401
+    Message,
+    parse_message,
+)
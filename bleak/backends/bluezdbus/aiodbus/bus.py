@@ -0,0 +1,602 @@
+# -*- coding: utf-8 -*-
+"""
+D-Bus connections on the asyncio event loop.
+"""
+import array
+import asyncio
+import itertools
+import logging
+import os
+import socket
+import time
+from typing import Callable, List, Tuple
+from urllib.parse import unquote
+
+from bleak.backends.bluezdbus.aiodbus.marshal import MarshallingError, signature_of
+from bleak.backends.bluezdbus.aiodbus.message import (
+    ERROR,
+    METHOD_CALL,
+    METHOD_RETURN,
+    NO_AUTO_START,
+    NO_REPLY_EXPECTED,
+    SIGNAL,
+    Message,
+    message_length,
+    parse_message,
+)
+from bleak.exc import BleakDBusError, BleakError
+
+logger = logging.getLogger(__name__)
+
+BUS_NAME = "org.freedesktop.DBus"
+BUS_PATH = "/org/freedesktop/DBus"
+BUS_INTERFACE = "org.freedesktop.DBus"
+PEER_INTERFACE = "org.freedesktop.DBus.Peer"
+
+DEFAULT_SYSTEM_BUS_ADDRESS = "unix:path=/var/run/dbus/system_bus_socket"
+
+_MAX_FDS = 16
+_RECV_SIZE = 65536
+
+
+def parse_address(address: str) -> List[Tuple[str, dict]]:
+    """Parse a D-Bus server address.
+
+    Args:
+        address (str): ``system``, ``session`` or an address like
+          ``unix:path=/var/run/dbus/system_bus_socket``. Alternatives are
+          separated by ``;``.
+
+    Returns:
+        A list of (transport, options) tuples.
+
+    """
+    if address == "system":
+        address = os.environ.get("DBUS_SYSTEM_BUS_ADDRESS", DEFAULT_SYSTEM_BUS_ADDRESS)
+    elif address == "session":
+        address = os.environ.get("DBUS_SESSION_BUS_ADDRESS")
+        if not address:
+            raise BleakError("DBUS_SESSION_BUS_ADDRESS is not set")
+
+    out = []
+    for part in address.split(";"):
+        if not part:
+            continue
+        transport, _, options = part.partition(":")
+        out.append(
+            (
+                transport,
+                dict(
+                    (k, unquote(v))
+                    for k, _, v in (o.partition("=") for o in options.split(","))
+                    if k
+                ),
+            )
+        )
+    return out
+
+
+def _socket_for(transport: str, options: dict):
+    if transport == "unix":
+        if "path" in options:
+            return socket.AF_UNIX, options["path"]
+        if "abstract" in options:
+            return socket.AF_UNIX, "\0" + options["abstract"]
+    elif transport == "tcp":
+        family = socket.AF_INET6 if options.get("family") == "ipv6" else socket.AF_INET
+        return family, (options.get("host", "localhost"), int(options["port"]))
+    raise BleakError("Unsupported D-Bus address transport {0!r}".format(transport))
+
+
+def _quote(value: str) -> str:
+    return "'{0}'".format(value.replace("'", "'\\''"))
+
+
+def _close_fds(fds) -> None:
+    for fd in fds:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+
+class _MatchRule(object):
+    __slots__ = ("rule", "callback", "checks", "path", "path_namespace", "args")
+
+    def __init__(self, callback, **kwargs):
+        kwargs.setdefault("type", "signal")
+        self.callback = callback
+        self.rule = ",".join(
+            "{0}={1}".format(k, _quote(str(v))) for k, v in kwargs.items()
+        )
+        self.path = kwargs.pop("path", None)
+        self.path_namespace = kwargs.pop("path_namespace", None)
+        if self.path_namespace == "/":
+            self.path_namespace = None
+        type_ = kwargs.pop("type")
+        self.checks = [
+            (
+                "type",
+                {"signal": SIGNAL, "method_call": METHOD_CALL}.get(type_, type_),
+            )
+        ]
+        sender = kwargs.pop("sender", None)
+        # Well-known names are not resolved, so only unique names are checked.
+        if sender is not None and sender.startswith(":"):
+            self.checks.append(("sender", sender))
+        self.args = []
+        for k, v in kwargs.items():
+            if k.startswith("arg") and k[3:].isdigit():
+                self.args.append((int(k[3:]), v))
+            elif k in ("interface", "member", "destination"):
+                self.checks.append((k, v))
+
+    def matches(self, message: Message) -> bool:
+        for attribute, value in self.checks:
+            if getattr(message, attribute) != value:
+                return False
+        if self.path is not None and message.path != self.path:
+            return False
+        if self.path_namespace is not None:
+            path = message.path or ""
+            if path != self.path_namespace and not path.startswith(
+                self.path_namespace + "/"
+            ):
+                return False
+        for i, value in self.args:
+            if i >= len(message.body) or message.body[i] != value:
+                return False
+        return True
+
+
+class MessageBus(object):
+    """A connection to a D-Bus message bus, made with :py:func:`connect`.
+
+    The methods mirror those of ``txdbus.client.DBusClientConnection`` that the
+    BlueZ backend uses, as coroutines.
+
+    Attributes:
+        unique_name (str): The unique name of the connection on the bus.
+
+    """
+
+    def __init__(self, sock: socket.socket, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.unique_name = None
+        self._sock = sock
+        self._unix_fds = False
+        self._serials = itertools.count(1)
+        self._pending = {}
+        self._rules = {}
+        self._rule_ids = itertools.count(1)
+        self._signal_hooks = []
+        self._lookups = {}
+        self._buffer = bytearray()
+        self._received_fds = []
+        self._out = []
+        self._writing = False
+        self._connected = True
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    # Connection setup
+
+    async def _authenticate(self) -> None:
+        sock_sendall = self.loop.sock_sendall
+        await sock_sendall(self._sock, b"\0")
+        await sock_sendall(
+            self._sock,
+            "AUTH EXTERNAL {0}\r\n".format(
+                str(os.getuid()).encode("ascii").hex()
+            ).encode("ascii"),
+        )
+        reply = await self._read_line()
+        if not reply.startswith(b"OK"):
+            raise BleakError("D-Bus authentication failed: {0!r}".format(reply))
+
+        if self._sock.family == socket.AF_UNIX:
+            await sock_sendall(self._sock, b"NEGOTIATE_UNIX_FD\r\n")
+            self._unix_fds = (await self._read_line()).startswith(b"AGREE_UNIX_FD")
+        await sock_sendall(self._sock, b"BEGIN\r\n")
+
+    async def _read_line(self) -> bytes:
+        while b"\r\n" not in self._buffer:
+            data = await self.loop.sock_recv(self._sock, 512)
+            if not data:
+                raise BleakError("D-Bus connection closed during authentication")
+            self._buffer += data
+        line, _, rest = bytes(self._buffer).partition(b"\r\n")
+        self._buffer = bytearray(rest)
+        return line
+
+    async def _hello(self) -> None:
+        self.loop.add_reader(self._sock.fileno(), self._on_readable)
+        # Messages may already follow the authentication replies.
+        self._process_buffer()
+        self.unique_name = await self.call_remote(
+            BUS_PATH, "Hello", interface=BUS_INTERFACE, destination=BUS_NAME
+        )
+
+    def disconnect(self) -> None:
+        """Close the connection, failing all pending calls."""
+        if not self._connected:
+            return
+        self._connected = False
+        self.loop.remove_reader(self._sock.fileno())
+        if self._writing:
+            self.loop.remove_writer(self._sock.fileno())
+            self._writing = False
+        self._sock.close()
+        _close_fds(self._received_fds)
+        self._received_fds = []
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(BleakError("D-Bus connection closed"))
+
+    # Sending
+
+    def send(self, message: Message) -> int:
+        """Send a message.
+
+        Returns:
+            The serial number of the message.
+
+        """
+        if not self._connected:
+            raise BleakError("D-Bus connection closed")
+        serial = next(self._serials)
+        message.serial = serial
+        data, fds = message.to_bytes(serial)
+        if fds and not self._unix_fds:
+            raise BleakError("Passing file descriptors is not supported")
+        self._out.append((data, fds))
+        if not self._writing:
+            self._on_writable()
+        return serial
+
+    def _on_writable(self) -> None:
+        try:
+            while self._out:
+                data, fds = self._out[0]
+                if fds:
+                    sent = self._sock.sendmsg(
+                        [data],
+                        [
+                            (
+                                socket.SOL_SOCKET,
+                                socket.SCM_RIGHTS,
+                                array.array("i", fds).tobytes(),
+                            )
+                        ],
+                    )
+                else:
+                    sent = self._sock.send(data)
+                if sent < len(data):
+                    self._out[0] = (data[sent:], [])
+                    break
+                self._out.pop(0)
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError as e:
+            logger.error("D-Bus connection lost: {0}".format(e))
+            self.disconnect()
+            return
+
+        if self._out and not self._writing:
+            self.loop.add_writer(self._sock.fileno(), self._on_writable)
+            self._writing = True
+        elif not self._out and self._writing:
+            self.loop.remove_writer(self._sock.fileno())
+            self._writing = False
+
+    async def call_remote(
+        self,
+        path: str,
+        method: str,
+        interface: str = None,
+        destination: str = None,
+        signature: str = None,
+        body: list = (),
+        expectReply: bool = True,
+        autoStart: bool = True,
+        timeout: float = None,
+        returnSignature: str = None,
+    ):
+        """Call a method on a remote object.
+
+        The arguments are named as those of ``txdbus``'s ``callRemote``.
+
+        Args:
+            path (str): Object path to call the method on.
+            method (str): Method name.
+            interface (str): Interface of the method.
+            destination (str): Bus name of the remote object.
+            signature (str): Signature of ``body``. Inferred from the values if
+              not given.
+            body (list): Arguments of the method.
+            expectReply (bool): Whether to wait for the reply.
+            autoStart (bool): Whether the bus may start the destination service.
+            timeout (float): Seconds to wait for the reply.
+            returnSignature (str): Expected signature of the reply. Not checked.
+
+        Returns:
+            ``None`` if the method returns nothing, its return value if it
+            returns one, or a list of its return values.
+
+        Raises:
+            BleakDBusError: If the method returns an error.
+
+        """
+        body = list(body or ())
+        if signature is None:
+            signature = "".join(signature_of(v) for v in body)
+        flags = 0 if expectReply else NO_REPLY_EXPECTED
+        if not autoStart:
+            flags |= NO_AUTO_START
+        message = Message(
+            METHOD_CALL,
+            path=path,
+            interface=interface,
+            member=method,
+            destination=destination,
+            signature=signature,
+            body=body,
+            flags=flags,
+        )
+        if not expectReply:
+            self.send(message)
+            return None
+
+        future = self.loop.create_future()
+        serial = self.send(message)
+        self._pending[serial] = future
+        try:
+            if timeout is None:
+                reply = await future
+            else:
+                reply = await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(serial, None)
+
+        if not reply:
+            return None
+        if len(reply) == 1:
+            return reply[0]
+        return reply
+
+    async def add_match(self, callback: Callable, **rule) -> int:
+        """Add a match rule, calling a callback with each matching message.
+
+        Args:
+            callback (callable): Called with each matching
+              :py:class:`~bleak.backends.bluezdbus.aiodbus.message.Message`.
+            **rule: Match rule keys, e.g. ``interface``, ``member``, ``path``,
+              ``path_namespace``, ``sender`` and ``arg0``. ``type`` defaults
+              to ``signal``.
+
+        Returns:
+            Integer rule id, for :py:meth:`del_match`.
+
+        """
+        match = _MatchRule(callback, **rule)
+        await self.call_remote(
+            BUS_PATH,
+            "AddMatch",
+            interface=BUS_INTERFACE,
+            destination=BUS_NAME,
+            signature="s",
+            body=[match.rule],
+        )
+        rule_id = next(self._rule_ids)
+        self._rules[rule_id] = match
+        return rule_id
+
+    async def del_match(self, rule_id: int) -> None:
+        """Remove a match rule added with :py:meth:`add_match`."""
+        match = self._rules.pop(rule_id, None)
+        if match is None:
+            raise KeyError("Unknown match rule id {0}".format(rule_id))
+        if self._connected:
+            await self.call_remote(
+                BUS_PATH,
+                "RemoveMatch",
+                interface=BUS_INTERFACE,
+                destination=BUS_NAME,
+                signature="s",
+                body=[match.rule],
+            )
+
+    def add_signal_hook(self, hook: Callable[[bytes], None]) -> None:
+        """Call a function with every received signal, in D-Bus wire format."""
+        self._signal_hooks.append(hook)
+
+    def remove_signal_hook(self, hook: Callable[[bytes], None]) -> None:
+        self._signal_hooks.remove(hook)
+
+    # Receiving
+
+    def set_signal_decoder(
+        self, interface: str, member: str, lookup: Callable = None
+    ) -> None:
+        """Decode the bodies of signals with other decoders, e.g. skipping values.
+
+        The decoders apply to all match rules of the signal on this connection.
+
+        Args:
+            interface (str): Interface of the signals.
+            member (str): Name of the signals.
+            lookup (callable): ``lookup(signature, endian)`` returning the decoder
+              of a single complete type. ``None`` restores the default decoders.
+
+        """
+        if lookup is None:
+            self._lookups.pop((interface, member), None)
+        else:
+            self._lookups[(interface, member)] = lookup
+
+    def _on_readable(self) -> None:
+        try:
+            if self._unix_fds:
+                data, ancdata, _, _ = self._sock.recvmsg(
+                    _RECV_SIZE, socket.CMSG_SPACE(_MAX_FDS * 4)
+                )
+                for level, kind, fd_data in ancdata:
+                    if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                        fds = array.array("i")
+                        fds.frombytes(fd_data[: len(fd_data) - len(fd_data) % 4])
+                        self._received_fds.extend(fds)
+            else:
+                data = self._sock.recv(_RECV_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            logger.error("D-Bus connection lost: {0}".format(e))
+            self.disconnect()
+            return
+        if not data:
+            logger.debug("D-Bus connection closed by the bus")
+            self.disconnect()
+            return
+        self._buffer += data
+        self._process_buffer()
+
+    def _process_buffer(self) -> None:
+        buf = self._buffer
+        offset = 0
+        try:
+            while self._connected:
+                length = message_length(buf, offset)
+                if length is None or len(buf) - offset < length:
+                    break
+                raw = bytes(buf[offset : offset + length])
+                offset += length
+                self._dispatch(raw)
+        except BleakError as e:
+            logger.error("Invalid D-Bus message received: {0}".format(e))
+            self.disconnect()
+            return
+        finally:
+            if offset:
+                del buf[:offset]
+
+    def _dispatch(self, raw: bytes) -> None:
+        try:
+            message = parse_message(raw, self._received_fds, self._lookups)
+        except BleakError:
+            raise
+        except Exception as e:
+            raise MarshallingError("Malformed message: {0!r}".format(e))
+        message.received_at = time.monotonic()
+        if message.unix_fds:
+            del self._received_fds[: len(message.unix_fds)]
+
+        # File descriptors are handed over only with the reply to a call, those of
+        # other messages are closed once they have been dispatched.
+        if message.type == METHOD_RETURN or message.type == ERROR:
+            future = self._pending.get(message.reply_serial)
+            if future is None or future.done():
+                _close_fds(message.unix_fds)
+                return
+            if message.type == ERROR:
+                _close_fds(message.unix_fds)
+                future.set_exception(
+                    BleakDBusError(
+                        message.error_name,
+                        message.body[0]
+                        if message.body and isinstance(message.body[0], str)
+                        else None,
+                    )
+                )
+            else:
+                future.set_result(message.body)
+        elif message.type == SIGNAL:
+            for hook in self._signal_hooks:
+                try:
+                    hook(raw)
+                except Exception:
+                    logger.exception(
+                        "Error in hook of {0}.{1} signal".format(
+                            message.interface, message.member
+                        )
+                    )
+            for match in list(self._rules.values()):
+                if match.matches(message):
+                    try:
+                        match.callback(message)
+                    except Exception:
+                        logger.exception(
+                            "Error in callback of {0}.{1} signal".format(
+                                message.interface, message.member
+                            )
+                        )
+            _close_fds(message.unix_fds)
+        elif message.type == METHOD_CALL:
+            _close_fds(message.unix_fds)
+            self._reply_to_method_call(message)
+
+    def _reply_to_method_call(self, message: Message) -> None:
+        if message.flags & NO_REPLY_EXPECTED:
+            return
+        if message.interface == PEER_INTERFACE and message.member == "Ping":
+            reply = Message(METHOD_RETURN, reply_serial=message.serial)
+        else:
+            reply = Message(
+                ERROR,
+                error_name="org.freedesktop.DBus.Error.UnknownMethod",
+                reply_serial=message.serial,
+                signature="s",
+                body=["Unknown method {0}".format(message.member)],
+            )
+        reply.destination = message.sender
+        self.send(reply)
+
+
+async def connect(
+    address: str = "system", loop: asyncio.AbstractEventLoop = None
+) -> MessageBus:
+    """Connect to a D-Bus message bus.
+
+    Authenticates with the ``EXTERNAL`` mechanism, i.e. the credentials of the
+    process, and registers on the bus.
+
+    Args:
+        address (str): ``system``, ``session`` or a D-Bus server address.
+        loop (asyncio.AbstractEventLoop): The event loop to use.
+
+    Returns:
+        The connected :py:class:`MessageBus`.
+
+    """
+    loop = loop if loop else asyncio.get_event_loop()
+    errors = []
+    for transport, options in parse_address(address):
+        try:
+            family, sockaddr = _socket_for(transport, options)
+        except (BleakError, KeyError, ValueError) as e:
+            errors.append(str(e))
+            continue
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            await loop.sock_connect(sock, sockaddr)
+        except OSError as e:
+            sock.close()
+            errors.append(str(e))
+            continue
+
+        bus = MessageBus(sock, loop)
+        try:
+            await bus._authenticate()
+            await bus._hello()
+        except BaseException:
+            if bus.connected:
+                bus.disconnect()
+            raise
+        return bus
+
+    raise BleakError(
+        "Could not connect to D-Bus at {0}: {1}".format(address, "; ".join(errors))
+    )
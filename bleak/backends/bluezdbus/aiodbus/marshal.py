@@ -0,0 +1,785 @@
+# -*- coding: utf-8 -*-
+"""
+D-Bus wire format marshalling.
+
+Signatures are compiled once into encoder and decoder functions, which are cached.
+The signatures of most BlueZ traffic, ``a{sv}``, ``a{sa{sv}}`` and ``a{oa{sa{sv}}}``,
+have specialised decoders, which can also skip properties that are not needed, see
+:py:func:`properties_decoder`.
+D-Bus types are mapped to Python types as follows:
+
+* integers and ``h``, file descriptors, to ``int``
+* ``b`` to ``bool`` and ``d`` to ``float``
+* ``s``, ``o`` and ``g`` to ``str``
+* ``ay`` to ``bytes``; ``bytes``, ``bytearray`` or a list of integers when encoding
+* other arrays to ``list`` and dicts, ``a{..}``, to ``dict``
+* structs to ``list``; any sequence is accepted when encoding
+* variants to their value when decoding. When encoding, the signature of a value is
+  inferred, like ``i`` for ``int``, unless it is given as a :py:class:`Variant`.
+
+"""
+import struct
+from collections import namedtuple
+from typing import Callable, Iterable, List, Tuple
+
+from bleak.exc import BleakError
+
+
+class Variant(namedtuple("Variant", ["signature", "value"])):
+    """A value with an explicit signature, for encoding as a variant.
+
+    .. code-block:: python
+
+        {"RSSI": Variant("n", -70), "Pathloss": Variant("q", 10)}
+
+    """
+
+    __slots__ = ()
+
+
+class MarshallingError(BleakError):
+    """Raised when a value does not match its signature, or data is malformed."""
+
+    pass
+
+
+_FIXED = {
+    "y": "B",
+    "b": "I",
+    "n": "h",
+    "q": "H",
+    "i": "i",
+    "u": "I",
+    "x": "q",
+    "t": "Q",
+    "d": "d",
+    "h": "I",
+}
+_ALIGNMENT = {
+    "y": 1,
+    "b": 4,
+    "n": 2,
+    "q": 2,
+    "i": 4,
+    "u": 4,
+    "x": 8,
+    "t": 8,
+    "d": 8,
+    "h": 4,
+    "s": 4,
+    "o": 4,
+    "g": 1,
+    "v": 1,
+    "a": 4,
+    "(": 8,
+    "{": 8,
+}
+
+
+def alignment(signature: str) -> int:
+    return _ALIGNMENT[signature[0]]
+
+
+def _split_one(signature: str, i: int) -> int:
+    """Index after the single complete type starting at ``i``."""
+    try:
+        c = signature[i]
+    except IndexError:
+        raise MarshallingError("Incomplete signature {0!r}".format(signature))
+    if c == "a":
+        return _split_one(signature, i + 1)
+    if c in "({":
+        close = ")" if c == "(" else "}"
+        i += 1
+        while signature[i : i + 1] != close:
+            if i >= len(signature):
+                raise MarshallingError("Unbalanced signature {0!r}".format(signature))
+            i = _split_one(signature, i)
+        return i + 1
+    if c not in _ALIGNMENT:
+        raise MarshallingError(
+            "Invalid type code {0!r} in signature {1!r}".format(c, signature)
+        )
+    return i + 1
+
+
+_split_cache = {}
+
+
+def split_signature(signature: str) -> List[str]:
+    """Split a signature into its single complete types."""
+    try:
+        return _split_cache[signature]
+    except KeyError:
+        pass
+    types = []
+    i = 0
+    while i < len(signature):
+        j = _split_one(signature, i)
+        types.append(signature[i:j])
+        i = j
+    _split_cache[signature] = types
+    return types
+
+
+def signature_of(value) -> str:
+    """Infer the signature of a value to encode as a variant."""
+    if isinstance(value, Variant):
+        return "v"
+    if isinstance(value, bool):
+        return "b"
+    if isinstance(value, int):
+        return "i"
+    if isinstance(value, float):
+        return "d"
+    if isinstance(value, str):
+        return "s"
+    if isinstance(value, (bytes, bytearray)):
+        return "ay"
+    if isinstance(value, dict):
+        if not value:
+            return "a{sv}"
+        key = next(iter(value))
+        return "a{{{0}{1}}}".format(
+            signature_of(key), _common_signature(value.values())
+        )
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return "as"
+        return "a" + _common_signature(value)
+    raise MarshallingError("Cannot infer D-Bus signature of {0!r}".format(value))
+
+
+def _common_signature(values) -> str:
+    signatures = set(signature_of(v) for v in values)
+    return signatures.pop() if len(signatures) == 1 else "v"
+
+
+# Decoders: decode(buf, offset, fds) -> (value, new offset)
+
+_decoder_cache = {}
+
+
+def decoder(signature: str, endian: str = "<") -> Callable:
+    """Get the decoder of a single complete type."""
+    key = (signature, endian)
+    try:
+        return _decoder_cache[key]
+    except KeyError:
+        pass
+    specialised = _SPECIALISED.get(signature)
+    if specialised is not None:
+        dec = specialised(endian)
+    else:
+        dec = _compile_decoder(signature, endian, decoder)
+    _decoder_cache[key] = dec
+    return dec
+
+
+_generic_cache = {}
+
+
+def generic_decoder(signature: str, endian: str = "<") -> Callable:
+    """Get the decoder of a single complete type, without specialised decoders."""
+    key = (signature, endian)
+    try:
+        return _generic_cache[key]
+    except KeyError:
+        pass
+    dec = _compile_decoder(signature, endian, generic_decoder)
+    _generic_cache[key] = dec
+    return dec
+
+
+def _compile_decoder(t, e, lookup):
+    c = t[0]
+    u32 = struct.Struct(e + "I").unpack_from
+
+    if c in _FIXED:
+        s = struct.Struct(e + _FIXED[c])
+        unpack = s.unpack_from
+        size = s.size
+
+        if c == "b":
+
+            def dec(buf, off, fds):
+                off += -off % 4
+                return unpack(buf, off)[0] != 0, off + 4
+
+        elif c == "h":
+
+            def dec(buf, off, fds):
+                off += -off % 4
+                i = unpack(buf, off)[0]
+                return fds[i] if i < len(fds) else -1, off + 4
+
+        else:
+
+            def dec(buf, off, fds):
+                off += -off % size
+                return unpack(buf, off)[0], off + size
+
+        return dec
+
+    if c in "so":
+
+        def dec(buf, off, fds):
+            off += -off % 4
+            n = u32(buf, off)[0]
+            off += 4
+            return str(buf[off : off + n], "utf-8"), off + n + 1
+
+        return dec
+
+    if c == "g":
+
+        def dec(buf, off, fds):
+            n = buf[off]
+            off += 1
+            return str(buf[off : off + n], "ascii"), off + n + 1
+
+        return dec
+
+    if c == "v":
+        dec_sig = lookup("g", e)
+
+        def dec(buf, off, fds):
+            sig, off = dec_sig(buf, off, fds)
+            return lookup(sig, e)(buf, off, fds)
+
+        return dec
+
+    if c == "(":
+        fields = [lookup(f, e) for f in split_signature(t[1:-1])]
+
+        def dec(buf, off, fds):
+            off += -off % 8
+            out = []
+            for f in fields:
+                v, off = f(buf, off, fds)
+                out.append(v)
+            return out, off
+
+        return dec
+
+    if c == "a":
+        elem = t[1:]
+        if elem == "y":
+
+            def dec(buf, off, fds):
+                off += -off % 4
+                n = u32(buf, off)[0]
+                off += 4
+                return bytes(buf[off : off + n]), off + n
+
+            return dec
+
+        if elem[0] == "{":
+            key_dec, value_dec = [lookup(f, e) for f in split_signature(elem[1:-1])]
+
+            def dec(buf, off, fds):
+                off += -off % 4
+                n = u32(buf, off)[0]
+                off += 4
+                off += -off % 8
+                end = off + n
+                out = {}
+                while off < end:
+                    off += -off % 8
+                    k, off = key_dec(buf, off, fds)
+                    out[k], off = value_dec(buf, off, fds)
+                return out, end
+
+            return dec
+
+        elem_dec = lookup(elem, e)
+        elem_align = alignment(elem)
+
+        def dec(buf, off, fds):
+            off += -off % 4
+            n = u32(buf, off)[0]
+            off += 4
+            off += -off % elem_align
+            end = off + n
+            out = []
+            while off < end:
+                v, off = elem_dec(buf, off, fds)
+                out.append(v)
+            return out, end
+
+        return dec
+
+    raise MarshallingError("Cannot decode type {0!r}".format(t))
+
+
+# Specialised decoders
+#
+# Nearly all BlueZ traffic consists of property dicts, a{sv}: in PropertiesChanged and
+# InterfacesAdded signals and GetManagedObjects replies. These are decoded in a single
+# loop, with the values of the common variant signatures decoded inline. Properties and
+# interfaces that are not wanted can be skipped over without decoding them.
+
+
+_skipper_cache = {}
+
+
+def skipper(signature: str, endian: str = "<") -> Callable:
+    """Get a function skipping over a single complete type.
+
+    Returns:
+        A function ``skip(buf, offset) -> offset`` returning the offset after the value.
+
+    """
+    key = (signature, endian)
+    try:
+        return _skipper_cache[key]
+    except KeyError:
+        pass
+    skip = _compile_skipper(signature, endian)
+    _skipper_cache[key] = skip
+    return skip
+
+
+def _compile_skipper(t, e):
+    c = t[0]
+    u32 = struct.Struct(e + "I").unpack_from
+
+    if c in _FIXED:
+        size = struct.calcsize(_FIXED[c])
+
+        def skip(buf, off):
+            return off + -off % size + size
+
+    elif c in "so":
+
+        def skip(buf, off):
+            off += -off % 4
+            return off + 5 + u32(buf, off)[0]
+
+    elif c == "g":
+
+        def skip(buf, off):
+            return off + buf[off] + 2
+
+    elif c == "v":
+
+        def skip(buf, off):
+            n = buf[off]
+            return skipper(str(buf[off + 1 : off + 1 + n], "ascii"), e)(
+                buf, off + n + 2
+            )
+
+    elif c == "(":
+        fields = [skipper(f, e) for f in split_signature(t[1:-1])]
+
+        def skip(buf, off):
+            off += -off % 8
+            for f in fields:
+                off = f(buf, off)
+            return off
+
+    elif c == "a":
+        elem_align = alignment(t[1:])
+
+        def skip(buf, off):
+            off += -off % 4
+            n = u32(buf, off)[0]
+            off += 4
+            return off + -off % elem_align + n
+
+    else:
+        raise MarshallingError("Cannot skip type {0!r}".format(t))
+    return skip
+
+
+_properties_cache = {}
+_MAX_CACHED_STRINGS = 1024
+
+
+def properties_decoder(endian: str = "<", keys: Iterable[str] = None) -> Callable:
+    """Get a decoder of ``a{sv}`` property dicts.
+
+    Args:
+        endian (str): ``<`` for little-endian or ``>`` for big-endian data.
+        keys (iterable): Names of the properties to decode. The values of other
+          properties are skipped, and left out of the dict. Defaults to all.
+
+    Returns:
+        A decoder ``decode(buf, offset, fds) -> (dict, offset)``, where ``buf`` must
+        be ``bytes``.
+
+    """
+    keys = frozenset(keys) if keys is not None else None
+    try:
+        return _properties_cache[(endian, keys)]
+    except KeyError:
+        pass
+    dec = _compile_properties_decoder(endian, keys)
+    _properties_cache[(endian, keys)] = dec
+    return dec
+
+
+def _compile_properties_decoder(e, keys):
+    u32 = struct.Struct(e + "I").unpack_from
+    i16 = struct.Struct(e + "h").unpack_from
+    # Property names and signatures repeat, so their decoded strings are reused.
+    strings = {}
+
+    def dec(buf, off, fds):
+        off += -off % 4
+        end = u32(buf, off)[0]
+        off += 4
+        off += -off % 8
+        end += off
+        out = {}
+        while off < end:
+            off += -off % 8
+            n = u32(buf, off)[0]
+            off += 4
+            b = buf[off : off + n]
+            key = strings.get(b)
+            if key is None:
+                key = str(b, "utf-8")
+                if len(strings) < _MAX_CACHED_STRINGS:
+                    strings[b] = key
+            off += n + 1
+            n = buf[off]
+            b = buf[off + 1 : off + 1 + n]
+            sig = strings.get(b)
+            if sig is None:
+                sig = str(b, "ascii")
+                if len(strings) < _MAX_CACHED_STRINGS:
+                    strings[b] = sig
+            off += n + 2
+
+            if keys is not None and key not in keys:
+                off = skipper(sig, e)(buf, off)
+            elif sig == "s" or sig == "o":
+                off += -off % 4
+                n = u32(buf, off)[0]
+                off += 4
+                out[key] = str(buf[off : off + n], "utf-8")
+                off += n + 1
+            elif sig == "n":
+                off += off & 1
+                out[key] = i16(buf, off)[0]
+                off += 2
+            elif sig == "b":
+                off += -off % 4
+                out[key] = u32(buf, off)[0] != 0
+                off += 4
+            elif sig == "ay":
+                off += -off % 4
+                n = u32(buf, off)[0]
+                off += 4
+                out[key] = buf[off : off + n]
+                off += n
+            else:
+                out[key], off = decoder(sig, e)(buf, off, fds)
+        return out, end
+
+    return dec
+
+
+def _compile_named_dict_decoder(e, names, value_decoder, value_skipper, cache):
+    """Decoder of a{sX} or a{oX}, skipping the values of keys not in ``names``."""
+    u32 = struct.Struct(e + "I").unpack_from
+    strings = {}
+
+    def dec(buf, off, fds):
+        off += -off % 4
+        end = u32(buf, off)[0]
+        off += 4
+        off += -off % 8
+        end += off
+        out = {}
+        while off < end:
+            off += -off % 8
+            n = u32(buf, off)[0]
+            off += 4
+            b = buf[off : off + n]
+            name = strings.get(b)
+            if name is None:
+                name = str(b, "utf-8")
+                if cache and len(strings) < _MAX_CACHED_STRINGS:
+                    strings[b] = name
+            off += n + 1
+            if names is not None and name not in names:
+                off = value_skipper(buf, off)
+            else:
+                out[name], off = value_decoder(buf, off, fds)
+        return out, end
+
+    return dec
+
+
+_interfaces_cache = {}
+
+
+def interfaces_decoder(
+    endian: str = "<", interfaces: Iterable[str] = None, keys: Iterable[str] = None
+) -> Callable:
+    """Get a decoder of ``a{sa{sv}}``, the interfaces of an object and their properties.
+
+    Args:
+        endian (str): ``<`` for little-endian or ``>`` for big-endian data.
+        interfaces (iterable): Names of the interfaces to decode. Others are
+          skipped. Defaults to all.
+        keys (iterable): Names of the properties to decode, of all interfaces.
+          Defaults to all.
+
+    Returns:
+        A decoder ``decode(buf, offset, fds) -> (dict, offset)``.
+
+    """
+    interfaces = frozenset(interfaces) if interfaces is not None else None
+    key = (endian, interfaces, frozenset(keys) if keys is not None else None)
+    try:
+        return _interfaces_cache[key]
+    except KeyError:
+        pass
+    dec = _compile_named_dict_decoder(
+        endian,
+        interfaces,
+        properties_decoder(endian, keys),
+        skipper("a{sv}", endian),
+        True,
+    )
+    _interfaces_cache[key] = dec
+    return dec
+
+
+def managed_objects_decoder(
+    endian: str = "<", interfaces: Iterable[str] = None, keys: Iterable[str] = None
+) -> Callable:
+    """Get a decoder of ``a{oa{sa{sv}}}``, the reply of ``GetManagedObjects``.
+
+    Objects without any of ``interfaces`` are left out. The arguments are those of
+    :py:func:`interfaces_decoder`.
+
+    """
+    object_decoder = interfaces_decoder(endian, interfaces, keys)
+    dec = _compile_named_dict_decoder(
+        endian, None, object_decoder, skipper("a{sa{sv}}", endian), False
+    )
+    if interfaces is None:
+        return dec
+
+    def filtered(buf, off, fds):
+        objects, off = dec(buf, off, fds)
+        return {path: i for path, i in objects.items() if i}, off
+
+    return filtered
+
+
+_SPECIALISED = {
+    "a{sv}": properties_decoder,
+    "a{sa{sv}}": interfaces_decoder,
+    "a{oa{sa{sv}}}": managed_objects_decoder,
+}
+
+
+def unmarshal(
+    signature: str,
+    buf,
+    offset: int = 0,
+    endian: str = "<",
+    fds: list = (),
+    lookup: Callable = None,
+) -> Tuple[list, int]:
+    """Decode values of a signature.
+
+    Args:
+        signature (str): Signature of the values.
+        buf (bytes): Data, aligned as a message, i.e. ``offset`` 0 is 8-aligned.
+          Other bytes-like objects are copied to ``bytes`` first.
+        offset (int): Offset in ``buf`` to start at.
+        endian (str): ``<`` for little-endian or ``>`` for big-endian data.
+        fds (list): File descriptors received with the data.
+        lookup (callable): ``lookup(signature, endian)`` returning the decoder of
+          a single complete type, e.g. one of the filtering decoders. Defaults to
+          :py:func:`decoder`.
+
+    Returns:
+        A list of the decoded values and the offset after them.
+
+    """
+    if not isinstance(buf, bytes):
+        buf = bytes(buf)
+    lookup = lookup or decoder
+    out = []
+    try:
+        for t in split_signature(signature):
+            v, offset = lookup(t, endian)(buf, offset, fds)
+            out.append(v)
+    except (struct.error, IndexError, UnicodeDecodeError, ValueError) as e:
+        raise MarshallingError("Malformed data for {0!r}: {1}".format(signature, e))
+    return out, offset
+
+
+# Encoders: encode(out, value, fds) appends to the bytearray out
+
+_encoder_cache = {}
+
+
+def encoder(signature: str) -> Callable:
+    """Get the little-endian encoder of a single complete type."""
+    try:
+        return _encoder_cache[signature]
+    except KeyError:
+        pass
+    enc = _compile_encoder(signature)
+    _encoder_cache[signature] = enc
+    return enc
+
+
+_PADDING = [b"\0" * i for i in range(8)]
+_u32 = struct.Struct("<I")
+
+
+def _compile_encoder(t):
+    c = t[0]
+
+    if c in _FIXED:
+        s = struct.Struct("<" + _FIXED[c])
+        pack = s.pack
+        size = s.size
+
+        if c == "b":
+
+            def enc(out, v, fds):
+                out += _PADDING[-len(out) % 4]
+                out += pack(1 if v else 0)
+
+        elif c == "h":
+
+            def enc(out, v, fds):
+                out += _PADDING[-len(out) % 4]
+                fds.append(v)
+                out += pack(len(fds) - 1)
+
+        else:
+
+            def enc(out, v, fds):
+                out += _PADDING[-len(out) % size]
+                out += pack(v)
+
+        return enc
+
+    if c in "so":
+
+        def enc(out, v, fds):
+            b = v.encode("utf-8")
+            out += _PADDING[-len(out) % 4]
+            out += _u32.pack(len(b))
+            out += b
+            out += b"\0"
+
+        return enc
+
+    if c == "g":
+
+        def enc(out, v, fds):
+            b = v.encode("ascii")
+            out.append(len(b))
+            out += b
+            out += b"\0"
+
+        return enc
+
+    if c == "v":
+        enc_sig = encoder("g")
+
+        def enc(out, v, fds):
+            if isinstance(v, Variant):
+                sig, v = v
+            else:
+                sig = signature_of(v)
+            enc_sig(out, sig, fds)
+            encoder(sig)(out, v, fds)
+
+        return enc
+
+    if c == "(":
+        fields = [encoder(f) for f in split_signature(t[1:-1])]
+
+        def enc(out, v, fds):
+            out += _PADDING[-len(out) % 8]
+            if len(v) != len(fields):
+                raise MarshallingError("Struct {0!r} does not match {1}".format(v, t))
+            for f, x in zip(fields, v):
+                f(out, x, fds)
+
+        return enc
+
+    if c == "a":
+        elem = t[1:]
+        if elem == "y":
+
+            def enc(out, v, fds):
+                out += _PADDING[-len(out) % 4]
+                out += _u32.pack(len(v))
+                out += v if isinstance(v, (bytes, bytearray)) else bytes(v)
+
+            return enc
+
+        elem_align = alignment(elem)
+        if elem[0] == "{":
+            key_enc, value_enc = [encoder(f) for f in split_signature(elem[1:-1])]
+
+            def enc_items(out, v, fds):
+                for k, x in v.items():
+                    out += _PADDING[-len(out) % 8]
+                    key_enc(out, k, fds)
+                    value_enc(out, x, fds)
+
+        else:
+            elem_enc = encoder(elem)
+
+            def enc_items(out, v, fds):
+                for x in v:
+                    elem_enc(out, x, fds)
+
+        def enc(out, v, fds):
+            out += _PADDING[-len(out) % 4]
+            length_offset = len(out)
+            out += b"\0\0\0\0"
+            out += _PADDING[-len(out) % elem_align]
+            start = len(out)
+            enc_items(out, v, fds)
+            _u32.pack_into(out, length_offset, len(out) - start)
+
+        return enc
+
+    raise MarshallingError("Cannot encode type {0!r}".format(t))
+
+
+def marshal(signature: str, values, out: bytearray = None, fds: list = None):
+    """Encode values of a signature, little-endian.
+
+    Args:
+        signature (str): Signature of the values.
+        values (list): The values.
+        out (bytearray): Buffer to append to, aligned as a message. Defaults to a
+          new buffer.
+        fds (list): Receives file descriptors of ``h`` values.
+
+    Returns:
+        The buffer appended to.
+
+    """
+    out = bytearray() if out is None else out
+    fds = [] if fds is None else fds
+    types = split_signature(signature)
+    if len(types) != len(values):
+        raise MarshallingError(
+            "{0} values given for signature {1!r}".format(len(values), signature)
+        )
+    try:
+        for t, v in zip(types, values):
+            encoder(t)(out, v, fds)
+    except (struct.error, TypeError, AttributeError, ValueError) as e:
+        raise MarshallingError(
+            "Cannot encode {0!r} as {1!r}: {2}".format(values, signature, e)
+        )
+    return out
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+D-Bus messages and their wire format.
+"""
+import struct
+from typing import Optional, Tuple
+
+from bleak.backends.bluezdbus.aiodbus.marshal import (
+    MarshallingError,
+    Variant,
+    marshal,
+    unmarshal,
+)
+
+METHOD_CALL = 1
+METHOD_RETURN = 2
+ERROR = 3
+SIGNAL = 4
+
+NO_REPLY_EXPECTED = 0x1
+NO_AUTO_START = 0x2
+
+PROTOCOL_VERSION = 1
+MAX_MESSAGE_LENGTH = 2 ** 27
+
+# Header field codes and signatures
+_PATH = 1
+_INTERFACE = 2
+_MEMBER = 3
+_ERROR_NAME = 4
+_REPLY_SERIAL = 5
+_DESTINATION = 6
+_SENDER = 7
+_SIGNATURE = 8
+_UNIX_FDS = 9
+
+_FIELDS = (
+    ("path", _PATH, "o"),
+    ("interface", _INTERFACE, "s"),
+    ("member", _MEMBER, "s"),
+    ("error_name", _ERROR_NAME, "s"),
+    ("reply_serial", _REPLY_SERIAL, "u"),
+    ("destination", _DESTINATION, "s"),
+    ("sender", _SENDER, "s"),
+)
+_FIELD_NAMES = {code: name for name, code, _ in _FIELDS}
+
+_fixed_header = {
+    b"l": struct.Struct("<BBBBIII"),
+    b"B": struct.Struct(">BBBBIII"),
+}
+# Fixed part of outgoing headers, followed by the header fields array
+_header_start = struct.Struct("<BBBBII")
+
+
+class Message(object):
+    """A D-Bus message.
+
+    Attributes are named as the header fields in the D-Bus specification.
+    ``body`` is a list of the values of ``signature``.
+
+    """
+
+    __slots__ = (
+        "type",
+        "flags",
+        "serial",
+        "path",
+        "interface",
+        "member",
+        "error_name",
+        "reply_serial",
+        "destination",
+        "sender",
+        "signature",
+        "body",
+        "unix_fds",
+        "received_at",
+    )
+
+    def __init__(
+        self,
+        type: int,
+        path: str = None,
+        interface: str = None,
+        member: str = None,
+        destination: str = None,
+        signature: str = "",
+        body: list = (),
+        flags: int = 0,
+        error_name: str = None,
+        reply_serial: int = None,
+        sender: str = None,
+    ):
+        self.type = type
+        self.flags = flags
+        self.serial = 0
+        self.path = path
+        self.interface = interface
+        self.member = member
+        self.error_name = error_name
+        self.reply_serial = reply_serial
+        self.destination = destination
+        self.sender = sender
+        self.signature = signature or ""
+        self.body = list(body)
+        self.unix_fds = []
+        #: ``time.monotonic()`` when a received message was decoded.
+        self.received_at = None
+
+    def __repr__(self):
+        return "<Message type={0} path={1} interface={2} member={3} serial={4}>".format(
+            self.type, self.path, self.interface, self.member, self.serial
+        )
+
+    def to_bytes(self, serial: int) -> Tuple[bytearray, list]:
+        """Marshal the message.
+
+        Args:
+            serial (int): Serial number of the message on its connection.
+
+        Returns:
+            The message in wire format and a list of file descriptors to send with it.
+
+        """
+        fds = []
+        body = marshal(self.signature, self.body, fds=fds) if self.signature else b""
+
+        fields = []
+        for name, code, sig in _FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                fields.append((code, Variant(sig, value)))
+        if self.signature:
+            fields.append((_SIGNATURE, Variant("g", self.signature)))
+        if fds:
+            fields.append((_UNIX_FDS, Variant("u", len(fds))))
+
+        out = bytearray(
+            _header_start.pack(
+                ord("l"), self.type, self.flags, PROTOCOL_VERSION, len(body), serial
+            )
+        )
+        marshal("a(yv)", [fields], out)
+        out += b"\0" * (-len(out) % 8)
+        out += body
+        return out, fds
+
+
+def message_length(buf, offset: int = 0) -> Optional[int]:
+    """Total length of the message starting at ``offset``.
+
+    Returns:
+        The length, or ``None`` if fewer than 16 bytes are available.
+
+    """
+    if len(buf) - offset < 16:
+        return None
+    header = _fixed_header.get(bytes(buf[offset : offset + 1]))
+    if header is None:
+        raise MarshallingError("Invalid endianness of message")
+    _, _, _, _, body_length, _, fields_length = header.unpack_from(buf, offset)
+    length = 16 + fields_length + (-fields_length % 8) + body_length
+    if length > MAX_MESSAGE_LENGTH:
+        raise MarshallingError("Message too long")
+    return length
+
+
+def parse_message(buf, fds: list = (), lookups: dict = None) -> Message:
+    """Parse a complete message in wire format.
+
+    Args:
+        buf (bytes): The message.
+        fds (list): File descriptors received with the message.
+        lookups (dict): Decoder lookups of the body, see
+          :py:func:`~bleak.backends.bluezdbus.aiodbus.marshal.unmarshal`, by
+          ``(interface, member)`` of the message.
+
+    Returns:
+        The parsed message.
+
+    """
+    endian_byte = bytes(buf[:1])
+    header = _fixed_header.get(endian_byte)
+    if header is None:
+        raise MarshallingError("Invalid endianness of message")
+    endian = "<" if endian_byte == b"l" else ">"
+    _, type_, flags, version, body_length, serial, _ = header.unpack_from(buf, 0)
+    if version != PROTOCOL_VERSION:
+        raise MarshallingError("Unsupported protocol version {0}".format(version))
+
+    message = Message(type_, flags=flags)
+    message.serial = serial
+    (fields,), offset = unmarshal("a(yv)", buf, 12, endian)
+    n_fds = 0
+    for code, value in fields:
+        name = _FIELD_NAMES.get(code)
+        if name is not None:
+            setattr(message, name, value)
+        elif code == _SIGNATURE:
+            message.signature = value
+        elif code == _UNIX_FDS:
+            n_fds = value
+    offset += -offset % 8
+
+    if n_fds:
+        message.unix_fds = list(fds[:n_fds])
+    if message.signature:
+        lookup = (
+            lookups.get((message.interface, message.member)) if lookups else None
+        )
+        message.body, _ = unmarshal(
+            message.signature, buf, offset, endian, message.unix_fds, lookup
+        )
+    return message
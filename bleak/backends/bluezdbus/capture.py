@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+Record and replay of the D-Bus signals received by the BlueZ backend.
+
+A capture file starts with a header, ``<8sHHd``: the magic ``BLEAKCAP``, the format
+version, reserved flags and the wall clock time when recording started.
+It is followed by one record per signal, ``<dI`` and the message: the seconds
+since recording started, the message length and the complete message in D-Bus
+wire format, i.e. including its header, signature and marshalled body.
+
+Signals are recorded by attaching a :py:class:`CaptureRecorder` to a bus, or
+by passing one as the ``recorder`` keyword argument to
+:py:class:`~bleak.backends.bluezdbus.scanner.BleakScannerBlueZDBus` or
+:py:class:`~bleak.backends.bluezdbus.client.BleakClientBlueZDBus`:
+
+.. code-block:: python
+
+    recorder = CaptureRecorder("scan.blecap")
+    async with BleakScanner(recorder=recorder) as scanner:
+        await asyncio.sleep(30.0)
+    recorder.close()
+
+and fed back to the same callbacks with a :py:class:`CaptureReplayer`:
+
+.. code-block:: python
+
+    scanner = BleakScanner()
+    await CaptureReplayer("scan.blecap").replay(scanner.parse_msg, speed=None)
+
+Captures of the BlueZ signals on the system bus can also be made from the command line::
+
+    python -m bleak.backends.bluezdbus.capture record scan.blecap -t 30
+    python -m bleak.backends.bluezdbus.capture info scan.blecap
+
+"""
+import asyncio
+import logging
+import struct
+import time
+from typing import Callable, Iterator, Tuple
+
+from bleak.backends.bluezdbus import aiodbus
+from bleak.exc import BleakError
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BLEAKCAP"
+VERSION = 1
+
+_file_header = struct.Struct("<8sHHd")
+_record_header = struct.Struct("<dI")
+
+
+def parse_message(raw: bytes):
+    """Parse a message in D-Bus wire format, as stored in a capture."""
+    return aiodbus.parse_message(raw)
+
+
+def _open(f, mode):
+    if hasattr(f, "read") or hasattr(f, "write"):
+        return f, False
+    return open(str(f), mode), True
+
+
+class CaptureRecorder(object):
+    """Writes received D-Bus signals to a capture file.
+
+    Args:
+        f (str or file): Path or binary file object to write the capture to.
+
+    """
+
+    def __init__(self, f):
+        self._file, self._owns_file = _open(f, "wb")
+        self._start_wall = time.time()
+        self._start = time.monotonic()
+        self._file.write(_file_header.pack(MAGIC, VERSION, 0, self._start_wall))
+        self._attached = {}
+        self.count = 0
+
+    def attach(self, bus) -> None:
+        """Start recording all signals received on a bus.
+
+        Args:
+            bus: A bus connected with
+              :py:func:`bleak.backends.bluezdbus.connection.connect`.
+
+        """
+        if id(bus) in self._attached:
+            return
+        bus.add_signal_hook(self.record)
+        self._attached[id(bus)] = bus
+
+    def detach(self, bus) -> None:
+        """Stop recording signals received on a bus."""
+        if self._attached.pop(id(bus), None) is not None:
+            bus.remove_signal_hook(self.record)
+
+    def record(self, raw: bytes, timestamp: float = None) -> None:
+        """Append a message in D-Bus wire format to the capture.
+
+        Args:
+            raw (bytes): The message.
+            timestamp (float): ``time.monotonic()`` when the message was received.
+              Defaults to now.
+
+        """
+        t = (time.monotonic() if timestamp is None else timestamp) - self._start
+        self._file.write(_record_header.pack(t, len(raw)))
+        self._file.write(raw)
+        self.count += 1
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        """Detach from all buses and close the capture file."""
+        for bus in list(self._attached.values()):
+            self.detach(bus)
+        if self._owns_file:
+            self._file.close()
+        else:
+            self._file.flush()
+
+
+class CaptureReplayer(object):
+    """Reads a capture file and feeds the signals back to callbacks.
+
+    Args:
+        f (str or file): Path or binary file object to read the capture from.
+
+    """
+
+    def __init__(self, f):
+        fp, owns_file = _open(f, "rb")
+        try:
+            data = fp.read()
+        finally:
+            if owns_file:
+                fp.close()
+
+        if len(data) < _file_header.size:
+            raise BleakError("Not a Bleak D-Bus capture file.")
+        magic, version, _, self.start_time = _file_header.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise BleakError("Not a Bleak D-Bus capture file.")
+        if version > VERSION:
+            raise BleakError("Unsupported capture version {0}.".format(version))
+
+        self._records = []
+        offset = _file_header.size
+        view = memoryview(data)
+        while offset + _record_header.size <= len(data):
+            t, n = _record_header.unpack_from(data, offset)
+            offset += _record_header.size
+            if offset + n > len(data):
+                logger.warning("Truncated capture record at offset {0}.".format(offset))
+                break
+            self._records.append((t, bytes(view[offset : offset + n])))
+            offset += n
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def duration(self) -> float:
+        """Seconds between recording start and the last message"""
+        return self._records[-1][0] if self._records else 0.0
+
+    def raw_messages(self) -> Iterator[Tuple[float, bytes]]:
+        """Iterate over (timestamp, message in wire format) tuples."""
+        return iter(self._records)
+
+    def messages(self) -> Iterator[Tuple[float, object]]:
+        """Iterate over (timestamp, parsed signal message) tuples."""
+        for t, raw in self._records:
+            yield t, parse_message(raw)
+
+    async def replay(
+        self, callback: Callable, speed: float = 1.0, loop: asyncio.AbstractEventLoop = None
+    ) -> int:
+        """Feed all signals in the capture to a callback.
+
+        Args:
+            callback (callable): Called with each parsed signal message, e.g.
+              ``BleakScannerBlueZDBus.parse_msg`` or
+              ``BleakClientBlueZDBus._properties_changed_callback``.
+            speed (float): Replay speed relative to the recording. ``None`` or 0
+              replays as fast as possible, with all messages parsed beforehand.
+            loop (asyncio.AbstractEventLoop): The event loop to use.
+
+        Returns:
+            Number of messages replayed.
+
+        """
+        loop = loop if loop else asyncio.get_event_loop()
+        if not speed:
+            messages = [m for _, m in self.messages()]
+            for m in messages:
+                callback(m)
+            return len(messages)
+
+        start = loop.time()
+        n = 0
+        for t, m in self.messages():
+            # Sleep until an absolute target time, so that replay does not drift.
+            delay = start + t / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            callback(m)
+            n += 1
+        return n
+
+
+async def _record(path, duration, loop):
+    from bleak.backends.bluezdbus import connection, defs
+
+    bus = await connection.connect(loop)
+    recorder = CaptureRecorder(path)
+    recorder.attach(bus)
+    rules = []
+    for interface, member in (
+        (defs.OBJECT_MANAGER_INTERFACE, "InterfacesAdded"),
+        (defs.OBJECT_MANAGER_INTERFACE, "InterfacesRemoved"),
+        (defs.PROPERTIES_INTERFACE, "PropertiesChanged"),
+    ):
+        rules.append(
+            await bus.add_match(
+                lambda m: None,
+                interface=interface,
+                member=member,
+                path_namespace="/org/bluez",
+            )
+        )
+    try:
+        await asyncio.sleep(duration)
+    finally:
+        for rule in rules:
+            await bus.del_match(rule)
+        recorder.close()
+        bus.disconnect()
+    print("Recorded {0} signals to {1}.".format(recorder.count, path))
+
+
+def _info(path):
+    replayer = CaptureReplayer(path)
+    members = {}
+    size = 0
+    for _, raw in replayer.raw_messages():
+        size += len(raw)
+    for _, m in replayer.messages():
+        key = "{0}.{1}".format(m.interface, m.member)
+        members[key] = members.get(key, 0) + 1
+    print(
+        "{0}: {1} signals over {2:.1f} s, {3} bytes of messages, recorded {4}".format(
+            path,
+            len(replayer),
+            replayer.duration,
+            size,
+            time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(replayer.start_time)),
+        )
+    )
+    for key, count in sorted(members.items()):
+        print("    {0}: {1}".format(key, count))
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Record BlueZ D-Bus signals or show the contents of a capture."
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    p = subparsers.add_parser("record", help="Record BlueZ signals on the system bus")
+    p.add_argument("path", help="Capture file to write")
+    p.add_argument("-t", dest="duration", type=float, default=10.0, help="Seconds to record")
+    p = subparsers.add_parser("info", help="Summarize a capture file")
+    p.add_argument("path", help="Capture file to read")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(_record(args.path, args.duration, loop))
+    elif args.command == "info":
+        _info(args.path)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -45,6 +45,11 @@ class BleakGATTCharacteristicBlueZDBus(BleakGATTCharacteristic):
         """The uuid of this characteristic"""
         return self.obj.get("UUID")
 
+    @property
+    def handle(self) -> int:
+        """Handle of the characteristic declaration"""
+        return int(self.path.split("/")[-1].replace("char", ""), 16)
+
     @property
     def description(self) -> str:
         """Description for this characteristic"""
@@ -4,27 +4,50 @@ import asyncio
 import os
 import re
 import subprocess
+import time
 import uuid
 from asyncio import Future
+from collections import deque
 from asyncio.events import AbstractEventLoop
 from functools import wraps, partial
 from typing import Callable, Any, Union
 
+from bleak import tracing
+from bleak.reconnect import Backoff, Incident
 from bleak.backends.service import BleakGATTServiceCollection
-from bleak.exc import BleakError
-from bleak.backends.client import BaseBleakClient
-from bleak.backends.bluezdbus import defs, signals, utils, get_reactor
-from bleak.backends.bluezdbus.discovery import discover
-from bleak.backends.bluezdbus.utils import get_device_object_path, get_managed_objects
+from bleak.exc import BleakDBusError, BleakError
+from bleak.backends.client import BaseBleakClient, NotificationInfo
+from bleak.backends.bluezdbus import connection, defs, signals, utils
+from bleak.backends.bluezdbus.operations import OperationQueue, PRIORITY_NORMAL
+from bleak.backends.bluezdbus.scanner import BleakScannerBlueZDBus
+from bleak.backends.bluezdbus.utils import get_managed_objects
 from bleak.backends.bluezdbus.service import BleakGATTServiceBlueZDBus
 from bleak.backends.bluezdbus.characteristic import BleakGATTCharacteristicBlueZDBus
 from bleak.backends.bluezdbus.descriptor import BleakGATTDescriptorBlueZDBus
 
-from txdbus.client import connect as txdbus_connect
-from txdbus.error import RemoteError
-
 logger = logging.getLogger(__name__)
 
+_UNKNOWN_OBJECT = "org.freedesktop.DBus.Error.UnknownObject"
+
+# The longest attribute value, and thus the longest long write.
+_MAX_ATTRIBUTE_LENGTH = 512
+
+_BATTERY_LEVEL_UUID = "00002a19-0000-1000-8000-00805f9b34fb"
+
+
+def _queued(method):
+    """Run a GATT operation through the operation queue of the client."""
+
+    @wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        priority = kwargs.pop("priority", PRIORITY_NORMAL)
+        timeout = kwargs.pop("timeout", self.operation_timeout)
+        return await self.operations.run(
+            partial(method, self, *args, **kwargs), priority, timeout, method.__name__
+        )
+
+    return wrapper
+
 
 class BleakClientBlueZDBus(BaseBleakClient):
     """A native Linux Bleak Client
@@ -36,7 +59,34 @@ class BleakClientBlueZDBus(BaseBleakClient):
         loop (asyncio.events.AbstractEventLoop): The event loop to use.
 
     Keyword Args:
-        timeout (float): Timeout for required ``discover`` call. Defaults to 2.0.
+        timeout (float): Timeout for required ``find_device_by_address`` call. Defaults to 2.0.
+        recorder (bleak.backends.bluezdbus.capture.CaptureRecorder): Records all
+          D-Bus signals received by the client, for later replay.
+        tracer (bleak.tracing.Tracer): Tracer of the D-Bus calls made by the client.
+        reconnect (bool or bleak.reconnect.Backoff): Reconnect automatically when the
+          peripheral drops the connection, waiting between attempts as given, or
+          as a default :py:class:`bleak.reconnect.Backoff` if ``True``.
+        max_in_flight (int): GATT operations run at a time. Defaults to 1.
+        retries (int): Times a GATT operation failing with
+          ``org.bluez.Error.InProgress`` is retried. Defaults to 3.
+        retry_delay (float): Seconds before the first retry, doubled for each further
+          retry. Defaults to 0.05.
+        operation_timeout (float): Default timeout of GATT operations, in seconds,
+          including the time waiting for their turn. Defaults to 30.0, the ATT
+          transaction timeout. ``None`` waits for as long as it takes.
+
+    The GATT operations, i.e. reading, writing and starting and stopping
+    notifications, take ``priority`` and ``timeout`` keyword arguments.
+    Operations waiting for their turn are started by descending priority, and
+    raise :py:class:`bleak.exc.BleakTimeoutError` if they time out, see
+    :py:mod:`bleak.backends.bluezdbus.operations`.
+
+    Attributes:
+        operation_timeout (float): Default timeout of GATT operations.
+        incidents (collections.deque): The latest 100 disconnections, as
+          :py:class:`bleak.reconnect.Incident`, when reconnecting automatically.
+        operations (bleak.backends.bluezdbus.operations.OperationQueue): The queue
+          of GATT operations.
 
     """
 
@@ -45,16 +95,38 @@ class BleakClientBlueZDBus(BaseBleakClient):
         self.device = kwargs.get("device") if kwargs.get("device") else "hci0"
         self.address = address
 
-        # Backend specific, TXDBus objects and data
+        # Backend specific, D-Bus objects and data
         self._device_path = None
         self._bus = None
-        self._reactor = None
         self._rules = {}
         self._subscriptions = list()
 
         self._disconnected_callback = None
+        self._recorder = kwargs.get("recorder")
+
+        reconnect = kwargs.get("reconnect")
+        self._backoff = Backoff() if reconnect is True else reconnect or None
+        self._incident_callback = None
+        self._supervisor = None
+        self.incidents = deque(maxlen=100)
+
+        self.operation_timeout = kwargs.get("operation_timeout", 30.0)
+        self.operations = OperationQueue(
+            self.loop,
+            max_in_flight=kwargs.get("max_in_flight", 1),
+            retries=kwargs.get("retries", 3),
+            retry_delay=kwargs.get("retry_delay", 0.05),
+            metrics=self.metrics,
+        )
 
         self._char_path_to_uuid = {}
+        self._mtu_known = False
+        # Properties of the device by interface, while kept up to date by signals.
+        self._properties = {}
+        self._connecting = False
+        self._battery_callback = None
+        # Number of the next notification, by characteristic path.
+        self._sequences = {}
 
         # We need to know BlueZ version since battery level characteristic
         # are stored in a separate DBus interface in the BlueZ >= 5.48.
@@ -76,6 +148,9 @@ class BleakClientBlueZDBus(BaseBleakClient):
         A disconnect callback must accept two positional arguments,
         the BleakClient and the Future that called it.
 
+        A client reconnecting automatically only calls it once it has given up
+        reconnecting.
+
         Example:
 
         .. code-block::python
@@ -93,78 +168,114 @@ class BleakClientBlueZDBus(BaseBleakClient):
 
         self._disconnected_callback = callback
 
+    def set_incident_callback(
+        self, callback: Callable[[BaseBleakClient, Incident], None]
+    ) -> None:
+        """Set the callback of a client reconnecting automatically.
+
+        The callback is called with the client and a
+        :py:class:`bleak.reconnect.Incident` when the client has reconnected after
+        an unsolicited disconnect, with its notifications restored, or has given up
+        reconnecting.
+
+        Args:
+            callback: callback to be called after each disconnection.
+
+        """
+        self._incident_callback = callback
+
     async def connect(self, **kwargs) -> bool:
         """Connect to the specified GATT server.
 
         Keyword Args:
-            timeout (float): Timeout for required ``discover`` call. Defaults to 2.0.
+            timeout (float): Timeout for required ``find_device_by_address`` call. Defaults to 2.0.
 
         Returns:
             Boolean representing connection status.
 
         """
+        start = time.perf_counter()
+        path = "/org/bluez/{0}/dev_{1}".format(
+            self.device, self.address.replace(":", "_").upper()
+        )
+        with tracing.span(self.tracer, "connect", path):
+            connected = await self._connect(**kwargs)
+        self.metrics.observe("connect", time.perf_counter() - start)
+        return connected
 
-        # A Discover must have been run before connecting to any devices. Do a quick one here
-        # to ensure that it has been done.
-        timeout = kwargs.get("timeout", self._timeout)
-        await discover(timeout=timeout, device=self.device, loop=self.loop)
-
-        self._reactor = get_reactor(self.loop)
+    async def _connect(self, **kwargs) -> bool:
+        # A Discover must have been run before connecting to any devices.
+        # Find the desired device before trying to connect; scanning stops
+        # as soon as it has been detected.
+        await self._find_device(kwargs.get("timeout", self._timeout))
 
         # Create system bus
-        self._bus = await txdbus_connect(self._reactor, busAddress="system").asFuture(
-            self.loop
-        )
-        # TODO: Handle path errors from txdbus/dbus
-        self._device_path = get_device_object_path(self.device, self.address)
+        self._bus = await connection.connect(self.loop)
+        if self._recorder is not None:
+            self._recorder.attach(self._bus)
 
-        def _services_resolved_callback(message):
-            iface, changed, invalidated = message.body
-            is_resolved = defs.DEVICE_INTERFACE and changed.get(
-                "ServicesResolved", False
-            )
-            if iface == is_resolved:
-                logger.info("Services resolved.")
-                self.services_resolved = True
-
-        rule_id = await signals.listen_properties_changed(
-            self._bus, self.loop, _services_resolved_callback
+        self._rules["PropChanged"] = await signals.listen_properties_changed(
+            self._bus, self.loop, self._properties_changed_callback
         )
+        # Seed the cache of the device properties, which the rule keeps up to date.
+        await self._get_device_properties()
 
         logger.debug(
             "Connecting to BLE device @ {0} with {1}".format(self.address, self.device)
         )
+        self._connecting = True
         try:
-            await self._bus.callRemote(
-                self._device_path,
-                "Connect",
-                interface="org.bluez.Device1",
-                destination="org.bluez",
-            ).asFuture(self.loop)
-        except RemoteError as e:
-            await self._cleanup_all()
-            raise BleakError(str(e))
+            try:
+                await self._connect_device()
+            except BleakDBusError as e:
+                await self._cleanup_all()
+                raise BleakError(str(e))
 
-        if await self.is_connected():
-            logger.debug("Connection successful.")
+            properties = await self._get_device_properties()
+            if properties.get("Connected"):
+                logger.debug("Connection successful.")
+            else:
+                await self._cleanup_all()
+                raise BleakError(
+                    "Connection to {0} was not successful!".format(self.address)
+                )
+
+            # Get all services. This means making the actual connection.
+            await self.get_services()
+            properties = await self._get_device_properties()
+            if not properties.get("Connected"):
+                await self._cleanup_all()
+                raise BleakError("Connection failed!")
+        finally:
+            self._connecting = False
+        return True
+
+    async def _find_device(self, timeout: float) -> None:
+        device = await BleakScannerBlueZDBus.find_device_by_address(
+            self.address,
+            timeout=timeout,
+            loop=self.loop,
+            device=self.device,
+            tracer=self.tracer,
+        )
+
+        if device:
+            self._device_path = device.details["path"]
         else:
-            await self._cleanup_all()
             raise BleakError(
-                "Connection to {0} was not successful!".format(self.address)
+                "Device with address {0} was not found.".format(self.address)
             )
 
-        # Get all services. This means making the actual connection.
-        await self.get_services()
-        properties = await self._get_device_properties()
-        if not properties.get("Connected"):
-            await self._cleanup_all()
-            raise BleakError("Connection failed!")
-
-        await self._bus.delMatch(rule_id).asFuture(self.loop)
-        self._rules["PropChanged"] = await signals.listen_properties_changed(
-            self._bus, self.loop, self._properties_changed_callback
+    async def _connect_device(self) -> None:
+        await utils.call_remote(
+            self._bus,
+            self._device_path,
+            "Connect",
+            metrics=self.metrics,
+            tracer=self.tracer,
+            interface=defs.DEVICE_INTERFACE,
+            destination=defs.BLUEZ_SERVICE,
         )
-        return True
 
     async def _cleanup_notifications(self) -> None:
         """
@@ -174,12 +285,15 @@ class BleakClientBlueZDBus(BaseBleakClient):
         for rule_name, rule_id in self._rules.items():
             logger.debug("Removing rule {0}, ID: {1}".format(rule_name, rule_id))
             try:
-                await self._bus.delMatch(rule_id).asFuture(self.loop)
+                await self._bus.del_match(rule_id)
             except Exception as e:
                 logger.error(
                     "Could not remove rule {0} ({1}): {2}".format(rule_id, rule_name, e)
                 )
         self._rules = {}
+        self._properties = {}
+        self._battery_callback = None
+        self._sequences.pop(_BATTERY_LEVEL_UUID, None)
 
         for _uuid in list(self._subscriptions):
             try:
@@ -197,6 +311,9 @@ class BleakClientBlueZDBus(BaseBleakClient):
         Free the resources allocated for both the DBus bus and the Twisted
         reactor. Use this method upon final disconnection.
         """
+        if self._recorder is not None:
+            self._recorder.detach(self._bus)
+
         # Try to disconnect the System Bus.
         try:
             self._bus.disconnect()
@@ -220,17 +337,24 @@ class BleakClientBlueZDBus(BaseBleakClient):
         """
         logger.debug("Disconnecting from BLE device...")
 
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            self._supervisor = None
+
         # Remove all residual notifications.
         await self._cleanup_notifications()
 
         # Try to disconnect the actual device/peripheral
         try:
-            await self._bus.callRemote(
+            await utils.call_remote(
+                self._bus,
                 self._device_path,
                 "Disconnect",
+                metrics=self.metrics,
+                tracer=self.tracer,
                 interface=defs.DEVICE_INTERFACE,
                 destination=defs.BLUEZ_SERVICE,
-            ).asFuture(self.loop)
+            )
         except Exception as e:
             logger.error("Attempt to disconnect device failed: {0}".format(e))
 
@@ -248,16 +372,156 @@ class BleakClientBlueZDBus(BaseBleakClient):
             Boolean representing connection status.
 
         """
-        # TODO: Listen to connected property changes.
-        return await self._bus.callRemote(
+        if defs.DEVICE_INTERFACE in self._properties:
+            return self._properties[defs.DEVICE_INTERFACE].get("Connected", False)
+        return await utils.call_remote(
+            self._bus,
             self._device_path,
             "Get",
+            metrics=self.metrics,
+            tracer=self.tracer,
             interface=defs.PROPERTIES_INTERFACE,
             destination=defs.BLUEZ_SERVICE,
             signature="ss",
             body=[defs.DEVICE_INTERFACE, "Connected"],
             returnSignature="v",
-        ).asFuture(self.loop)
+        )
+
+    # Automatic reconnection
+
+    async def _supervise(self) -> bool:
+        """Reconnect after an unsolicited disconnect, until connected or given up.
+
+        The D-Bus connection, its match rules and the notification callbacks are
+        kept while reconnecting.
+
+        Returns:
+            Boolean representing if the client is connected again.
+
+        """
+        disconnected_at = self.loop.time()
+        attempts, restored, error = 0, 0, None
+        reconnected = False
+        for delay in self._backoff.delays():
+            await asyncio.sleep(delay)
+            attempts += 1
+            try:
+                restored = await self._reconnect()
+            except (BleakError, asyncio.TimeoutError) as e:
+                logger.debug(
+                    "Reconnecting to {0} failed: {1}".format(self.address, e)
+                )
+                error = e
+                continue
+            reconnected, error = True, None
+            break
+
+        incident = Incident(
+            disconnected_at,
+            self.loop.time() - disconnected_at,
+            attempts,
+            restored,
+            reconnected,
+            error,
+        )
+        self.incidents.append(incident)
+        self.metrics.observe("downtime", incident.downtime)
+        if reconnected:
+            self.metrics.inc("reconnects")
+            logger.info(
+                "Reconnected to {0} after {1:.3f} s and {2} attempts.".format(
+                    self.address, incident.downtime, attempts
+                )
+            )
+        else:
+            logger.warning(
+                "Gave up reconnecting to {0} after {1} attempts.".format(
+                    self.address, attempts
+                )
+            )
+            await self._cleanup_all()
+        if self._incident_callback is not None:
+            self._incident_callback(self, incident)
+        return reconnected
+
+    def _supervisor_done(self, task: Future) -> None:
+        if self._supervisor is task:
+            self._supervisor = None
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            # Nothing will reconnect the client anymore, so free its resources
+            # like after giving up.
+            logger.error(
+                "Reconnecting to {0} failed: {1!r}".format(self.address, error),
+                exc_info=error,
+            )
+            cleanup = self.loop.create_task(self._cleanup_all())
+            if self._disconnected_callback is not None:
+                cleanup.add_done_callback(partial(self._disconnected_callback, self))
+            return
+        if not task.result() and self._disconnected_callback is not None:
+            self._disconnected_callback(self, task)
+
+    async def _reconnect(self) -> int:
+        """Connect again, reusing the services already discovered.
+
+        Returns:
+            The number of notifications started again.
+
+        """
+        timeout = self._backoff.timeout
+        with tracing.span(self.tracer, "reconnect", self._device_path):
+            try:
+                await asyncio.wait_for(self._connect_device(), timeout)
+            except BleakDBusError as e:
+                # BlueZ removes devices that are not paired some time after
+                # they have disconnected.
+                if e.dbus_error != _UNKNOWN_OBJECT:
+                    raise
+                await self._find_device(self._timeout)
+                self._properties = {}
+                await asyncio.wait_for(self._connect_device(), timeout)
+
+            await self._wait_services_resolved()
+            try:
+                await self._restore_notifications()
+            except BleakDBusError as e:
+                # The cached services are gone, discover them again.
+                if e.dbus_error != _UNKNOWN_OBJECT:
+                    raise
+                await self._rediscover_services()
+                await self._restore_notifications()
+        return len(self._subscriptions)
+
+    async def _restore_notifications(self) -> None:
+        paths = [
+            self.services.get_characteristic(_uuid).path
+            for _uuid in self._subscriptions
+        ]
+        await asyncio.gather(*[self._start_notify(path) for path in paths])
+
+    async def _rediscover_services(self) -> None:
+        callbacks = {}
+        sequences = {}
+        for _uuid in self._subscriptions:
+            path = self.services.get_characteristic(_uuid).path
+            callbacks[_uuid] = self._notification_callbacks.get(path)
+            sequences[_uuid] = self._sequences.pop(path, 0)
+        self.services = BleakGATTServiceCollection()
+        self._services_resolved = False
+        # Cleared in place, the notification wrappers hold on to it.
+        self._char_path_to_uuid.clear()
+        await self.get_services()
+
+        self._notification_callbacks = {}
+        for _uuid, callback in callbacks.items():
+            characteristic = self.services.get_characteristic(_uuid)
+            if not characteristic:
+                raise BleakError("Characteristic {0} was not found!".format(_uuid))
+            self._notification_callbacks[characteristic.path] = callback
+            self._sequences[characteristic.path] = sequences[_uuid]
 
     # GATT services methods
 
@@ -271,6 +535,13 @@ class BleakClientBlueZDBus(BaseBleakClient):
         if self._services_resolved:
             return self.services
 
+        start = time.perf_counter()
+        with tracing.span(self.tracer, "get_services", self._device_path):
+            await self._resolve_services()
+        self.metrics.observe("get_services", time.perf_counter() - start)
+        return self.services
+
+    async def _wait_services_resolved(self) -> None:
         sleep_loop_sec = 0.02
         total_slept_sec = 0
         services_resolved = False
@@ -280,15 +551,22 @@ class BleakClientBlueZDBus(BaseBleakClient):
             services_resolved = properties.get("ServicesResolved", False)
             if services_resolved:
                 break
-            await asyncio.sleep(sleep_loop_sec, loop=self.loop)
+            await asyncio.sleep(sleep_loop_sec)
             total_slept_sec += sleep_loop_sec
 
         if not services_resolved:
             raise BleakError("Services discovery error")
 
+    async def _resolve_services(self) -> None:
+        await self._wait_services_resolved()
+
         logger.debug("Get Services...")
         objs = await get_managed_objects(
-            self._bus, self.loop, self._device_path + "/service"
+            self._bus,
+            self.loop,
+            self._device_path + "/service",
+            self.metrics,
+            self.tracer,
         )
 
         # There is no guarantee that services are listed before characteristics
@@ -317,6 +595,9 @@ class BleakClientBlueZDBus(BaseBleakClient):
                 BleakGATTCharacteristicBlueZDBus(char, object_path, _service[0].uuid)
             )
             self._char_path_to_uuid[object_path] = char.get("UUID")
+            # BlueZ >= 5.62 has the MTU of the link on all characteristics.
+            if char.get("MTU"):
+                self._set_mtu(char["MTU"])
 
         for desc, object_path in _descs:
             _characteristic = list(
@@ -330,21 +611,29 @@ class BleakClientBlueZDBus(BaseBleakClient):
             )
 
         self._services_resolved = True
-        return self.services
 
     # IO methods
 
-    async def read_gatt_char(self, _uuid: Union[str, uuid.UUID], **kwargs) -> bytearray:
+    @_queued
+    async def read_gatt_char(
+        self,
+        _uuid: Union[str, uuid.UUID, BleakGATTCharacteristicBlueZDBus],
+        **kwargs
+    ) -> bytearray:
         """Perform read operation on the specified GATT characteristic.
 
         Args:
-            _uuid (str or UUID): The uuid of the characteristics to read from.
+            _uuid (str, UUID or BleakGATTCharacteristicBlueZDBus): The uuid of the
+              characteristics to read from, or the characteristic itself.
 
         Returns:
             (bytearray) The read data.
 
         """
-        characteristic = self.services.get_characteristic(str(_uuid))
+        if isinstance(_uuid, BleakGATTCharacteristicBlueZDBus):
+            characteristic = _uuid
+        else:
+            characteristic = self.services.get_characteristic(str(_uuid))
         if not characteristic:
             # Special handling for BlueZ >= 5.48, where Battery Service (0000180f-0000-1000-8000-00805f9b34fb:)
             # has been moved to interface org.bluez.Battery1 instead of as a regular service.
@@ -361,6 +650,7 @@ class BleakClientBlueZDBus(BaseBleakClient):
                         _uuid, self._device_path, value
                     )
                 )
+                self._count_read(value)
                 return value
             if str(_uuid) == "00002a00-0000-1000-8000-00805f9b34fb" and (
                 self._bluez_version[0] == 5 and self._bluez_version[1] >= 48
@@ -375,6 +665,7 @@ class BleakClientBlueZDBus(BaseBleakClient):
                         _uuid, self._device_path, value
                     )
                 )
+                self._count_read(value)
                 return value
 
             raise BleakError(
@@ -382,15 +673,18 @@ class BleakClientBlueZDBus(BaseBleakClient):
             )
 
         value = bytearray(
-            await self._bus.callRemote(
+            await utils.call_remote(
+                self._bus,
                 characteristic.path,
                 "ReadValue",
+                metrics=self.metrics,
+                tracer=self.tracer,
                 interface=defs.GATT_CHARACTERISTIC_INTERFACE,
                 destination=defs.BLUEZ_SERVICE,
                 signature="a{sv}",
                 body=[{}],
                 returnSignature="ay",
-            ).asFuture(self.loop)
+            )
         )
 
         logger.debug(
@@ -398,8 +692,16 @@ class BleakClientBlueZDBus(BaseBleakClient):
                 _uuid, characteristic.path, value
             )
         )
+        self._count_read(value)
         return value
 
+    async def _read_characteristic(
+        self, characteristic: BleakGATTCharacteristicBlueZDBus
+    ) -> bytearray:
+        # Read by object path, which stays right if UUIDs repeat.
+        return await self.read_gatt_char(characteristic)
+
+    @_queued
     async def read_gatt_descriptor(self, handle: int, **kwargs) -> bytearray:
         """Perform read operation on the specified GATT descriptor.
 
@@ -415,22 +717,27 @@ class BleakClientBlueZDBus(BaseBleakClient):
             raise BleakError("Descriptor with handle {0} was not found!".format(handle))
 
         value = bytearray(
-            await self._bus.callRemote(
+            await utils.call_remote(
+                self._bus,
                 descriptor.path,
                 "ReadValue",
+                metrics=self.metrics,
+                tracer=self.tracer,
                 interface=defs.GATT_DESCRIPTOR_INTERFACE,
                 destination=defs.BLUEZ_SERVICE,
                 signature="a{sv}",
                 body=[{}],
                 returnSignature="ay",
-            ).asFuture(self.loop)
+            )
         )
 
         logger.debug(
             "Read Descriptor {0} | {1}: {2}".format(handle, descriptor.path, value)
         )
+        self._count_read(value)
         return value
 
+    @_queued
     async def write_gatt_char(
         self, _uuid: Union[str, uuid.UUID], data: bytearray, response: bool = False
     ) -> None:
@@ -445,11 +752,18 @@ class BleakClientBlueZDBus(BaseBleakClient):
         which can be used to "Write without response", but for older versions
         of Bluez, it is not possible to "Write without response".
 
+        Data longer than ``mtu_size - 3`` bytes is split into writes of that size
+        without response, sent one after the other. With response, BlueZ makes a
+        long write of data up to 512 bytes, the longest value of an attribute.
+
         Args:
             _uuid (str or UUID): The uuid of the characteristics to write to.
             data (bytes or bytearray): The data to send.
             response (bool): If write-with-response operation should be done. Defaults to `False`.
 
+        Raises:
+            BleakError: If the data is longer than 512 bytes with response.
+
         """
         characteristic = self.services.get_characteristic(str(_uuid))
         if not characteristic:
@@ -476,42 +790,101 @@ class BleakClientBlueZDBus(BaseBleakClient):
                 % str(_uuid)
             )
 
+        if response and len(data) > _MAX_ATTRIBUTE_LENGTH:
+            raise BleakError(
+                "Cannot write {0} bytes with response, at most {1} bytes".format(
+                    len(data), _MAX_ATTRIBUTE_LENGTH
+                )
+            )
+
         # See docstring for details about this handling.
         if not response and self._bluez_version[0] == 5 and self._bluez_version[1] < 46:
             raise BleakError("Write without response requires at least BlueZ 5.46")
-        if response or (self._bluez_version[0] == 5 and self._bluez_version[1] > 50):
+        if not response and not self._mtu_known and len(data) > self.mtu_size - 3:
+            await self._acquire_mtu(characteristic)
+
+        if response or (self._bluez_version[0] == 5 and self._bluez_version[1] >= 50):
             # TODO: Add OnValueUpdated handler for response=True?
-            await self._bus.callRemote(
-                characteristic.path,
-                "WriteValue",
-                interface=defs.GATT_CHARACTERISTIC_INTERFACE,
-                destination=defs.BLUEZ_SERVICE,
-                signature="aya{sv}",
-                body=[data, {"type": "request" if response else "command"}],
-                returnSignature="",
-            ).asFuture(self.loop)
+            options = {"type": "request" if response else "command"}
+            if response:
+                # Values longer than one PDU are written with Prepare Write and
+                # Execute Write requests by BlueZ.
+                await self._write_value(characteristic.path, data, options)
+            else:
+                # Each chunk is written once the previous one is, so that a
+                # failed chunk leaves none after it written.
+                for chunk in _chunks(data, self.mtu_size - 3):
+                    await self._write_value(characteristic.path, chunk, options)
         else:
             # Older versions of BlueZ don't have the "type" option, so we have
             # to write the hard way. This isn't the most efficient way of doing
             # things, but it works.
-            fd, _ = await self._bus.callRemote(
-                characteristic.path,
-                "AcquireWrite",
-                interface=defs.GATT_CHARACTERISTIC_INTERFACE,
-                destination=defs.BLUEZ_SERVICE,
-                signature="a{sv}",
-                body=[{}],
-                returnSignature="hq",
-            ).asFuture(self.loop)
-            os.write(fd, data)
-            os.close(fd)
+            fd, mtu = await self._acquire_write(characteristic.path)
+            try:
+                for chunk in _chunks(data, mtu - 3):
+                    os.write(fd, chunk)
+            finally:
+                os.close(fd)
 
         logger.debug(
             "Write Characteristic {0} | {1}: {2}".format(
                 _uuid, characteristic.path, data
             )
         )
+        self._count_write(data)
 
+    async def _write_value(self, path: str, data: bytearray, options: dict) -> None:
+        await utils.call_remote(
+            self._bus,
+            path,
+            "WriteValue",
+            metrics=self.metrics,
+            tracer=self.tracer,
+            interface=defs.GATT_CHARACTERISTIC_INTERFACE,
+            destination=defs.BLUEZ_SERVICE,
+            signature="aya{sv}",
+            body=[data, options],
+            returnSignature="",
+        )
+
+    async def _acquire_write(self, path: str) -> tuple:
+        fd, mtu = await utils.call_remote(
+            self._bus,
+            path,
+            "AcquireWrite",
+            metrics=self.metrics,
+            tracer=self.tracer,
+            interface=defs.GATT_CHARACTERISTIC_INTERFACE,
+            destination=defs.BLUEZ_SERVICE,
+            signature="a{sv}",
+            body=[{}],
+            returnSignature="hq",
+        )
+        self._set_mtu(mtu)
+        return fd, mtu
+
+    async def _acquire_mtu(self, characteristic) -> None:
+        """Get the MTU from ``AcquireWrite``, for BlueZ without the MTU property."""
+        if "write-without-response" not in characteristic.properties or (
+            self._bluez_version[0] == 5 and self._bluez_version[1] < 46
+        ):
+            return
+        try:
+            fd, _ = await self._acquire_write(characteristic.path)
+        except BleakDBusError as e:
+            logger.debug("Could not acquire the MTU: {0}".format(e))
+            # Do not try again, keep to the default MTU.
+            self._mtu_known = True
+            return
+        os.close(fd)
+
+    def _set_mtu(self, mtu: int) -> None:
+        if mtu != self._mtu_size:
+            logger.debug("MTU of {0}: {1}".format(self.address, mtu))
+        self._mtu_size = mtu
+        self._mtu_known = True
+
+    @_queued
     async def write_gatt_descriptor(self, handle: int, data: bytearray) -> None:
         """Perform a write operation on the specified GATT descriptor.
 
@@ -523,20 +896,25 @@ class BleakClientBlueZDBus(BaseBleakClient):
         descriptor = self.services.get_descriptor(handle)
         if not descriptor:
             raise BleakError("Descriptor with handle {0} was not found!".format(handle))
-        await self._bus.callRemote(
+        await utils.call_remote(
+            self._bus,
             descriptor.path,
             "WriteValue",
+            metrics=self.metrics,
+            tracer=self.tracer,
             interface=defs.GATT_DESCRIPTOR_INTERFACE,
             destination=defs.BLUEZ_SERVICE,
             signature="aya{sv}",
             body=[data, {"type": "command"}],
             returnSignature="",
-        ).asFuture(self.loop)
+        )
 
         logger.debug(
             "Write Descriptor {0} | {1}: {2}".format(handle, descriptor.path, data)
         )
+        self._count_write(data)
 
+    @_queued
     async def start_notify(
         self,
         _uuid: Union[str, uuid.UUID],
@@ -558,54 +936,72 @@ class BleakClientBlueZDBus(BaseBleakClient):
             _uuid (str or UUID): The uuid of the characteristics to start notification on.
             callback (function): The function to be called on notification.
 
+        On BlueZ >= 5.48, the Battery Level characteristic is replaced by the
+        ``Percentage`` property of ``org.bluez.Battery1``, whose changes are
+        notified as if they were notifications of the characteristic.
+
         Keyword Args:
             notification_wrapper (bool): Set to `False` to avoid parsing of
                 notification to bytearray.
+            extended (bool): Call ``callback`` with a third argument, the
+                :py:class:`~bleak.backends.client.NotificationInfo` with the time
+                the notification was received and its sequence number.
 
         """
         _wrap = kwargs.get("notification_wrapper", True)
+        extended = kwargs.get("extended", False)
         characteristic = self.services.get_characteristic(str(_uuid))
         if not characteristic:
             # Special handling for BlueZ >= 5.48, where Battery Service (0000180f-0000-1000-8000-00805f9b34fb:)
             # has been moved to interface org.bluez.Battery1 instead of as a regular service.
-            # The org.bluez.Battery1 on the other hand does not provide a notification method, so here we cannot
-            # provide this functionality...
+            # The org.bluez.Battery1 on the other hand does not provide a notification method, but
+            # BlueZ keeps its Percentage property up to date, which is signalled when it changes.
             # See https://kernel.googlesource.com/pub/scm/bluetooth/bluez/+/refs/tags/5.48/doc/battery-api.txt
-            if str(_uuid) == "00002a19-0000-1000-8000-00805f9b34fb" and (
-                self._bluez_version[0] == 5 and self._bluez_version[1] >= 48
-            ):
-                raise BleakError(
-                    "Notifications on Battery Level Char ({0}) is not "
-                    "possible in BlueZ >= 5.48. Use regular read instead.".format(_uuid)
-                )
+            if self._is_battery_level(_uuid):
+                if _wrap:
+                    self._battery_callback = _extended_wrapper(callback, extended)
+                else:
+                    self._battery_callback = _battery_properties_wrapper(
+                        callback, extended
+                    )
+                self._sequences[_BATTERY_LEVEL_UUID] = 0
+                return
             raise BleakError(
                 "Characteristic with UUID {0} could not be found!".format(_uuid)
             )
-        await self._bus.callRemote(
-            characteristic.path,
-            "StartNotify",
-            interface=defs.GATT_CHARACTERISTIC_INTERFACE,
-            destination=defs.BLUEZ_SERVICE,
-            signature="",
-            body=[],
-            returnSignature="",
-        ).asFuture(self.loop)
+        await self._start_notify(characteristic.path)
 
         if _wrap:
             self._notification_callbacks[
                 characteristic.path
             ] = _data_notification_wrapper(
-                callback, self._char_path_to_uuid
+                callback, self._char_path_to_uuid, extended
             )  # noqa | E123 error in flake8...
         else:
             self._notification_callbacks[
                 characteristic.path
             ] = _regular_notification_wrapper(
-                callback, self._char_path_to_uuid
+                callback, self._char_path_to_uuid, extended
             )  # noqa | E123 error in flake8...
+        self._sequences[characteristic.path] = 0
 
         self._subscriptions.append(str(_uuid))
 
+    async def _start_notify(self, path: str) -> None:
+        await utils.call_remote(
+            self._bus,
+            path,
+            "StartNotify",
+            metrics=self.metrics,
+            tracer=self.tracer,
+            interface=defs.GATT_CHARACTERISTIC_INTERFACE,
+            destination=defs.BLUEZ_SERVICE,
+            signature="",
+            body=[],
+            returnSignature="",
+        )
+
+    @_queued
     async def stop_notify(self, _uuid: Union[str, uuid.UUID]) -> None:
         """Deactivate notification/indication on a specified characteristic.
 
@@ -615,17 +1011,25 @@ class BleakClientBlueZDBus(BaseBleakClient):
         """
         characteristic = self.services.get_characteristic(str(_uuid))
         if not characteristic:
+            if self._is_battery_level(_uuid) and self._battery_callback is not None:
+                self._battery_callback = None
+                self._sequences.pop(_BATTERY_LEVEL_UUID, None)
+                return
             raise BleakError("Characteristic {0} was not found!".format(_uuid))
-        await self._bus.callRemote(
+        await utils.call_remote(
+            self._bus,
             characteristic.path,
             "StopNotify",
+            metrics=self.metrics,
+            tracer=self.tracer,
             interface=defs.GATT_CHARACTERISTIC_INTERFACE,
             destination=defs.BLUEZ_SERVICE,
             signature="",
             body=[],
             returnSignature="",
-        ).asFuture(self.loop)
+        )
         self._notification_callbacks.pop(characteristic.path, None)
+        self._sequences.pop(characteristic.path, None)
 
         self._subscriptions.remove(str(_uuid))
 
@@ -646,20 +1050,26 @@ class BleakClientBlueZDBus(BaseBleakClient):
         characteristic = self.services.get_characteristic(str(_uuid))
         if not characteristic:
             raise BleakError("Characteristic {0} was not found!".format(_uuid))
-        out = await self._bus.callRemote(
+        out = await utils.call_remote(
+            self._bus,
             characteristic.path,
             "GetAll",
+            metrics=self.metrics,
+            tracer=self.tracer,
             interface=defs.PROPERTIES_INTERFACE,
             destination=defs.BLUEZ_SERVICE,
             signature="s",
             body=[defs.GATT_CHARACTERISTIC_INTERFACE],
             returnSignature="a{sv}",
-        ).asFuture(self.loop)
+        )
         return out
 
     async def _get_device_properties(self, interface=defs.DEVICE_INTERFACE) -> dict:
         """Get properties of the connected device.
 
+        While connected, the properties are fetched once per interface and then
+        kept up to date from ``PropertiesChanged`` signals.
+
         Args:
             interface: Which DBus interface to get properties on. Defaults to `org.bluez.Device1`.
 
@@ -667,15 +1077,46 @@ class BleakClientBlueZDBus(BaseBleakClient):
             (dict) The properties.
 
         """
-        return await self._bus.callRemote(
+        properties = self._properties.get(interface)
+        if properties is not None:
+            return properties
+
+        properties = await utils.call_remote(
+            self._bus,
             self._device_path,
             "GetAll",
+            metrics=self.metrics,
+            tracer=self.tracer,
             interface=defs.PROPERTIES_INTERFACE,
             destination=defs.BLUEZ_SERVICE,
             signature="s",
             body=[interface],
             returnSignature="a{sv}",
-        ).asFuture(self.loop)
+        )
+        if "PropChanged" in self._rules:
+            self._properties[interface] = properties
+        return properties
+
+    def _is_battery_level(self, _uuid: Union[str, uuid.UUID]) -> bool:
+        return str(_uuid) == _BATTERY_LEVEL_UUID and (
+            self._bluez_version[0] == 5 and self._bluez_version[1] >= 48
+        )
+
+    def _count_read(self, value) -> None:
+        self.metrics.inc("reads")
+        self.metrics.inc("bytes_in", len(value))
+
+    def _count_write(self, data) -> None:
+        self.metrics.inc("writes")
+        self.metrics.inc("bytes_out", len(data))
+
+    def _notification_info(self, message, key: str) -> NotificationInfo:
+        sequence = self._sequences.get(key, 0)
+        self._sequences[key] = sequence + 1
+        received_at = getattr(message, "received_at", None)
+        return NotificationInfo(
+            received_at if received_at is not None else time.monotonic(), sequence
+        )
 
     # Internal Callbacks
 
@@ -698,15 +1139,42 @@ class BleakClientBlueZDBus(BaseBleakClient):
             )
         )
 
+        if message.path == self._device_path:
+            properties = self._properties.get(message.body[0])
+            if properties is not None:
+                properties.update(message.body[1])
+                for name in message.body[2]:
+                    properties.pop(name, None)
+            if (
+                self._battery_callback is not None
+                and message.body[0] == defs.BATTERY_INTERFACE
+                and "Percentage" in message.body[1]
+            ):
+                self.metrics.inc("notifications")
+                self.metrics.inc("bytes_in")
+                self._battery_callback(
+                    _BATTERY_LEVEL_UUID,
+                    bytearray([message.body[1]["Percentage"]]),
+                    self._notification_info(message, _BATTERY_LEVEL_UUID),
+                )
+
         if message.body[0] == defs.GATT_CHARACTERISTIC_INTERFACE:
+            if "MTU" in message.body[1]:
+                self._set_mtu(message.body[1]["MTU"])
             if message.path in self._notification_callbacks:
                 logger.info(
                     "GATT Char Properties Changed: {0} | {1}".format(
                         message.path, message.body[1:]
                     )
                 )
+                value = message.body[1].get("Value")
+                info = None
+                if value is not None:
+                    self.metrics.inc("notifications")
+                    self.metrics.inc("bytes_in", len(value))
+                    info = self._notification_info(message, message.path)
                 self._notification_callbacks[message.path](
-                    message.path, message.body[1]
+                    message.path, message.body[1], info
                 )
         elif message.body[0] == defs.DEVICE_INTERFACE:
             device_path = "/org/bluez/%s/dev_%s" % (
@@ -718,9 +1186,18 @@ class BleakClientBlueZDBus(BaseBleakClient):
                 if (
                     "Connected" in message_body_map
                     and not message_body_map["Connected"]
+                    and not self._connecting
                 ):
                     logger.debug("Device {} disconnected.".format(self.address))
 
+                    if self._backoff is not None:
+                        if self._supervisor is None:
+                            self._supervisor = self.loop.create_task(
+                                self._supervise()
+                            )
+                            self._supervisor.add_done_callback(self._supervisor_done)
+                        return
+
                     task = self.loop.create_task(self._cleanup_all())
                     if self._disconnected_callback is not None:
                         task.add_done_callback(
@@ -728,19 +1205,52 @@ class BleakClientBlueZDBus(BaseBleakClient):
                         )
 
 
-def _data_notification_wrapper(func, char_map):
+def _chunks(data, size):
+    if len(data) <= size:
+        return [data]
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+def _extended_wrapper(func, extended):
+    if extended:
+        return func
+
     @wraps(func)
-    def args_parser(sender, data):
+    def args_parser(sender, data, info=None):
+        return func(sender, data)
+
+    return args_parser
+
+
+def _data_notification_wrapper(func, char_map, extended=False):
+    func = _extended_wrapper(func, extended)
+
+    @wraps(func)
+    def args_parser(sender, data, info=None):
         if "Value" in data:
             # Do a conversion from {'Value': [...]} to bytearray.
-            return func(char_map.get(sender, sender), bytearray(data.get("Value")))
+            return func(
+                char_map.get(sender, sender), bytearray(data.get("Value")), info
+            )
+
+    return args_parser
+
+
+def _battery_properties_wrapper(func, extended=False):
+    func = _extended_wrapper(func, extended)
+
+    @wraps(func)
+    def args_parser(sender, data, info=None):
+        return func(sender, {"Value": data}, info)
 
     return args_parser
 
 
-def _regular_notification_wrapper(func, char_map):
+def _regular_notification_wrapper(func, char_map, extended=False):
+    func = _extended_wrapper(func, extended)
+
     @wraps(func)
-    def args_parser(sender, data):
-        return func(char_map.get(sender, sender), data)
+    def args_parser(sender, data, info=None):
+        return func(char_map.get(sender, sender), data, info)
 
     return args_parser
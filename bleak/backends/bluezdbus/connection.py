@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+Connections to the system bus used by the BlueZ backend.
+
+By default, the native asyncio D-Bus client of
+:py:mod:`bleak.backends.bluezdbus.aiodbus` is used. The previous ``txdbus``
+client, running on a Twisted reactor on the asyncio event loop, can still be
+selected by setting the ``BLEAK_DBUS_TRANSPORT`` environment variable to ``txdbus``.
+
+Both are used through the same interface: the coroutines ``call_remote``,
+``add_match`` and ``del_match`` and the methods ``disconnect``, ``add_signal_hook``,
+``remove_signal_hook`` and ``set_signal_decoder`` of
+:py:class:`~bleak.backends.bluezdbus.aiodbus.MessageBus`. ``txdbus`` decodes all
+values regardless of ``set_signal_decoder``.
+"""
+import asyncio
+import os
+import time
+
+from bleak.backends.bluezdbus import aiodbus
+from bleak.exc import BleakDBusError, BleakError
+
+TRANSPORTS = ("native", "txdbus")
+
+
+def default_transport() -> str:
+    return os.environ.get("BLEAK_DBUS_TRANSPORT", "native")
+
+
+async def connect(
+    loop: asyncio.AbstractEventLoop, address: str = "system", transport: str = None
+):
+    """Connect to a D-Bus message bus.
+
+    Args:
+        loop (asyncio.AbstractEventLoop): The event loop to use.
+        address (str): ``system`` or a D-Bus server address.
+        transport (str): ``native`` or ``txdbus``. Defaults to the
+          ``BLEAK_DBUS_TRANSPORT`` environment variable, or ``native``.
+
+    Returns:
+        The connected bus.
+
+    """
+    transport = transport or default_transport()
+    if transport == "native":
+        return await aiodbus.connect(address, loop)
+    if transport == "txdbus":
+        from txdbus import client
+        from bleak.backends.bluezdbus import get_reactor
+
+        bus = await client.connect(get_reactor(loop), address).asFuture(loop)
+        return _TxDBusBus(bus, loop)
+    raise BleakError(
+        "Unknown D-Bus transport {0!r}, expected one of {1}".format(
+            transport, ", ".join(TRANSPORTS)
+        )
+    )
+
+
+class _TxDBusBus(object):
+    """Adapts a ``txdbus.client.DBusClientConnection`` to the native interface."""
+
+    def __init__(self, bus, loop):
+        self.loop = loop
+        self.txdbus_connection = bus
+        self._signal_hooks = []
+
+    @property
+    def unique_name(self):
+        return self.txdbus_connection.busName
+
+    async def call_remote(self, path, method, **kwargs):
+        from txdbus.error import RemoteError
+
+        # txdbus only takes byte arrays as bytearray.
+        if kwargs.get("body"):
+            kwargs["body"] = [
+                bytearray(v) if isinstance(v, (bytes, memoryview)) else v
+                for v in kwargs["body"]
+            ]
+        try:
+            return await self.txdbus_connection.callRemote(
+                path, method, **kwargs
+            ).asFuture(self.loop)
+        except RemoteError as e:
+            raise BleakDBusError(e.errName, e.message)
+
+    async def add_match(self, callback, **rule):
+        def _callback(message):
+            message.received_at = time.monotonic()
+            return callback(message)
+
+        return await self.txdbus_connection.addMatch(_callback, **rule).asFuture(
+            self.loop
+        )
+
+    async def del_match(self, rule_id):
+        await self.txdbus_connection.delMatch(rule_id).asFuture(self.loop)
+
+    def disconnect(self):
+        self.txdbus_connection.disconnect()
+
+    def add_signal_hook(self, hook):
+        if not self._signal_hooks:
+            original = self.txdbus_connection.signalReceived
+
+            def _signal_received(message):
+                raw = getattr(message, "rawMessage", None)
+                if raw is None:
+                    raw = message.rawHeader + message.rawPadding + message.rawBody
+                for h in self._signal_hooks:
+                    h(raw)
+                return original(message)
+
+            self.txdbus_connection.signalReceived = _signal_received
+            self._original_signal_received = original
+        self._signal_hooks.append(hook)
+
+    def set_signal_decoder(self, interface, member, lookup=None):
+        pass
+
+    def remove_signal_hook(self, hook):
+        self._signal_hooks.remove(hook)
+        if not self._signal_hooks:
+            self.txdbus_connection.signalReceived = self._original_signal_received
@@ -0,0 +1,895 @@
+# -*- coding: utf-8 -*-
+"""
+In-process stand-in for BlueZ, for hermetic tests and benchmarks of the BlueZ backend.
+
+:py:class:`MockBlueZ` owns the ``org.bluez`` name on a private ``dbus-daemon`` and
+implements the ObjectManager, ``org.bluez.Adapter1``, ``Device1``, ``Battery1``,
+``GattService1``, ``GattCharacteristic1`` and ``GattDescriptor1`` interfaces,
+closely enough for the real scanner and client to be used against it.
+Advertisements, notifications and method call latencies are configurable.
+
+.. code-block:: python
+
+    with PrivateBus() as bus:
+        bus.set_as_system_bus()
+        mock = MockBlueZ(bus.address, advertisement_rate=500.0, latency=0.005)
+        await mock.start()
+        mock.add_devices(100)
+        async with BleakClient(mock.devices[0].address) as client:
+            print(await client.read_gatt_char(MODEL_NBR_UUID))
+        await mock.stop()
+
+It can also be run stand-alone, printing the bus address to use::
+
+    python -m bleak.backends.bluezdbus.mock --devices 100 --rate 200
+
+Requires the ``dbus-daemon`` executable.
+
+"""
+import asyncio
+import itertools
+import logging
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+from typing import List, Union
+
+from twisted.internet import task
+from txdbus import client, message, objects
+from txdbus import interface as txdbus_interface
+from txdbus import marshal as txdbus_marshal
+
+from bleak.backends.bluezdbus import defs, get_reactor
+from bleak.backends.snapshot import SNAPSHOT_VERSION
+from bleak.exc import BleakError
+from bleak.utils import mac_int_2_str
+
+logger = logging.getLogger(__name__)
+
+ADAPTER_PATH = "/org/bluez/hci0"
+
+#: Writes to this characteristic are sent back as notifications on ``ECHO_NOTIFY_UUID``.
+ECHO_SERVICE_UUID = "5f6d4f53-5f45-4348-4f5f-534552564943"
+ECHO_WRITE_UUID = "5f6d4f53-5f45-4348-4f5f-575249544500"
+ECHO_NOTIFY_UUID = "5f6d4f53-5f45-4348-4f5f-4e4f54494659"
+#: Notifies a counter at ``notification_rate`` while notifications are started.
+STREAM_NOTIFY_UUID = "5f6d4f53-5f53-5452-4541-4d5f4e4f5449"
+
+CCCD_UUID = "00002902-0000-1000-8000-00805f9b34fb"
+
+#: GATT profile of mocked devices; services of (uuid, characteristics), with
+#: characteristics of (uuid, flags, initial value, descriptors).
+DEFAULT_PROFILE = [
+    (
+        "00001800-0000-1000-8000-00805f9b34fb",
+        [("00002a00-0000-1000-8000-00805f9b34fb", ["read"], b"Mock Device", [])],
+    ),
+    (
+        "0000180a-0000-1000-8000-00805f9b34fb",
+        [("00002a24-0000-1000-8000-00805f9b34fb", ["read"], b"Mock Model", [])],
+    ),
+    (
+        ECHO_SERVICE_UUID,
+        [
+            (ECHO_WRITE_UUID, ["read", "write", "write-without-response"], b"", []),
+            (ECHO_NOTIFY_UUID, ["read", "notify"], b"", [(CCCD_UUID, b"\x00\x00")]),
+            (STREAM_NOTIFY_UUID, ["read", "notify"], b"", [(CCCD_UUID, b"\x00\x00")]),
+        ],
+    ),
+]
+
+
+def _profile_snapshot(profile: list) -> dict:
+    """GATT snapshot of a profile, with handles numbered as by BlueZ."""
+    handle = itertools.count(0x000A)
+    services = []
+    for service_uuid, characteristics in profile:
+        service = {"uuid": service_uuid, "handle": next(handle), "characteristics": []}
+        services.append(service)
+        for char_uuid, flags, value, descriptors in characteristics:
+            char = {
+                "uuid": char_uuid,
+                "handle": next(handle),
+                "properties": flags,
+                "value": bytes(value).hex(),
+                "descriptors": [],
+            }
+            next(handle)  # The value handle
+            service["characteristics"].append(char)
+            for desc_uuid, desc_value in descriptors:
+                char["descriptors"].append(
+                    {
+                        "uuid": desc_uuid,
+                        "handle": next(handle),
+                        "value": bytes(desc_value).hex(),
+                    }
+                )
+    return {"version": SNAPSHOT_VERSION, "services": services}
+
+
+# Period of the advertisement and notification loops, and most signals sent per period.
+_TICK = 0.005
+_MAX_BATCH = 1000
+# Longest attribute value, and thus long write.
+_MAX_ATTRIBUTE_LENGTH = 512
+
+_DAEMON_CONFIG = """<!DOCTYPE busconfig PUBLIC
+ "-//freedesktop//DTD D-Bus Bus Configuration 1.0//EN"
+ "http://www.freedesktop.org/standards/dbus/1.0/busconfig.dtd">
+<busconfig>
+  <type>session</type>
+  <listen>unix:dir={0}</listen>
+  <auth>EXTERNAL</auth>
+  <policy context="default">
+    <allow send_destination="*" eavesdrop="true"/>
+    <allow eavesdrop="true"/>
+    <allow own="*"/>
+  </policy>
+</busconfig>
+"""
+
+
+class PrivateBus(object):
+    """A private ``dbus-daemon`` instance, running until stopped.
+
+    Can be used as a context manager.
+    """
+
+    def __init__(self):
+        self.address = None
+        self._process = None
+        self._dir = None
+        self._old_system_bus_address = None
+
+    def start(self) -> str:
+        """Start the daemon.
+
+        Returns:
+            The bus address.
+
+        """
+        executable = shutil.which("dbus-daemon")
+        if executable is None:
+            raise BleakError("dbus-daemon executable not found.")
+        self._dir = tempfile.mkdtemp(prefix="bleak-dbus-")
+        config = os.path.join(self._dir, "bus.conf")
+        with open(config, "w") as f:
+            f.write(_DAEMON_CONFIG.format(self._dir))
+        self._process = subprocess.Popen(
+            [executable, "--config-file", config, "--print-address", "--nofork"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.address = self._process.stdout.readline().decode().strip()
+        if not self.address:
+            self.stop()
+            raise BleakError("Could not start private dbus-daemon.")
+        return self.address
+
+    def set_as_system_bus(self) -> None:
+        """Make Bleak, which always uses the system bus, connect to this bus instead."""
+        self._old_system_bus_address = os.environ.get("DBUS_SYSTEM_BUS_ADDRESS")
+        os.environ["DBUS_SYSTEM_BUS_ADDRESS"] = self.address
+
+    def stop(self) -> None:
+        """Stop the daemon and restore the system bus address."""
+        if self._old_system_bus_address is not None:
+            os.environ["DBUS_SYSTEM_BUS_ADDRESS"] = self._old_system_bus_address
+        elif os.environ.get("DBUS_SYSTEM_BUS_ADDRESS") == self.address:
+            del os.environ["DBUS_SYSTEM_BUS_ADDRESS"]
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait()
+            self._process.stdout.close()
+            self._process = None
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class BlueZError(Exception):
+    """Sent back to the caller as an ``org.bluez.Error.*`` D-Bus error."""
+
+    def __init__(self, name, text=""):
+        super(BlueZError, self).__init__(text or name)
+        self.dbusErrorName = "org.bluez.Error." + name
+
+
+def _typed(sig: str, value):
+    """Wrap a value so that it is marshalled with a given signature in a variant."""
+    if sig in txdbus_marshal.variantClassMap:
+        return txdbus_marshal.variantClassMap[sig](value)
+    if sig == "ay":
+        return bytearray(value)
+    if sig.startswith("a{"):
+        if sig.endswith("v}"):
+            value = {k: _typed("ay", v) for k, v in value.items()}
+        d = _TypedDict(value)
+        d.dbusSignature = sig
+        return d
+    if sig.startswith("a"):
+        lst = _TypedList(value)
+        lst.dbusSignature = sig
+        return lst
+    return value
+
+
+class _TypedDict(dict):
+    pass
+
+
+class _TypedList(list):
+    pass
+
+
+class _MockObject(objects.DBusObject):
+    """Exported object with a plain dict based property store."""
+
+    _properties = {}
+
+    def __init__(self, mock, path):
+        super(_MockObject, self).__init__(path)
+        self.mock = mock
+        self.props = {iface: {} for iface in self._properties}
+
+    @property
+    def path(self) -> str:
+        return self.getObjectPath()
+
+    def getInterfaces(self):
+        return [
+            i
+            for i in super(_MockObject, self).getInterfaces()
+            if i.name in self.props or i.name == defs.PROPERTIES_INTERFACE
+        ]
+
+    def interfaces_and_properties(self) -> dict:
+        return {iface: self.getAllProperties(iface) for iface in self.props}
+
+    def getAllProperties(self, interfaceName):
+        sigs = self._properties.get(interfaceName, {})
+        return {
+            k: _typed(sigs[k], v)
+            for k, v in self.props.get(interfaceName, {}).items()
+            if v is not None
+        }
+
+    def set(self, interface: str, emit: bool = True, **changed) -> None:
+        """Set properties, emitting a PropertiesChanged signal."""
+        self.props[interface].update(changed)
+        if emit and self._objectHandler is not None:
+            sigs = self._properties[interface]
+            self.mock._emit(
+                self.path,
+                defs.PROPERTIES_INTERFACE,
+                "PropertiesChanged",
+                "sa{sv}as",
+                [interface, {k: _typed(sigs[k], v) for k, v in changed.items()}, []],
+            )
+
+    @objects.dbusMethod(defs.PROPERTIES_INTERFACE, "Get")
+    def _mock_get(self, interface_name, property_name):
+        try:
+            value = self.props[interface_name][property_name]
+        except KeyError:
+            raise BlueZError("InvalidArguments", "No such property")
+        return _typed(self._properties[interface_name][property_name], value)
+
+    @objects.dbusMethod(defs.PROPERTIES_INTERFACE, "GetAll")
+    def _mock_get_all(self, interface_name):
+        return self.getAllProperties(interface_name)
+
+    @objects.dbusMethod(defs.PROPERTIES_INTERFACE, "Set")
+    def _mock_set(self, interface_name, property_name, value):
+        self.set(interface_name, **{property_name: value})
+
+
+def _iface(name, *members):
+    return txdbus_interface.DBusInterface(name, *members)
+
+
+class MockAdapter(_MockObject):
+    dbusInterfaces = [
+        _iface(
+            defs.ADAPTER_INTERFACE,
+            txdbus_interface.Method("StartDiscovery"),
+            txdbus_interface.Method("StopDiscovery"),
+            txdbus_interface.Method("SetDiscoveryFilter", "a{sv}"),
+            txdbus_interface.Method("RemoveDevice", "o"),
+        )
+    ]
+    _properties = {
+        defs.ADAPTER_INTERFACE: {
+            "Address": "s",
+            "Name": "s",
+            "Alias": "s",
+            "Powered": "b",
+            "Discovering": "b",
+        }
+    }
+
+    def dbus_StartDiscovery(self):
+        return self.mock._reply("StartDiscovery", self.mock._start_discovery)
+
+    def dbus_StopDiscovery(self):
+        return self.mock._reply("StopDiscovery", self.mock._stop_discovery)
+
+    def dbus_SetDiscoveryFilter(self, filters):
+        self.mock.discovery_filter = filters
+        return self.mock._reply("SetDiscoveryFilter", lambda: None)
+
+    def dbus_RemoveDevice(self, path):
+        return self.mock._reply("RemoveDevice", self.mock._remove_device, path)
+
+
+class MockDevice(_MockObject):
+    dbusInterfaces = [
+        _iface(
+            defs.DEVICE_INTERFACE,
+            txdbus_interface.Method("Connect"),
+            txdbus_interface.Method("Disconnect"),
+        ),
+        _iface(defs.BATTERY_INTERFACE),
+    ]
+    _properties = {
+        defs.DEVICE_INTERFACE: {
+            "Address": "s",
+            "Name": "s",
+            "Alias": "s",
+            "Adapter": "o",
+            "RSSI": "n",
+            "Connected": "b",
+            "ServicesResolved": "b",
+            "UUIDs": "as",
+            "ManufacturerData": "a{qv}",
+        },
+        defs.BATTERY_INTERFACE: {"Percentage": "y"},
+    }
+
+    def __init__(self, mock, address, name, rssi, manufacturer_data, gatt, battery):
+        super(MockDevice, self).__init__(
+            mock, "{0}/dev_{1}".format(ADAPTER_PATH, address.replace(":", "_"))
+        )
+        if battery is None:
+            del self.props[defs.BATTERY_INTERFACE]
+        else:
+            self.props[defs.BATTERY_INTERFACE]["Percentage"] = battery
+        self.props[defs.DEVICE_INTERFACE].update(
+            Address=address,
+            Name=name,
+            Alias=name,
+            Adapter=ADAPTER_PATH,
+            RSSI=rssi,
+            Connected=False,
+            ServicesResolved=False,
+            UUIDs=[s["uuid"] for s in gatt["services"]],
+            ManufacturerData=manufacturer_data,
+        )
+        # GATT snapshot the GATT objects are built from on connect.
+        self.snapshot = gatt
+        self.gatt = []
+        self.visible = False
+
+    @property
+    def address(self) -> str:
+        return self.props[defs.DEVICE_INTERFACE]["Address"]
+
+    @property
+    def connected(self) -> bool:
+        return self.props[defs.DEVICE_INTERFACE]["Connected"]
+
+    def characteristic(self, uuid: str) -> "MockCharacteristic":
+        for o in self.gatt:
+            if isinstance(o, MockCharacteristic) and o.uuid == uuid:
+                return o
+        raise KeyError(uuid)
+
+    def dbus_Connect(self):
+        return self.mock._reply("Connect", self.mock._connect, self)
+
+    def dbus_Disconnect(self):
+        return self.mock._reply("Disconnect", self.mock._disconnect, self)
+
+
+class MockService(_MockObject):
+    dbusInterfaces = [_iface(defs.GATT_SERVICE_INTERFACE)]
+    _properties = {
+        defs.GATT_SERVICE_INTERFACE: {"UUID": "s", "Device": "o", "Primary": "b"}
+    }
+
+
+class MockCharacteristic(_MockObject):
+    dbusInterfaces = [
+        _iface(
+            defs.GATT_CHARACTERISTIC_INTERFACE,
+            txdbus_interface.Method("ReadValue", "a{sv}", "ay"),
+            txdbus_interface.Method("WriteValue", "aya{sv}"),
+            txdbus_interface.Method("StartNotify"),
+            txdbus_interface.Method("StopNotify"),
+        )
+    ]
+    _properties = {
+        defs.GATT_CHARACTERISTIC_INTERFACE: {
+            "UUID": "s",
+            "Service": "o",
+            "Value": "ay",
+            "Notifying": "b",
+            "Flags": "as",
+            "MTU": "q",
+        }
+    }
+
+    def __init__(self, mock, path):
+        super(MockCharacteristic, self).__init__(mock, path)
+        self.device = None
+        self.writes = 0
+        self._stream = None
+
+    @property
+    def uuid(self) -> str:
+        return self.props[defs.GATT_CHARACTERISTIC_INTERFACE]["UUID"]
+
+    @property
+    def notifying(self) -> bool:
+        return self.props[defs.GATT_CHARACTERISTIC_INTERFACE]["Notifying"]
+
+    def notify(self, value: bytes) -> None:
+        """Emit a notification with a new value, if notifications are started."""
+        if self.notifying:
+            self.set(defs.GATT_CHARACTERISTIC_INTERFACE, Value=bytes(value))
+
+    def dbus_ReadValue(self, options):
+        return self.mock._reply("ReadValue", self._read)
+
+    def _read(self):
+        properties = self.props[defs.GATT_CHARACTERISTIC_INTERFACE]
+        if "read" not in properties["Flags"]:
+            raise BlueZError("NotPermitted", "Read not permitted")
+        return _typed("ay", properties["Value"])
+
+    def dbus_WriteValue(self, value, options):
+        return self.mock._reply("WriteValue", self.mock._write, self, value, options)
+
+    def dbus_StartNotify(self):
+        return self.mock._reply("StartNotify", self.mock._start_notify, self)
+
+    def dbus_StopNotify(self):
+        return self.mock._reply("StopNotify", self.mock._stop_notify, self)
+
+
+class MockDescriptor(_MockObject):
+    dbusInterfaces = [
+        _iface(
+            defs.GATT_DESCRIPTOR_INTERFACE,
+            txdbus_interface.Method("ReadValue", "a{sv}", "ay"),
+            txdbus_interface.Method("WriteValue", "aya{sv}"),
+        )
+    ]
+    _properties = {
+        defs.GATT_DESCRIPTOR_INTERFACE: {
+            "UUID": "s",
+            "Characteristic": "o",
+            "Value": "ay",
+        }
+    }
+
+    def dbus_ReadValue(self, options):
+        return self.mock._reply(
+            "ReadValue",
+            lambda: _typed("ay", self.props[defs.GATT_DESCRIPTOR_INTERFACE]["Value"]),
+        )
+
+    def dbus_WriteValue(self, value, options):
+        def _write():
+            self.props[defs.GATT_DESCRIPTOR_INTERFACE]["Value"] = bytes(value)
+
+        return self.mock._reply("WriteValue", _write)
+
+
+class _MockRoot(objects.DBusObject):
+    dbusInterfaces = [
+        _iface(
+            defs.OBJECT_MANAGER_INTERFACE,
+            txdbus_interface.Method("GetManagedObjects", "", "a{oa{sa{sv}}}"),
+        )
+    ]
+
+
+class MockBlueZ(object):
+    """A stand-in for the BlueZ daemon.
+
+    Args:
+        bus_address (str): Address of the bus to serve ``org.bluez`` on, e.g. from
+          :py:class:`PrivateBus`.
+        loop (asyncio.AbstractEventLoop): The event loop to use.
+
+    Keyword Args:
+        advertisement_rate (float): Advertisements per second, in total over all
+          devices, while discovering. Defaults to 100.0.
+        latency (float): Seconds before replying to any method call. Defaults to 0.0.
+        latencies (dict): Per method latencies, overriding ``latency``.
+        notification_rate (float): Notifications per second on ``STREAM_NOTIFY_UUID``
+          characteristics. Defaults to 100.0.
+        notification_latency (float): Seconds from a write on ``ECHO_WRITE_UUID`` until
+          it is notified on ``ECHO_NOTIFY_UUID``. Defaults to 0.0.
+        services_resolved_delay (float): Seconds after connecting before the services
+          are resolved. Defaults to 0.0, i.e. resolved before ``Connect`` returns.
+        mtu (int): The ``MTU`` property of characteristics. Defaults to 247.
+
+    """
+
+    def __init__(
+        self, bus_address: str, loop: asyncio.AbstractEventLoop = None, **kwargs
+    ):
+        self.bus_address = bus_address
+        self.loop = loop if loop else asyncio.get_event_loop()
+        self.advertisement_rate = kwargs.get("advertisement_rate", 100.0)
+        self.latency = kwargs.get("latency", 0.0)
+        self.latencies = kwargs.get("latencies", {})
+        self.notification_rate = kwargs.get("notification_rate", 100.0)
+        self.notification_latency = kwargs.get("notification_latency", 0.0)
+        self.services_resolved_delay = kwargs.get("services_resolved_delay", 0.0)
+        self.mtu = kwargs.get("mtu", 247)
+
+        self.devices = []  # type: List[MockDevice]
+        # Number of calls, by D-Bus method name.
+        self.calls = {}
+        self.discovery_filter = {}
+
+        self._bus = None
+        self._reactor = None
+        self._adapter = None
+        self._advertiser = None
+        self._next_address = itertools.count(0x0A0000000000)
+
+    async def start(self) -> None:
+        """Connect to the bus and take the ``org.bluez`` name."""
+        self._reactor = get_reactor(self.loop)
+        self._bus = await client.connect(self._reactor, self.bus_address).asFuture(
+            self.loop
+        )
+        await self._bus.requestBusName(defs.BLUEZ_SERVICE).asFuture(self.loop)
+        self._export(_MockRoot("/"), announce=False)
+        self._adapter = MockAdapter(self, ADAPTER_PATH)
+        self._adapter.props[defs.ADAPTER_INTERFACE].update(
+            Address="00:00:00:00:00:01",
+            Name="mock",
+            Alias="mock",
+            Powered=True,
+            Discovering=False,
+        )
+        self._export(self._adapter)
+
+    async def stop(self) -> None:
+        """Stop all activity and disconnect from the bus."""
+        self._stop_discovery()
+        for d in self.devices:
+            for o in d.gatt:
+                if isinstance(o, MockCharacteristic) and o._stream is not None:
+                    o._stream.cancel()
+        if self._bus is not None:
+            self._bus.disconnect()
+            self._bus = None
+
+    # Device management
+
+    def add_device(
+        self,
+        address: str = None,
+        name: str = None,
+        rssi: int = -60,
+        manufacturer_data: dict = None,
+        profile: Union[list, dict] = None,
+        battery: int = None,
+        visible: bool = False,
+    ) -> MockDevice:
+        """Add a device, which starts advertising when discovery is started.
+
+        Args:
+            address (str): MAC address. Defaults to a generated one.
+            name (str): Device name. Defaults to ``Mock <address>``.
+            rssi (int): Mean signal strength.
+            manufacturer_data (dict): Manufacturer ids mapped to bytes.
+            profile (list or dict): GATT profile, see ``DEFAULT_PROFILE``, or a
+              snapshot, see :py:mod:`bleak.backends.snapshot`, whose handles and
+              values are kept.
+            battery (int): If given, the device has a ``Battery1`` interface with
+              this percentage.
+            visible (bool): If ``True``, the device is exported immediately, like
+              devices BlueZ already knows of.
+
+        """
+        address = address or mac_int_2_str(next(self._next_address))
+        if profile is None:
+            profile = DEFAULT_PROFILE
+        gatt = profile if isinstance(profile, dict) else _profile_snapshot(profile)
+        device = MockDevice(
+            self,
+            address,
+            name or "Mock {0}".format(address),
+            rssi,
+            manufacturer_data or {0xFFFF: b"\x00"},
+            gatt,
+            battery,
+        )
+        self.devices.append(device)
+        if visible:
+            self._show(device)
+        return device
+
+    def add_devices(self, n: int, **kwargs) -> List[MockDevice]:
+        """Add ``n`` devices with generated addresses."""
+        return [self.add_device(**kwargs) for _ in range(n)]
+
+    def device(self, address: str) -> MockDevice:
+        for d in self.devices:
+            if d.address.lower() == address.lower():
+                return d
+        raise KeyError(address)
+
+    def disconnect_device(self, address: str) -> None:
+        """Simulate a link loss, i.e. an unsolicited disconnect."""
+        self._disconnect(self.device(address))
+
+    # Internals
+
+    def _emit(self, path, interface, member, signature, body):
+        if self._bus is None:
+            return
+        self._bus.sendMessage(
+            message.SignalMessage(
+                path, member, interface, signature=signature, body=body
+            )
+        )
+
+    def _export(self, obj, announce=True):
+        handler = self._bus.objHandler
+        handler.exports[obj.getObjectPath()] = obj
+        obj.setObjectHandler(handler)
+        if announce:
+            self._emit(
+                "/",
+                defs.OBJECT_MANAGER_INTERFACE,
+                "InterfacesAdded",
+                "oa{sa{sv}}",
+                [obj.getObjectPath(), obj.interfaces_and_properties()],
+            )
+
+    def _unexport(self, obj):
+        self._bus.objHandler.exports.pop(obj.getObjectPath(), None)
+        self._emit(
+            "/",
+            defs.OBJECT_MANAGER_INTERFACE,
+            "InterfacesRemoved",
+            "oas",
+            [obj.getObjectPath(), list(obj.props)],
+        )
+
+    def _reply(self, method, func, *args):
+        """Run a method implementation after the configured latency."""
+        self.calls[method] = self.calls.get(method, 0) + 1
+        latency = self.latencies.get(method, self.latency)
+        if latency > 0:
+            return task.deferLater(self._reactor, latency, func, *args)
+        return func(*args)
+
+    def _show(self, device):
+        if not device.visible:
+            device.visible = True
+            self._export(device)
+
+    def _start_discovery(self):
+        self._adapter.set(defs.ADAPTER_INTERFACE, Discovering=True)
+        if self._advertiser is None:
+            self._advertiser = self.loop.create_task(self._advertise())
+
+    def _stop_discovery(self):
+        adapter = self._adapter
+        if adapter is not None and adapter.props[defs.ADAPTER_INTERFACE]["Discovering"]:
+            adapter.set(defs.ADAPTER_INTERFACE, Discovering=False)
+        if self._advertiser is not None:
+            self._advertiser.cancel()
+            self._advertiser = None
+
+    async def _advertise(self):
+        start = self.loop.time()
+        sent = 0
+        while True:
+            # Drift-free: emit as many adverts as the rate calls for until now,
+            # in batches so that a rate that cannot be kept up with just saturates.
+            due = int((self.loop.time() - start) * self.advertisement_rate)
+            for _ in range(min(due - sent, _MAX_BATCH)):
+                if not self.devices:
+                    break
+                # Round robin, so that n devices are all seen after n adverts.
+                device = self.devices[sent % len(self.devices)]
+                if not device.visible:
+                    self._show(device)
+                else:
+                    rssi = device.props[defs.DEVICE_INTERFACE]["RSSI"]
+                    device.set(
+                        defs.DEVICE_INTERFACE,
+                        RSSI=max(min(rssi + random.randint(-2, 2), -20), -100),
+                    )
+                sent += 1
+            sent = max(sent, due - _MAX_BATCH)
+            await asyncio.sleep(_TICK)
+
+    def _remove_device(self, path):
+        for d in self.devices:
+            if d.path == path and d.visible:
+                for o in d.gatt:
+                    self._unexport(o)
+                d.gatt = []
+                self._unexport(d)
+                d.visible = False
+                return
+        raise BlueZError("DoesNotExist", "Does Not Exist")
+
+    def _connect(self, device):
+        if device.connected:
+            return
+        device.set(defs.DEVICE_INTERFACE, Connected=True)
+        if not device.gatt:
+            self._build_gatt(device)
+        if self.services_resolved_delay > 0:
+            self.loop.call_later(self.services_resolved_delay, self._resolve, device)
+        else:
+            self._resolve(device)
+
+    def _resolve(self, device):
+        if device.connected:
+            device.set(defs.DEVICE_INTERFACE, ServicesResolved=True)
+
+    def _disconnect(self, device):
+        if not device.connected:
+            return
+        for o in device.gatt:
+            if isinstance(o, MockCharacteristic) and o.notifying:
+                self._stop_notify(o)
+        device.set(defs.DEVICE_INTERFACE, ServicesResolved=False)
+        device.set(defs.DEVICE_INTERFACE, Connected=False)
+
+    def _build_gatt(self, device):
+        for service in device.snapshot["services"]:
+            s = MockService(
+                self, "{0}/service{1:04x}".format(device.path, service["handle"])
+            )
+            s.props[defs.GATT_SERVICE_INTERFACE].update(
+                UUID=service["uuid"], Device=device.path, Primary=True
+            )
+            device.gatt.append(s)
+            for char in service["characteristics"]:
+                c = MockCharacteristic(
+                    self, "{0}/char{1:04x}".format(s.path, char["handle"])
+                )
+                c.device = device
+                c.props[defs.GATT_CHARACTERISTIC_INTERFACE].update(
+                    UUID=char["uuid"],
+                    Service=s.path,
+                    Value=bytes.fromhex(char.get("value") or ""),
+                    Notifying=False,
+                    Flags=list(char["properties"]),
+                    MTU=self.mtu,
+                )
+                device.gatt.append(c)
+                for descriptor in char["descriptors"]:
+                    d = MockDescriptor(
+                        self, "{0}/desc{1:04x}".format(c.path, descriptor["handle"])
+                    )
+                    d.props[defs.GATT_DESCRIPTOR_INTERFACE].update(
+                        UUID=descriptor["uuid"],
+                        Characteristic=c.path,
+                        Value=bytes.fromhex(descriptor.get("value") or ""),
+                    )
+                    device.gatt.append(d)
+        for o in device.gatt:
+            self._export(o)
+
+    def _check_connected(self, device):
+        if device is not None and not device.connected:
+            raise BlueZError("Failed", "Not connected")
+
+    def _write(self, characteristic, value, options):
+        self._check_connected(characteristic.device)
+        value = bytes(value)
+        # Longer writes with response are long writes, limited by the attribute.
+        if options.get("type") == "command":
+            max_length = self.mtu - 3
+        else:
+            max_length = _MAX_ATTRIBUTE_LENGTH
+        if len(value) > max_length:
+            raise BlueZError("InvalidValueLength", "Invalid value length")
+        characteristic.props[defs.GATT_CHARACTERISTIC_INTERFACE]["Value"] = value
+        characteristic.writes += 1
+        if characteristic.uuid == ECHO_WRITE_UUID:
+            echo = characteristic.device.characteristic(ECHO_NOTIFY_UUID)
+            if self.notification_latency > 0:
+                self.loop.call_later(self.notification_latency, echo.notify, value)
+            else:
+                echo.notify(value)
+
+    def _start_notify(self, characteristic):
+        self._check_connected(characteristic.device)
+        if characteristic.notifying:
+            raise BlueZError("InProgress", "Already notifying")
+        characteristic.set(defs.GATT_CHARACTERISTIC_INTERFACE, Notifying=True)
+        if characteristic.uuid == STREAM_NOTIFY_UUID and self.notification_rate > 0:
+            characteristic._stream = self.loop.create_task(self._stream(characteristic))
+
+    def _stop_notify(self, characteristic):
+        if characteristic._stream is not None:
+            characteristic._stream.cancel()
+            characteristic._stream = None
+        characteristic.set(defs.GATT_CHARACTERISTIC_INTERFACE, Notifying=False)
+
+    async def _stream(self, characteristic):
+        start = self.loop.time()
+        n = 0
+        while characteristic.notifying:
+            due = int((self.loop.time() - start) * self.notification_rate)
+            for _ in range(min(due - n, _MAX_BATCH)):
+                characteristic.notify(n.to_bytes(4, "little"))
+                n += 1
+            n = max(n, due - _MAX_BATCH)
+            await asyncio.sleep(_TICK)
+
+
+async def _serve(args, loop):
+    bus = PrivateBus()
+    bus.start()
+    mock = MockBlueZ(
+        bus.address,
+        loop,
+        advertisement_rate=args.rate,
+        latency=args.latency,
+        notification_rate=args.notification_rate,
+    )
+    await mock.start()
+    mock.add_devices(args.devices)
+    print("DBUS_SYSTEM_BUS_ADDRESS={0}".format(bus.address), flush=True)
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await mock.stop()
+        bus.stop()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Run a BlueZ stand-in on a private D-Bus daemon."
+    )
+    parser.add_argument("--devices", type=int, default=10, help="Number of devices")
+    parser.add_argument("--rate", type=float, default=100.0, help="Adverts per second")
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Method call latency"
+    )
+    parser.add_argument(
+        "--notification-rate",
+        type=float,
+        default=100.0,
+        help="Notifications per second",
+    )
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(_serve(args, loop))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Scheduling of the GATT operations of a client.
+
+BlueZ fails an operation overlapping another one on the same characteristic with
+``org.bluez.Error.InProgress``, so reads and writes made concurrently from several
+tasks fail at random. The BlueZ client therefore runs its GATT operations through
+an :py:class:`OperationQueue`, which bounds the operations in flight, starts waiting
+operations by priority and retries those BlueZ reports as in progress. Operations
+given a timeout raise :py:class:`bleak.exc.BleakTimeoutError` telling if they timed
+out waiting for their turn or for BlueZ, and give their place in the queue up:
+
+.. code-block:: python
+
+    client = BleakClient(address, max_in_flight=1, retries=3)
+    await client.connect()
+    # A control write overtaking queued bulk reads.
+    await client.write_gatt_char(CONTROL_UUID, b"\\x01", True, priority=PRIORITY_HIGH)
+    # Giving up on a read after a second, instead of the client default.
+    await client.read_gatt_char(BULK_UUID, timeout=1.0)
+
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+from typing import Awaitable, Callable
+
+from bleak.exc import BleakDBusError, BleakTimeoutError
+from bleak.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+#: Priorities of operations; operations of higher priority are started first.
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 0
+PRIORITY_LOW = -10
+
+IN_PROGRESS = "org.bluez.Error.InProgress"
+
+
+class OperationQueue(object):
+    """Runs operations, at most ``max_in_flight`` at a time, by priority.
+
+    Operations waiting for their turn are started by descending priority, and in
+    the order they were queued for equal priorities. The time spent waiting is
+    added to the ``queue_wait`` histogram of the metrics, and retries are counted
+    in the ``retries`` counter.
+
+    Args:
+        loop (asyncio.events.AbstractEventLoop): The event loop to use.
+        max_in_flight (int): Operations run at a time. Defaults to 1.
+        retries (int): Times an operation failing with ``InProgress`` is retried.
+          Defaults to 3.
+        retry_delay (float): Seconds before the first retry, doubled for each
+          further retry. Defaults to 0.05.
+        metrics (bleak.metrics.Metrics): Metrics to update.
+
+    Attributes:
+        in_flight (int): Operations currently running.
+        max_depth (int): Most operations that have been waiting at a time.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop = None,
+        max_in_flight: int = 1,
+        retries: int = 3,
+        retry_delay: float = 0.05,
+        metrics: Metrics = None,
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.loop = loop if loop else asyncio.get_event_loop()
+        self.max_in_flight = max_in_flight
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.metrics = metrics
+
+        self.in_flight = 0
+        self.max_depth = 0
+        self._waiting = []
+        self._order = itertools.count()
+
+    @property
+    def depth(self) -> int:
+        """Operations waiting for their turn."""
+        return len(self._waiting)
+
+    async def run(
+        self,
+        operation: Callable[[], Awaitable],
+        priority: int = PRIORITY_NORMAL,
+        timeout: float = None,
+        name: str = "operation",
+    ):
+        """Run an operation once it is its turn.
+
+        Args:
+            operation (callable): Function returning the awaitable of the operation,
+              called again for every retry.
+            priority (int): Priority of the operation.
+            timeout (float): Seconds to wait for the operation, in total, from when
+              it is queued. ``None`` waits for as long as it takes.
+            name (str): Name of the operation, for errors.
+
+        Returns:
+            The result of the operation.
+
+        Raises:
+            BleakTimeoutError: If the operation timed out. It is cancelled.
+
+        """
+        start = self.loop.time()
+        if self.in_flight < self.max_in_flight and not self._waiting:
+            self.in_flight += 1
+        else:
+            try:
+                await asyncio.wait_for(self._acquire(priority), timeout)
+            except asyncio.TimeoutError:
+                raise BleakTimeoutError(name, "queue", timeout)
+        waited = self.loop.time() - start
+        if self.metrics is not None:
+            self.metrics.observe("queue_wait", waited)
+
+        phase = ["call"]
+        try:
+            if timeout is None:
+                return await self._attempt(operation, phase)
+            try:
+                return await asyncio.wait_for(
+                    self._attempt(operation, phase), timeout - waited
+                )
+            except asyncio.TimeoutError:
+                if self.loop.time() - start < timeout:
+                    # Not ours, but raised by the operation.
+                    raise
+                raise BleakTimeoutError(name, phase[0], timeout)
+        finally:
+            self._release()
+
+    async def _attempt(self, operation, phase):
+        attempt = 0
+        while True:
+            phase[0] = "call"
+            try:
+                return await operation()
+            except BleakDBusError as e:
+                if e.dbus_error != IN_PROGRESS or attempt >= self.retries:
+                    raise
+            attempt += 1
+            logger.debug("Operation in progress, retry {0}.".format(attempt))
+            if self.metrics is not None:
+                self.metrics.inc("retries")
+            phase[0] = "retry"
+            await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+    async def _acquire(self, priority: int) -> None:
+        # Slots may have been released since run() checked, as wait_for() only
+        # starts this in a task of its own.
+        if self.in_flight < self.max_in_flight and not self._waiting:
+            self.in_flight += 1
+            return
+        entry = (-priority, next(self._order), self.loop.create_future())
+        heapq.heappush(self._waiting, entry)
+        self.max_depth = max(self.max_depth, len(self._waiting))
+        try:
+            await entry[2]
+        except asyncio.CancelledError:
+            if entry[2].cancelled():
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+            else:
+                # Handed a slot just as it was cancelled.
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        # The slot goes straight to the next operation, if any.
+        while self._waiting:
+            _, _, waiter = heapq.heappop(self._waiting)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
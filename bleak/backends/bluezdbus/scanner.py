@@ -8,11 +8,10 @@ from typing import Callable, Any, Union, List
 
 from bleak.backends.scanner import BaseBleakScanner
 from bleak.backends.device import BLEDevice
-from bleak.backends.bluezdbus import defs, get_reactor
+from bleak.backends.bluezdbus import connection, defs, utils
+from bleak.backends.bluezdbus.aiodbus.marshal import decoder, interfaces_decoder
 from bleak.backends.bluezdbus.utils import validate_mac_address
 
-from txdbus import client
-
 logger = logging.getLogger(__name__)
 _here = pathlib.Path(__file__).parent
 
@@ -38,6 +37,14 @@ def _filter_on_device(objs):
         yield path, device
 
 
+def _interfaces_added_lookup(signature, endian):
+    # Only the properties of devices are read, so those of GATT services and
+    # other objects are skipped while decoding.
+    if signature == "a{sa{sv}}":
+        return interfaces_decoder(endian, (defs.DEVICE_INTERFACE,))
+    return decoder(signature, endian)
+
+
 def _device_info(path, props):
     try:
         name = props.get("Name", props.get("Alias", path.split("/")[-1]))
@@ -63,6 +70,11 @@ class BleakScannerBlueZDBus(BaseBleakScanner):
         loop (asyncio.events.AbstractEventLoop): The event loop to use.
 
     Keyword Args:
+        device (str): Bluetooth device to use for discovery. Defaults to ``hci0``.
+        filters (dict): A dict of filters to be applied on discovery.
+        recorder (bleak.backends.bluezdbus.capture.CaptureRecorder): Records all
+          D-Bus signals received by the scanner, for later replay.
+        tracer (bleak.tracing.Tracer): Tracer of the D-Bus calls made by the scanner.
 
     """
 
@@ -70,7 +82,6 @@ class BleakScannerBlueZDBus(BaseBleakScanner):
         super(BleakScannerBlueZDBus, self).__init__(loop, **kwargs)
 
         self._device = kwargs.get("device", "hci0")
-        self._reactor = None
         self._bus = None
 
         self._cached_devices = {}
@@ -85,75 +96,99 @@ class BleakScannerBlueZDBus(BaseBleakScanner):
         self._interface = None
 
         self._callback = None
+        self._recorder = kwargs.get("recorder")
 
     async def start(self):
-        self._reactor = get_reactor(self.loop)
-        self._bus = await client.connect(self._reactor, "system").asFuture(self.loop)
+        self._bus = await connection.connect(self.loop)
+        if self._recorder is not None:
+            self._recorder.attach(self._bus)
+        self._bus.set_signal_decoder(
+            defs.OBJECT_MANAGER_INTERFACE, "InterfacesAdded", _interfaces_added_lookup
+        )
 
         # Add signal listeners
         self._rules.append(
-            await self._bus.addMatch(
+            await self._bus.add_match(
                 self.parse_msg,
                 interface="org.freedesktop.DBus.ObjectManager",
                 member="InterfacesAdded",
-            ).asFuture(self.loop)
+                path_namespace="/org/bluez",
+            )
         )
 
         self._rules.append(
-            await self._bus.addMatch(
+            await self._bus.add_match(
                 self.parse_msg,
                 interface="org.freedesktop.DBus.ObjectManager",
                 member="InterfacesRemoved",
-            ).asFuture(self.loop)
+                path_namespace="/org/bluez",
+            )
         )
 
         self._rules.append(
-            await self._bus.addMatch(
+            await self._bus.add_match(
                 self.parse_msg,
                 interface="org.freedesktop.DBus.Properties",
                 member="PropertiesChanged",
-            ).asFuture(self.loop)
+                path_namespace="/org/bluez",
+            )
         )
 
         # Find the HCI device to use for scanning and get cached device properties
-        objects = await self._bus.callRemote(
+        objects = await utils.call_remote(
+            self._bus,
             "/",
             "GetManagedObjects",
+            metrics=self.metrics,
+            tracer=self.tracer,
             interface=defs.OBJECT_MANAGER_INTERFACE,
             destination=defs.BLUEZ_SERVICE,
-        ).asFuture(self.loop)
+        )
         self._adapter_path, self._interface = _filter_on_adapter(objects, self._device)
         self._cached_devices = dict(_filter_on_device(objects))
 
         # Apply the filters
-        await self._bus.callRemote(
+        await utils.call_remote(
+            self._bus,
             self._adapter_path,
             "SetDiscoveryFilter",
+            metrics=self.metrics,
+            tracer=self.tracer,
             interface="org.bluez.Adapter1",
             destination="org.bluez",
             signature="a{sv}",
             body=[self._filters],
-        ).asFuture(self.loop)
+        )
 
         # Start scanning
-        await self._bus.callRemote(
+        await utils.call_remote(
+            self._bus,
             self._adapter_path,
             "StartDiscovery",
+            metrics=self.metrics,
+            tracer=self.tracer,
             interface="org.bluez.Adapter1",
             destination="org.bluez",
-        ).asFuture(self.loop)
+        )
 
     async def stop(self):
-        await self._bus.callRemote(
+        await utils.call_remote(
+            self._bus,
             self._adapter_path,
             "StopDiscovery",
+            metrics=self.metrics,
+            tracer=self.tracer,
             interface="org.bluez.Adapter1",
             destination="org.bluez",
-        ).asFuture(self.loop)
+        )
 
         for rule in self._rules:
-            await self._bus.delMatch(rule).asFuture(self.loop)
+            await self._bus.del_match(rule)
         self._rules.clear()
+        self._flush_sinks()
+
+        if self._recorder is not None:
+            self._recorder.detach(self._bus)
 
         # Try to disconnect the System Bus.
         try:
@@ -162,7 +197,6 @@ class BleakScannerBlueZDBus(BaseBleakScanner):
             logger.error("Attempt to disconnect system bus failed: {0}".format(e))
 
         self._bus = None
-        self._reactor = None
 
     async def set_scanning_filter(self, **kwargs):
         self._filters = kwargs.get("filters", {})
@@ -213,6 +247,8 @@ class BleakScannerBlueZDBus(BaseBleakScanner):
                 device_interface = message.body[1].get("org.bluez.Device1", {})
             except Exception as e:
                 raise e
+            if defs.DEVICE_INTERFACE in message.body[1]:
+                self.metrics.inc("detections")
             self._devices[msg_path] = (
                 {**self._devices[msg_path], **device_interface}
                 if msg_path in self._devices
@@ -222,6 +258,7 @@ class BleakScannerBlueZDBus(BaseBleakScanner):
             iface, changed, invalidated = message.body
             if iface != defs.DEVICE_INTERFACE:
                 return
+            self.metrics.inc("detections")
 
             msg_path = message.path
             # the PropertiesChanged signal only sends changed properties, so we
@@ -259,5 +296,17 @@ class BleakScannerBlueZDBus(BaseBleakScanner):
             )
         )
 
+        if self._sinks and msg_path in self._devices:
+            props = self._devices[msg_path]
+            name, address, _, _ = _device_info(msg_path, props)
+            if address is not None:
+                self._dispatch_to_sinks(
+                    address,
+                    name,
+                    props.get("RSSI"),
+                    props.get("ManufacturerData", {}),
+                    props.get("UUIDs", []),
+                )
+
         if self._callback is not None:
             self._callback(message)
@@ -18,6 +18,11 @@ class BleakGATTServiceBlueZDBus(BleakGATTService):
         """The UUID to this service"""
         return self.obj["UUID"]
 
+    @property
+    def handle(self) -> int:
+        """Handle of the service declaration"""
+        return int(self.path.split("/")[-1].replace("service", ""), 16)
+
     @property
     def characteristics(self) -> List[BleakGATTCharacteristicBlueZDBus]:
         """List of characteristics for this service"""
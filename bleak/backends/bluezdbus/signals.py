@@ -4,60 +4,60 @@ from bleak.backends.bluezdbus.defs import PROPERTIES_INTERFACE, OBJECT_MANAGER_I
 
 
 def listen_properties_changed(bus, loop, callback):
-    """Create a future for a PropertiesChanged signal listener.
+    """Add a PropertiesChanged signal listener.
 
     Args:
         bus: The system bus object to use.
-        loop: The asyncio loop to use for adding the future to.
+        loop: Unused, kept for compatibility.
         callback: The callback function to run when signal is received.
 
     Returns:
-        Integer rule id.
+        A coroutine returning the integer rule id.
 
     """
-    return bus.addMatch(
+    return bus.add_match(
         callback,
         interface=PROPERTIES_INTERFACE,
         member="PropertiesChanged",
         path_namespace="/org/bluez",
-    ).asFuture(loop)
+    )
 
 
 def listen_interfaces_added(bus, loop, callback):
-    """Create a future for a InterfacesAdded signal listener.
+    """Add an InterfacesAdded signal listener.
 
     Args:
         bus: The system bus object to use.
-        loop: The asyncio loop to use for adding the future to.
+        loop: Unused, kept for compatibility.
         callback: The callback function to run when signal is received.
 
     Returns:
-        Integer rule id.
+        A coroutine returning the integer rule id.
 
     """
-    return bus.addMatch(
+    return bus.add_match(
         callback,
         interface=OBJECT_MANAGER_INTERFACE,
         member="InterfacesAdded",
         path_namespace="/org/bluez",
-    ).asFuture(loop)
+    )
 
 
 def listen_interfaces_removed(bus, loop, callback):
-    """Create a future for a InterfacesAdded signal listener.
+    """Add an InterfacesRemoved signal listener.
 
     Args:
         bus: The system bus object to use.
-        loop: The asyncio loop to use for adding the future to.
+        loop: Unused, kept for compatibility.
         callback: The callback function to run when signal is received.
 
     Returns:
-        Integer rule id.
+        A coroutine returning the integer rule id.
 
     """
-    return bus.addMatch(
+    return bus.add_match(
         callback,
         interface=OBJECT_MANAGER_INTERFACE,
         member="InterfacesRemoved",
         path_namespace="/org/bluez",
-    ).asFuture(loop)
+    )
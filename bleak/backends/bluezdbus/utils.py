@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 import re
+import time
 
+from bleak import tracing
 from bleak.uuids import uuidstr_to_str
 
 from bleak.backends.bluezdbus import defs
@@ -68,13 +70,67 @@ def get_gatt_service_path(hci_device, address, service_id):
     return base + "{0}/service{1:02d}".format(base, service_id)
 
 
-async def get_managed_objects(bus, loop, object_path_filter=None):
-    objects = await bus.callRemote(
+async def call_remote(bus, path, method, metrics=None, tracer=None, **kwargs):
+    """Call a method on a remote D-Bus object.
+
+    Args:
+        bus: A bus connected with
+          :py:func:`bleak.backends.bluezdbus.connection.connect`.
+        path (str): Object path to call the method on.
+        method (str): Method name.
+        metrics (bleak.metrics.Metrics): If given, the call is counted, its latency
+          recorded if there is a histogram for the method and errors counted by
+          D-Bus error name.
+        tracer (bleak.tracing.Tracer): Tracer to call the hooks of. Defaults to
+          the one installed with :py:func:`bleak.tracing.set_tracer`, if any.
+        **kwargs: Passed on to the ``call_remote`` method of the bus, e.g.
+          ``interface`` and ``body``.
+
+    Returns:
+        The return value of the method.
+
+    """
+    if tracer is None:
+        tracer = tracing.get_tracer()
+    if metrics is None and tracer is None:
+        return await bus.call_remote(path, method, **kwargs)
+
+    if metrics is not None:
+        metrics.inc("dbus_calls", label=method)
+    span = tracer.start(method, path) if tracer is not None else None
+    error = None
+    t = time.perf_counter()
+    try:
+        return await bus.call_remote(path, method, **kwargs)
+    except Exception as e:
+        error = e
+        if metrics is not None:
+            metrics.inc(
+                "errors", label=getattr(e, "dbus_error", None) or type(e).__name__
+            )
+        raise
+    finally:
+        elapsed = time.perf_counter() - t
+        if metrics is not None:
+            histogram = metrics.histograms.get(method)
+            if histogram is not None:
+                histogram.observe(elapsed)
+        if tracer is not None:
+            tracer.finish(span, method, path, elapsed, error)
+
+
+async def get_managed_objects(
+    bus, loop, object_path_filter=None, metrics=None, tracer=None
+):
+    objects = await call_remote(
+        bus,
         "/",
         "GetManagedObjects",
+        metrics=metrics,
+        tracer=tracer,
         interface="org.freedesktop.DBus.ObjectManager",
         destination="org.bluez",
-    ).asFuture(loop)
+    )
     if object_path_filter:
         return dict(
             filter(lambda i: i[0].startswith(object_path_filter), objects.items())
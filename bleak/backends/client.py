@@ -8,9 +8,30 @@ Created on 2018-04-23 by hbldh <henrik.blidh@nedomkull.com>
 import abc
 import asyncio
 import uuid
+from collections import namedtuple
 from typing import Callable, Any, Union
 
+from bleak.backends.characteristic import BleakGATTCharacteristic
 from bleak.backends.service import BleakGATTServiceCollection
+from bleak.backends.snapshot import snapshot_services
+from bleak.metrics import Metrics
+
+#: The ATT MTU every link starts with, before a larger one is negotiated.
+DEFAULT_ATT_MTU = 23
+
+NotificationInfo = namedtuple("NotificationInfo", ["timestamp", "sequence"])
+NotificationInfo.__doc__ = """Reception metadata of a notification.
+
+Given to notification callbacks as third argument when started with
+``extended=True``.
+
+Attributes:
+    timestamp (float): ``time.monotonic()`` when the notification was decoded,
+      before it waited for the event loop to run the callback.
+    sequence (int): Number of the notification on its characteristic, counted
+      from 0 since notifications were started.
+
+"""
 
 
 class BaseBleakClient(abc.ABC):
@@ -20,6 +41,11 @@ class BaseBleakClient(abc.ABC):
 
     Keyword Args:
         timeout (float): Timeout for required ``discover`` call. Defaults to 2.0.
+        tracer (bleak.tracing.Tracer): Tracer of the calls made by this client.
+          Defaults to the one installed with :py:func:`bleak.tracing.set_tracer`.
+
+    Attributes:
+        metrics (bleak.metrics.Metrics): Counters and latency histograms of this client.
 
     """
 
@@ -31,9 +57,13 @@ class BaseBleakClient(abc.ABC):
 
         self._services_resolved = False
         self._notification_callbacks = {}
+        self._mtu_size = DEFAULT_ATT_MTU
 
         self._timeout = kwargs.get("timeout", 2.0)
 
+        self.metrics = Metrics()
+        self.tracer = kwargs.get("tracer")
+
     def __str__(self):
         return "{0}, {1}".format(self.__class__.__name__, self.address)
 
@@ -107,6 +137,16 @@ class BaseBleakClient(abc.ABC):
         """
         raise NotImplementedError()
 
+    @property
+    def mtu_size(self) -> int:
+        """The ATT MTU negotiated with the server.
+
+        Writes without response carry at most ``mtu_size - 3`` bytes. Until it is
+        known, e.g. before connecting, this is the default ATT MTU of 23 bytes.
+
+        """
+        return self._mtu_size
+
     # GATT services methods
 
     @abc.abstractmethod
@@ -119,6 +159,66 @@ class BaseBleakClient(abc.ABC):
         """
         raise NotImplementedError()
 
+    async def dump_gatt(self, read_values: bool = True, concurrency: int = 4) -> dict:
+        """Get the whole GATT database of the server, with the values read.
+
+        The values of all readable characteristics and of all descriptors are read,
+        up to ``concurrency`` at a time. On BlueZ, raise the ``max_in_flight`` of the
+        client too, for the reads to overlap.
+
+        .. code-block:: python
+
+            gatt = await client.dump_gatt(concurrency=8)
+            print(json.dumps(gatt, indent=2))
+
+        Args:
+            read_values (bool): Read the values. Defaults to ``True``.
+            concurrency (int): Reads in flight at a time. Defaults to 4.
+
+        Returns:
+            A snapshot, see :py:mod:`bleak.backends.snapshot`, with the values read,
+            as hexadecimal strings, and the errors of failed reads.
+
+        """
+        services = await self.get_services()
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def _read(entry, read, *args):
+            async with semaphore:
+                try:
+                    entry["value"] = bytes(await read(*args)).hex()
+                except Exception as e:
+                    entry["error"] = "{0}: {1}".format(type(e).__name__, e)
+
+        dump = snapshot_services(services, self.address, self.mtu_size)
+        reads = []
+        if read_values:
+            # The snapshot lists the services and characteristics in order.
+            for service, service_dump in zip(services, dump["services"]):
+                for characteristic, char in zip(
+                    service.characteristics, service_dump["characteristics"]
+                ):
+                    if "read" in char["properties"]:
+                        reads.append(
+                            _read(char, self._read_characteristic, characteristic)
+                        )
+                    for descriptor in char["descriptors"]:
+                        reads.append(
+                            _read(
+                                descriptor,
+                                self.read_gatt_descriptor,
+                                descriptor["handle"],
+                            )
+                        )
+        await asyncio.gather(*reads)
+        return dump
+
+    async def _read_characteristic(
+        self, characteristic: BleakGATTCharacteristic
+    ) -> bytearray:
+        """Read a characteristic of the services, by its UUID unless overridden."""
+        return await self.read_gatt_char(characteristic.uuid)
+
     # I/O methods
 
     @abc.abstractmethod
@@ -153,6 +253,9 @@ class BaseBleakClient(abc.ABC):
     ) -> None:
         """Perform a write operation on the specified GATT characteristic.
 
+        Data longer than fits in one write is split into several writes, or
+        written with a long write, by backends supporting it.
+
         Args:
             _uuid (str or UUID): The uuid of the characteristics to write to.
             data (bytes or bytearray): The data to send.
@@ -191,6 +294,10 @@ class BaseBleakClient(abc.ABC):
             _uuid (str or UUID): The uuid of the characteristics to start notification/indication on.
             callback (function): The function to be called on notification.
 
+        Keyword Args:
+            extended (bool): Call ``callback`` with a :py:class:`NotificationInfo`
+              as third argument. Supported by the BlueZ backend.
+
         """
         raise NotImplementedError()
 
@@ -94,6 +94,9 @@ class BleakScannerCoreBluetooth(BaseBleakScanner):
     def register_detection_callback(self, callback: Callable):
         raise NotImplementedError("This cannot be used in the macOS backend.")
 
+    def register_sink(self, sink):
+        raise NotImplementedError("This cannot be used in the macOS backend.")
+
     # macOS specific methods
 
     @property
@@ -1,6 +1,7 @@
 import logging
 import asyncio
 import pathlib
+import time
 import uuid
 from asyncio.events import AbstractEventLoop
 from functools import wraps
@@ -85,6 +86,18 @@ class BleakScannerDotNet(BaseBleakScanner):
             else:
                 if e.BluetoothAddress not in self._devices:
                     self._devices[e.BluetoothAddress] = e
+            if self._sinks:
+                d = self.parse_eventargs(e)
+                # Received on a .NET thread; hand over to the event loop.
+                self.loop.call_soon_threadsafe(
+                    self._dispatch_to_sinks,
+                    d.address,
+                    d.name,
+                    e.RawSignalStrengthInDBm,
+                    d.metadata["manufacturer_data"],
+                    d.metadata["uuids"],
+                    time.time(),
+                )
         if self._callback is not None:
             self._callback(sender, e)
 
@@ -119,6 +132,7 @@ class BleakScannerDotNet(BaseBleakScanner):
         except Exception as e:
             logger.debug("Could not remove event handlers: {0}...".format(e))
         self.watcher = None
+        self._flush_sinks()
 
     async def set_scanning_filter(self, **kwargs):
         if "SignalStrengthFilter" in kwargs:
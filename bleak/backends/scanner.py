@@ -1,9 +1,15 @@
 import abc
 import asyncio
+import logging
+import time
 from asyncio import AbstractEventLoop
-from typing import Callable, List
+from typing import Callable, List, Optional
 
 from bleak.backends.device import BLEDevice
+from bleak.metrics import Metrics, SCANNER_COUNTERS
+from bleak.utils import loop_kwargs
+
+logger = logging.getLogger(__name__)
 
 
 class BaseBleakScanner(abc.ABC):
@@ -12,10 +18,20 @@ class BaseBleakScanner(abc.ABC):
     Args:
         loop (Event Loop): The event loop to use.
 
+    Keyword Args:
+        tracer (bleak.tracing.Tracer): Tracer of the calls made by this scanner.
+          Defaults to the one installed with :py:func:`bleak.tracing.set_tracer`.
+
+    Attributes:
+        metrics (bleak.metrics.Metrics): Counters of this scanner.
+
     """
 
     def __init__(self, loop: AbstractEventLoop = None, **kwargs):
         self.loop = loop if loop else asyncio.get_event_loop()
+        self._sinks = []
+        self.metrics = Metrics(counters=SCANNER_COUNTERS, histograms=())
+        self.tracer = kwargs.get("tracer")
 
     async def __aenter__(self):
         await self.start()
@@ -29,14 +45,140 @@ class BaseBleakScanner(abc.ABC):
         cls, timeout=5.0, loop: AbstractEventLoop = None, **kwargs
     ) -> List[BLEDevice]:
         async with cls(loop, **kwargs) as scanner:
-            await asyncio.sleep(timeout if timeout > 0.0 else 0.1, loop=loop)
+            await asyncio.sleep(timeout if timeout > 0.0 else 0.1)
             devices = await scanner.get_discovered_devices()
         return devices
 
+    @classmethod
+    async def find_device_by_address(
+        cls, device_identifier: str, timeout: float = 10.0, loop: AbstractEventLoop = None, **kwargs
+    ) -> Optional[BLEDevice]:
+        """A convenience method for obtaining a ``BLEDevice`` object specified by Bluetooth address.
+
+        Args:
+            device_identifier (str): The Bluetooth address of the Bluetooth peripheral.
+            timeout (float): Optional timeout to wait for detection of specified peripheral
+              before giving up. Defaults to 10.0 seconds.
+            loop (Event Loop): The event loop to use.
+
+        Keyword Args:
+            Passed on to the scanner constructor, e.g. ``device`` on the BlueZ backend.
+
+        Returns:
+            The ``BLEDevice`` sought or ``None`` if not detected.
+
+        """
+        device_identifier = device_identifier.lower()
+        return await cls.find_device_by_filter(
+            lambda d: d.address.lower() == device_identifier,
+            timeout=timeout,
+            loop=loop,
+            **kwargs
+        )
+
+    @classmethod
+    async def find_device_by_filter(
+        cls,
+        filterfunc: Callable[[BLEDevice], bool],
+        timeout: float = 10.0,
+        loop: AbstractEventLoop = None,
+        **kwargs
+    ) -> Optional[BLEDevice]:
+        """A convenience method for obtaining a ``BLEDevice`` object specified by a filter function.
+
+        Scanning is stopped as soon as a device matching the filter has been
+        detected, instead of waiting for the entire ``timeout`` as ``discover`` does.
+
+        Args:
+            filterfunc (callable): A function that is called for every detected
+              ``BLEDevice`` and returns ``True`` for the one sought.
+            timeout (float): Optional timeout to wait for detection of specified peripheral
+              before giving up. Defaults to 10.0 seconds.
+            loop (Event Loop): The event loop to use.
+
+        Keyword Args:
+            Passed on to the scanner constructor, e.g. ``device`` on the BlueZ backend.
+
+        Returns:
+            The ``BLEDevice`` sought or ``None`` if not detected.
+
+        """
+        loop = loop if loop else asyncio.get_event_loop()
+        scanner = cls(loop, **kwargs)
+        detected = asyncio.Event(**loop_kwargs(scanner.loop))
+
+        def _detection_callback(*args):
+            # Backends may call this from another thread, e.g. the .NET one.
+            loop.call_soon_threadsafe(detected.set)
+
+        try:
+            scanner.register_detection_callback(_detection_callback)
+            poll_interval = None
+        except NotImplementedError:
+            # No detection callbacks in this backend; fall back to polling.
+            poll_interval = 0.1
+
+        deadline = loop.time() + timeout
+        async with scanner:
+            while True:
+                # Several detections arriving within one loop iteration only
+                # cause a single pass over the discovered devices.
+                detected.clear()
+                for d in await scanner.get_discovered_devices():
+                    if filterfunc(d):
+                        return d
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return None
+                try:
+                    await asyncio.wait_for(
+                        detected.wait(),
+                        min(remaining, poll_interval) if poll_interval else remaining,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
     @abc.abstractmethod
     def register_detection_callback(self, callback: Callable):
         raise NotImplementedError()
 
+    def register_sink(self, sink):
+        """Add a sink that every detection made by this scanner is appended to.
+
+        Args:
+            sink (bleak.sinks.BaseScannerSink): The sink to add.
+
+        """
+        self._sinks.append(sink)
+
+    def remove_sink(self, sink):
+        """Remove a sink previously added by :py:meth:`register_sink`."""
+        self._sinks.remove(sink)
+
+    def _dispatch_to_sinks(
+        self, address, name, rssi, manufacturer_data, uuids, timestamp=None
+    ):
+        """Append a detection to all registered sinks.
+
+        Should not be used by end user, but rather by `bleak` backends.
+        """
+        if not self._sinks:
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        for sink in self._sinks:
+            try:
+                sink.add(timestamp, address, name, rssi, manufacturer_data, uuids)
+            except Exception as e:
+                logger.error("Could not add detection to sink {0}: {1}".format(sink, e))
+
+    def _flush_sinks(self):
+        for sink in self._sinks:
+            try:
+                sink.flush()
+            except Exception as e:
+                logger.error("Could not flush sink {0}: {1}".format(sink, e))
+
     @abc.abstractmethod
     async def start(self):
         raise NotImplementedError()
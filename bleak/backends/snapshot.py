@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+"""
+Portable snapshots of the GATT database of a device.
+
+A snapshot is a dict of plain values, which is the same as JSON or CBOR, holding
+the services, characteristics and descriptors of a device with their handles and,
+optionally, their values. It is described by :py:data:`SCHEMA`.
+
+Snapshots are made from the services of a connected client, or with the values
+read by :py:meth:`bleak.backends.client.BaseBleakClient.dump_gatt`, and loaded
+into a :py:class:`bleak.backends.service.BleakGATTServiceCollection` again
+without a device, or seeded into a
+:py:class:`bleak.backends.bluezdbus.mock.MockBlueZ` device:
+
+.. code-block:: python
+
+    with open("device.json", "wb") as f:
+        f.write(dumps(await client.dump_gatt()))
+
+    with open("device.json", "rb") as f:
+        services = load_services(loads(f.read()))
+
+Handles of services and characteristics are ``None`` on backends not exposing
+them. Descriptors always have one, as they are told apart by it. Values are
+hexadecimal strings, or ``None`` if not read, and ``error`` the message of a
+failed read.
+
+The CBOR encoding requires `cbor2 <https://pypi.org/project/cbor2/>`_, e.g.
+installed by ``pip install bleak[cbor]``.
+
+"""
+import json
+from uuid import UUID
+from typing import List, Union
+
+from bleak.exc import BleakError
+from bleak.uuids import uuidstr_to_str
+from bleak.backends.characteristic import BleakGATTCharacteristic
+from bleak.backends.descriptor import BleakGATTDescriptor
+from bleak.backends.service import BleakGATTService, BleakGATTServiceCollection
+
+#: Version of the snapshot format, stored as ``version`` of every snapshot.
+SNAPSHOT_VERSION = 1
+
+_HANDLE = {"type": ["integer", "null"], "minimum": 1, "maximum": 0xFFFF}
+_DESCRIPTOR_HANDLE = {"type": "integer", "minimum": 1, "maximum": 0xFFFF}
+_VALUE = {"type": ["string", "null"], "pattern": "^([0-9a-f]{2})*$"}
+_ERROR = {"type": ["string", "null"]}
+
+#: JSON Schema of snapshots.
+SCHEMA = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "title": "GATT snapshot",
+    "type": "object",
+    "required": ["version", "services"],
+    "properties": {
+        "version": {"const": SNAPSHOT_VERSION},
+        "address": {"type": ["string", "null"]},
+        "mtu": {"type": ["integer", "null"]},
+        "services": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["uuid", "characteristics"],
+                "properties": {
+                    "uuid": {"type": "string"},
+                    "handle": _HANDLE,
+                    "description": {"type": "string"},
+                    "characteristics": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "required": ["uuid", "properties", "descriptors"],
+                            "properties": {
+                                "uuid": {"type": "string"},
+                                "handle": _HANDLE,
+                                "description": {"type": "string"},
+                                "properties": {
+                                    "type": "array",
+                                    "items": {"type": "string"},
+                                },
+                                "value": _VALUE,
+                                "error": _ERROR,
+                                "descriptors": {
+                                    "type": "array",
+                                    "items": {
+                                        "type": "object",
+                                        "required": ["uuid", "handle"],
+                                        "properties": {
+                                            "uuid": {"type": "string"},
+                                            "handle": _DESCRIPTOR_HANDLE,
+                                            "value": _VALUE,
+                                            "error": _ERROR,
+                                        },
+                                    },
+                                },
+                            },
+                        },
+                    },
+                },
+            },
+        },
+    },
+}
+
+
+def snapshot_services(
+    services: BleakGATTServiceCollection, address: str = None, mtu: int = None
+) -> dict:
+    """Make a snapshot of services, without values.
+
+    Args:
+        services (BleakGATTServiceCollection): The services.
+        address (str): Address of the device.
+        mtu (int): The ATT MTU negotiated with the device.
+
+    Returns:
+        The snapshot.
+
+    """
+    return {
+        "version": SNAPSHOT_VERSION,
+        "address": address,
+        "mtu": mtu,
+        "services": [
+            {
+                "uuid": service.uuid,
+                "handle": getattr(service, "handle", None),
+                "description": service.description,
+                "characteristics": [
+                    {
+                        "uuid": char.uuid,
+                        "handle": getattr(char, "handle", None),
+                        "description": char.description,
+                        "properties": list(char.properties),
+                        "value": None,
+                        "error": None,
+                        "descriptors": [
+                            {
+                                "uuid": descriptor.uuid,
+                                "handle": descriptor.handle,
+                                "value": None,
+                                "error": None,
+                            }
+                            for descriptor in char.descriptors
+                        ],
+                    }
+                    for char in service.characteristics
+                ],
+            }
+            for service in services
+        ],
+    }
+
+
+def load_services(snapshot: dict) -> BleakGATTServiceCollection:
+    """Rebuild the services of a snapshot.
+
+    Args:
+        snapshot (dict): The snapshot.
+
+    Returns:
+        A :py:class:`bleak.backends.service.BleakGATTServiceCollection` of
+        :py:class:`BleakGATTServiceSnapshot` objects.
+
+    Raises:
+        BleakError: If the snapshot is of another version, or a descriptor has no
+          handle.
+
+    """
+    version = snapshot.get("version")
+    if version != SNAPSHOT_VERSION:
+        raise BleakError("Unsupported GATT snapshot version {0}".format(version))
+    services = BleakGATTServiceCollection()
+    for s in snapshot["services"]:
+        service = BleakGATTServiceSnapshot(s)
+        services.add_service(service)
+        for c in s["characteristics"]:
+            services.add_characteristic(
+                BleakGATTCharacteristicSnapshot(c, service.uuid)
+            )
+            for d in c["descriptors"]:
+                if d.get("handle") is None:
+                    raise BleakError(
+                        "Descriptor {0} of {1} has no handle".format(
+                            d["uuid"], c["uuid"]
+                        )
+                    )
+                services.add_descriptor(BleakGATTDescriptorSnapshot(d, c["uuid"]))
+    return services
+
+
+def dumps(snapshot: dict, format: str = "json") -> bytes:
+    """Encode a snapshot.
+
+    Args:
+        snapshot (dict): The snapshot.
+        format (str): ``"json"`` or ``"cbor"``. Defaults to ``"json"``.
+
+    Returns:
+        The encoded snapshot.
+
+    """
+    if format == "json":
+        return json.dumps(snapshot, indent=2).encode()
+    elif format == "cbor":
+        import cbor2
+
+        return cbor2.dumps(snapshot)
+    raise ValueError("Unknown snapshot format {0!r}".format(format))
+
+
+def loads(data: bytes) -> dict:
+    """Decode a snapshot encoded as JSON or CBOR by :py:func:`dumps`."""
+    data = bytes(data)
+    if data.lstrip()[:1] == b"{":
+        return json.loads(data.decode())
+    import cbor2
+
+    return cbor2.loads(data)
+
+
+class BleakGATTServiceSnapshot(BleakGATTService):
+    """GATT Service loaded from a snapshot"""
+
+    def __init__(self, obj: dict):
+        super().__init__(obj)
+        self.__characteristics = []
+
+    @property
+    def uuid(self) -> str:
+        """The UUID to this service"""
+        return self.obj["uuid"]
+
+    @property
+    def handle(self) -> Union[int, None]:
+        """Handle of the service declaration"""
+        return self.obj.get("handle")
+
+    @property
+    def characteristics(self) -> List["BleakGATTCharacteristicSnapshot"]:
+        """List of characteristics for this service"""
+        return self.__characteristics
+
+    def add_characteristic(self, characteristic: "BleakGATTCharacteristicSnapshot"):
+        """Add a :py:class:`~BleakGATTCharacteristicSnapshot` to the service.
+
+        Should not be used by end user, but rather by `bleak` itself.
+        """
+        self.__characteristics.append(characteristic)
+
+    def get_characteristic(
+        self, _uuid: Union[str, UUID]
+    ) -> Union["BleakGATTCharacteristicSnapshot", None]:
+        """Get a characteristic by UUID"""
+        for characteristic in self.__characteristics:
+            if characteristic.uuid == str(_uuid):
+                return characteristic
+        return None
+
+
+class BleakGATTCharacteristicSnapshot(BleakGATTCharacteristic):
+    """GATT Characteristic loaded from a snapshot"""
+
+    def __init__(self, obj: dict, service_uuid: str):
+        super().__init__(obj)
+        self.__descriptors = []
+        self.__service_uuid = service_uuid
+
+    @property
+    def service_uuid(self) -> str:
+        """The uuid of the Service containing this characteristic"""
+        return self.__service_uuid
+
+    @property
+    def uuid(self) -> str:
+        """The uuid of this characteristic"""
+        return self.obj["uuid"]
+
+    @property
+    def handle(self) -> Union[int, None]:
+        """Handle of the characteristic declaration"""
+        return self.obj.get("handle")
+
+    @property
+    def description(self) -> str:
+        """Description for this characteristic"""
+        return self.obj.get("description") or uuidstr_to_str(self.uuid)
+
+    @property
+    def properties(self) -> List[str]:
+        """Properties of this characteristic"""
+        return self.obj["properties"]
+
+    @property
+    def value(self) -> Union[bytes, None]:
+        """The value in the snapshot, if it was read"""
+        value = self.obj.get("value")
+        return bytes.fromhex(value) if value is not None else None
+
+    @property
+    def descriptors(self) -> List["BleakGATTDescriptorSnapshot"]:
+        """List of descriptors for this characteristic"""
+        return self.__descriptors
+
+    def get_descriptor(
+        self, _uuid: Union[str, UUID]
+    ) -> Union["BleakGATTDescriptorSnapshot", None]:
+        """Get a descriptor by UUID"""
+        for descriptor in self.__descriptors:
+            if descriptor.uuid == str(_uuid):
+                return descriptor
+        return None
+
+    def add_descriptor(self, descriptor: "BleakGATTDescriptorSnapshot"):
+        """Add a :py:class:`~BleakGATTDescriptorSnapshot` to the characteristic.
+
+        Should not be used by end user, but rather by `bleak` itself.
+        """
+        self.__descriptors.append(descriptor)
+
+
+class BleakGATTDescriptorSnapshot(BleakGATTDescriptor):
+    """GATT Descriptor loaded from a snapshot"""
+
+    def __init__(self, obj: dict, characteristic_uuid: str):
+        super().__init__(obj)
+        self.__characteristic_uuid = characteristic_uuid
+
+    @property
+    def characteristic_uuid(self) -> str:
+        """UUID for the characteristic that this descriptor belongs to"""
+        return self.__characteristic_uuid
+
+    @property
+    def uuid(self) -> str:
+        """UUID for this descriptor"""
+        return self.obj["uuid"]
+
+    @property
+    def handle(self) -> int:
+        """Integer handle for this descriptor"""
+        return self.obj["handle"]
+
+    @property
+    def value(self) -> Union[bytes, None]:
+        """The value in the snapshot, if it was read"""
+        value = self.obj.get("value")
+        return bytes.fromhex(value) if value is not None else None
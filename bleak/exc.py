@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import asyncio
 
 
 class BleakError(Exception):
@@ -11,3 +12,41 @@ class BleakDotNetTaskError(BleakError):
     """Wrapped exception that occurred in .NET async Task."""
 
     pass
+
+
+class BleakDBusError(BleakError):
+    """Error returned by a D-Bus method call.
+
+    Args:
+        dbus_error (str): The D-Bus error name, e.g. ``org.bluez.Error.Failed``.
+        error_body (str): The error message, if any.
+
+    """
+
+    def __init__(self, dbus_error: str, error_body: str = None):
+        super(BleakDBusError, self).__init__(
+            "{0}: {1}".format(dbus_error, error_body) if error_body else dbus_error
+        )
+        self.dbus_error = dbus_error
+        self.error_body = error_body
+
+
+class BleakTimeoutError(BleakError, asyncio.TimeoutError):
+    """A client operation did not complete in time.
+
+    Args:
+        operation (str): The operation, e.g. ``read_gatt_char``.
+        phase (str): What the operation was doing when it timed out: ``"queue"``,
+          waiting for its turn, ``"call"``, waiting for BlueZ to reply, or
+          ``"retry"``, waiting to retry.
+        timeout (float): The timeout, in seconds.
+
+    """
+
+    def __init__(self, operation: str, phase: str, timeout: float):
+        super(BleakTimeoutError, self).__init__(
+            "{0} timed out after {1} s in phase {2}".format(operation, timeout, phase)
+        )
+        self.operation = operation
+        self.phase = phase
+        self.timeout = timeout
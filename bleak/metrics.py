@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+Performance metrics of clients and scanners.
+
+Every client and scanner has a :py:class:`Metrics` object as its ``metrics`` attribute,
+counting e.g. D-Bus calls by method, reads, writes, notifications, bytes in and out and
+errors by type, and keeping latency histograms of connecting, service discovery, reads
+and writes. They are updated at the cost of a few dictionary operations, whether
+logging is enabled or not, and can be read as a dict or in the Prometheus text format:
+
+.. code-block:: python
+
+    async with BleakClient(address) as client:
+        await client.read_gatt_char(MODEL_NBR_UUID)
+        print(client.metrics.as_dict()["counters"]["dbus_calls"])
+        print(client.metrics.to_prometheus(labels={"address": address}))
+
+Currently only the BlueZ backend updates the metrics.
+
+"""
+import bisect
+import re
+import time
+from typing import Dict, Iterable
+
+#: Default histogram bucket upper bounds, in seconds.
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+#: Counters of clients; ``dbus_calls`` is by method and ``errors`` by type.
+CLIENT_COUNTERS = (
+    "dbus_calls",
+    "reads",
+    "writes",
+    "notifications",
+    "bytes_in",
+    "bytes_out",
+    "errors",
+    "reconnects",
+    "retries",
+)
+#: Latency histograms of clients; ``ReadValue`` and ``WriteValue`` are the D-Bus calls,
+#: ``downtime`` is the time a client reconnecting automatically was disconnected and
+#: ``queue_wait`` the time GATT operations waited for their turn.
+CLIENT_HISTOGRAMS = (
+    "connect",
+    "get_services",
+    "ReadValue",
+    "WriteValue",
+    "downtime",
+    "queue_wait",
+)
+
+#: Counters of scanners.
+SCANNER_COUNTERS = ("dbus_calls", "detections", "errors")
+
+_LABEL_NAMES = {"dbus_calls": "method", "errors": "type"}
+
+
+class Histogram(object):
+    """Counts of observed values in buckets, as a Prometheus histogram.
+
+    Args:
+        buckets (iterable): Upper bounds of the buckets. A bucket for values
+          larger than all bounds is always added.
+
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self) -> Dict[float, int]:
+        """Number of observations less than or equal to each upper bound."""
+        out = {}
+        total = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            total += n
+            out[bound] = total
+        return out
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": self.cumulative_counts(),
+        }
+
+
+class _Timer(object):
+    def __init__(self, histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+class Metrics(object):
+    """Counters and latency histograms.
+
+    Counters are either plain numbers or, for counters with labels like
+    ``dbus_calls``, dicts from label to number.
+
+    Args:
+        counters (iterable): Names of counters to start at zero.
+        histograms (iterable): Names of latency histograms.
+        buckets (iterable): Bucket upper bounds of the histograms, in seconds.
+
+    """
+
+    def __init__(
+        self,
+        counters: Iterable[str] = CLIENT_COUNTERS,
+        histograms: Iterable[str] = CLIENT_HISTOGRAMS,
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        self._counter_names = tuple(counters)
+        self._histogram_names = tuple(histograms)
+        self._buckets = tuple(buckets)
+        self.reset()
+
+    def reset(self) -> None:
+        """Set all counters and histograms to zero."""
+        self.counters = {
+            name: {} if name in _LABEL_NAMES else 0 for name in self._counter_names
+        }
+        self.histograms = {
+            name: Histogram(self._buckets) for name in self._histogram_names
+        }
+
+    def inc(self, name: str, amount: int = 1, label: str = None) -> None:
+        """Increment a counter.
+
+        Args:
+            name (str): Name of the counter.
+            amount (int): Amount to add.
+            label (str): Label, e.g. method name, for counters with labels.
+
+        """
+        if label is None:
+            self.counters[name] = self.counters.get(name, 0) + amount
+        else:
+            counter = self.counters.setdefault(name, {})
+            counter[label] = counter.get(label, 0) + amount
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Add a latency to a histogram."""
+        self.histograms[name].observe(seconds)
+
+    def timer(self, name: str) -> _Timer:
+        """Context manager adding its duration to a histogram."""
+        return _Timer(self.histograms[name])
+
+    def as_dict(self) -> dict:
+        return {
+            "counters": {
+                k: dict(v) if isinstance(v, dict) else v
+                for k, v in self.counters.items()
+            },
+            "histograms": {k: v.as_dict() for k, v in self.histograms.items()},
+        }
+
+    def to_prometheus(self, prefix: str = "bleak", labels: dict = None) -> str:
+        """Render the metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix (str): Prefix of all metric names.
+            labels (dict): Labels added to all samples, e.g. the device address.
+
+        Returns:
+            The metrics, one sample per line.
+
+        """
+        labels = labels or {}
+        lines = []
+        for name, value in self.counters.items():
+            metric = "{0}_{1}_total".format(prefix, _snake_case(name))
+            lines.append("# TYPE {0} counter".format(metric))
+            if isinstance(value, dict):
+                label_name = _LABEL_NAMES.get(name, "label")
+                for label, n in sorted(value.items()):
+                    lines.append(
+                        "{0}{1} {2}".format(
+                            metric, _labels(labels, **{label_name: label}), n
+                        )
+                    )
+            else:
+                lines.append("{0}{1} {2}".format(metric, _labels(labels), value))
+        for name, histogram in self.histograms.items():
+            metric = "{0}_{1}_seconds".format(prefix, _snake_case(name))
+            lines.append("# TYPE {0} histogram".format(metric))
+            for bound, n in histogram.cumulative_counts().items():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(
+                    "{0}_bucket{1} {2}".format(metric, _labels(labels, le=le), n)
+                )
+            lines.append(
+                "{0}_sum{1} {2!r}".format(metric, _labels(labels), histogram.sum)
+            )
+            lines.append(
+                "{0}_count{1} {2}".format(metric, _labels(labels), histogram.count)
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _snake_case(name):
+    return re.sub("(?<=[a-z0-9])([A-Z])", r"_\1", name).lower()
+
+
+def _labels(labels, **extra):
+    items = list(labels.items()) + list(extra.items())
+    if not items:
+        return ""
+    return "{{{0}}}".format(
+        ",".join(
+            '{0}="{1}"'.format(
+                k,
+                str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+            )
+            for k, v in items
+        )
+    )
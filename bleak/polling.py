@@ -0,0 +1,382 @@
+# -*- coding: utf-8 -*-
+"""
+Periodic reading of characteristics of many devices.
+
+A :py:class:`Poller` reads characteristics of a fleet of devices at fixed
+intervals. Every job, a characteristic of a device read every ``interval``
+seconds, is due at fixed times from when polling starts, so that the schedule
+does not drift however long the reads take. The jobs of a device are due at the
+same times when they have the same interval, and the devices are spread at
+random over the interval, so that they do not all connect at once. The jobs of a
+device due together are read over one connection, taken from a
+:py:class:`ConnectionPool` which keeps the connections to the devices most
+recently polled open for reuse:
+
+.. code-block:: python
+
+    def on_value(job, data):
+        print(job.address, job.characteristic, data)
+
+    poller = Poller(max_connections=5)
+    for address in addresses:
+        poller.add_job(address, TEMPERATURE_UUID, 60.0, on_value)
+        poller.add_job(address, BATTERY_LEVEL_UUID, 600.0, on_value)
+    await poller.start()
+    ...
+    await poller.stop()
+    print(poller.report())
+
+The report has the lateness of the reads of every job, i.e. how long after it
+was due a read started, as a histogram, and the reads per second of the poller.
+
+"""
+import asyncio
+import logging
+import random
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, List
+
+from bleak.exc import BleakError
+from bleak.metrics import DEFAULT_BUCKETS, Histogram
+from bleak.utils import loop_kwargs
+
+logger = logging.getLogger(__name__)
+
+
+class PollJob(object):
+    """A characteristic of a device read at a fixed interval.
+
+    Args:
+        address (str): Address of the device.
+        characteristic (str): UUID of the characteristic.
+        interval (float): Seconds between reads.
+        callback (callable): Called with the job and the value read.
+        buckets (iterable): Bucket upper bounds of the lateness histogram.
+
+    Attributes:
+        next_due (float): Event loop time the next read is due.
+        reads (int): Successful reads.
+        errors (int): Failed reads.
+        skipped (int): Reads skipped, because the previous one finished after
+          the next was due already.
+        lateness (bleak.metrics.Histogram): Seconds from when reads were due
+          until they started.
+
+    """
+
+    def __init__(
+        self,
+        address: str,
+        characteristic: str,
+        interval: float,
+        callback: Callable[["PollJob", bytearray], Any] = None,
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.address = address
+        self.characteristic = characteristic
+        self.interval = interval
+        self.callback = callback
+        self.next_due = None
+        self.reads = 0
+        self.errors = 0
+        self.skipped = 0
+        self.lateness = Histogram(buckets)
+
+    def __repr__(self):
+        return "PollJob({0!r}, {1!r}, {2})".format(
+            self.address, self.characteristic, self.interval
+        )
+
+    def advance(self, now: float) -> None:
+        """Make the job due at its next time after ``now``."""
+        self.next_due += self.interval
+        while self.next_due <= now:
+            self.next_due += self.interval
+            self.skipped += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "address": self.address,
+            "characteristic": self.characteristic,
+            "interval": self.interval,
+            "reads": self.reads,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "lateness": self.lateness.as_dict(),
+        }
+
+
+class ConnectionPool(object):
+    """Connected clients, reused while there is room for them.
+
+    At most ``max_connections`` clients are connected at a time. Connecting to
+    another device disconnects the client least recently released, so that the
+    devices polled most often stay connected. Clients left idle for longer than
+    ``idle_timeout`` are disconnected the next time a client is acquired.
+
+    Args:
+        loop (asyncio.events.AbstractEventLoop): The event loop to use.
+        max_connections (int): Clients connected at a time. Defaults to 5.
+        idle_timeout (float): Seconds an idle client is kept connected. ``None``
+          keeps it until room is needed. Defaults to 30.
+        client_factory (callable): Called with an address, ``loop`` and
+          ``client_kwargs`` to create a client. Defaults to
+          :py:class:`bleak.BleakClient`.
+        client_kwargs (dict): Keyword arguments of the clients.
+
+    Attributes:
+        connects (int): Connections made.
+        reuses (int): Connections reused.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop = None,
+        max_connections: int = 5,
+        idle_timeout: float = 30.0,
+        client_factory: Callable = None,
+        client_kwargs: dict = None,
+    ):
+        if client_factory is None:
+            from bleak import BleakClient as client_factory
+        self.loop = loop if loop else asyncio.get_event_loop()
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.client_factory = client_factory
+        self.client_kwargs = client_kwargs or {}
+        self.connects = 0
+        self.reuses = 0
+        # Idle clients and when they were released, least recently released first.
+        self._idle = OrderedDict()
+        self._in_use = {}
+
+    def __len__(self):
+        return len(self._idle) + len(self._in_use)
+
+    async def acquire(self, address: str):
+        """Get a connected client of a device, connecting if need be.
+
+        Raises:
+            BleakError: If all clients are in use, or connecting failed.
+
+        """
+        if address in self._in_use:
+            raise BleakError("Client of {0} is already in use".format(address))
+        await self._expire()
+        client, _ = self._idle.pop(address, (None, None))
+        if client is not None:
+            if await client.is_connected():
+                self._in_use[address] = client
+                self.reuses += 1
+                return client
+            await self._disconnect(client)
+
+        while len(self) >= self.max_connections:
+            if not self._idle:
+                raise BleakError("All {0} connections in use".format(len(self)))
+            _, (lru, _) = self._idle.popitem(last=False)
+            await self._disconnect(lru)
+
+        client = self.client_factory(address, loop=self.loop, **self.client_kwargs)
+        self._in_use[address] = client
+        try:
+            await client.connect()
+        except BaseException:
+            del self._in_use[address]
+            await self._disconnect(client)
+            raise
+        self.connects += 1
+        return client
+
+    async def release(self, address: str, discard: bool = False) -> None:
+        """Give a client back, disconnecting it if ``discard``."""
+        client = self._in_use.pop(address)
+        if discard:
+            await self._disconnect(client)
+        else:
+            self._idle[address] = (client, self.loop.time())
+
+    async def close(self) -> None:
+        """Disconnect all idle clients."""
+        while self._idle:
+            _, (client, _) = self._idle.popitem()
+            await self._disconnect(client)
+
+    async def _expire(self) -> None:
+        if self.idle_timeout is None:
+            return
+        deadline = self.loop.time() - self.idle_timeout
+        while self._idle:
+            address, (client, released) = next(iter(self._idle.items()))
+            if released > deadline:
+                break
+            del self._idle[address]
+            await self._disconnect(client)
+
+    async def _disconnect(self, client) -> None:
+        try:
+            await client.disconnect()
+        except Exception as e:
+            logger.debug("Disconnecting {0} failed: {1}".format(client.address, e))
+
+
+class Poller(object):
+    """Reads characteristics of many devices at fixed intervals.
+
+    Args:
+        loop (asyncio.events.AbstractEventLoop): The event loop to use.
+        max_connections (int): Devices connected at a time. Defaults to 5.
+        idle_timeout (float): Seconds a connection is kept open between reads, see
+          :py:class:`ConnectionPool`. Defaults to 30.
+        window (float): Seconds a job may be read ahead of time, to be read over
+          the same connection as other jobs of its device, up to a quarter of
+          its interval. Defaults to 0.5.
+        spread (bool): Spread the devices at random over their shortest
+          interval. If ``False``, all jobs are first due when polling starts.
+        client_factory (callable): Creates the clients, see
+          :py:class:`ConnectionPool`.
+        client_kwargs (dict): Keyword arguments of the clients.
+
+    Attributes:
+        jobs (list): The :py:class:`PollJob` of the poller.
+        pool (ConnectionPool): The connections to the devices.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop = None,
+        max_connections: int = 5,
+        idle_timeout: float = 30.0,
+        window: float = 0.5,
+        spread: bool = True,
+        client_factory: Callable = None,
+        client_kwargs: dict = None,
+    ):
+        self.loop = loop if loop else asyncio.get_event_loop()
+        self.window = window
+        self.spread = spread
+        self.jobs = []
+        self.pool = ConnectionPool(
+            self.loop, max_connections, idle_timeout, client_factory, client_kwargs
+        )
+        self._slots = asyncio.Semaphore(max_connections, **loop_kwargs(self.loop))
+        self._workers = []
+        self._started = None
+        self._stopped = None
+
+    def add_job(
+        self,
+        address: str,
+        characteristic: str,
+        interval: float,
+        callback: Callable[[PollJob, bytearray], Any] = None,
+    ) -> PollJob:
+        """Add a characteristic to read every ``interval`` seconds.
+
+        Jobs are added before starting the poller.
+
+        Returns:
+            The :py:class:`PollJob`.
+
+        """
+        if self._workers:
+            raise BleakError("Jobs cannot be added while polling")
+        job = PollJob(address, str(characteristic), interval, callback)
+        self.jobs.append(job)
+        return job
+
+    async def start(self) -> None:
+        """Start polling."""
+        if self._workers:
+            return
+        devices = OrderedDict()
+        for job in self.jobs:
+            devices.setdefault(job.address.upper(), []).append(job)
+
+        self._started = self.loop.time()
+        self._stopped = None
+        for address, jobs in devices.items():
+            offset = 0.0
+            if self.spread:
+                offset = random.uniform(0.0, min(j.interval for j in jobs))
+            for job in jobs:
+                job.next_due = self._started + offset
+            self._workers.append(self.loop.create_task(self._poll(address, jobs)))
+
+    async def stop(self) -> None:
+        """Stop polling and disconnect from all devices."""
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        if workers:
+            await asyncio.wait(workers)
+        await self.pool.close()
+        if self._started is not None:
+            self._stopped = self.loop.time()
+
+    def report(self) -> dict:
+        """Reads, errors and lateness of all jobs, and reads per second."""
+        reads = sum(j.reads for j in self.jobs)
+        end = self._stopped if self._stopped is not None else self.loop.time()
+        elapsed = end - self._started if self._started is not None else 0.0
+        return {
+            "reads": reads,
+            "errors": sum(j.errors for j in self.jobs),
+            "skipped": sum(j.skipped for j in self.jobs),
+            "reads_per_sec": reads / elapsed if elapsed > 0 else 0.0,
+            "connects": self.pool.connects,
+            "reuses": self.pool.reuses,
+            "jobs": [j.as_dict() for j in self.jobs],
+        }
+
+    async def _poll(self, address: str, jobs: List[PollJob]) -> None:
+        while True:
+            due = min(j.next_due for j in jobs)
+            delay = due - self.loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with self._slots:
+                await self._visit(address, jobs)
+
+    async def _visit(self, address: str, jobs: List[PollJob]) -> None:
+        """Read all jobs of a device due now, over one connection."""
+        now = self.loop.time()
+        due = [
+            j for j in jobs if j.next_due <= now + min(self.window, j.interval / 4)
+        ]
+        try:
+            client = await self.pool.acquire(address)
+        except (BleakError, asyncio.TimeoutError) as e:
+            logger.debug("Connecting to {0} failed: {1}".format(address, e))
+            now = self.loop.time()
+            for job in due:
+                job.errors += 1
+                job.advance(now)
+            return
+
+        discard = False
+        try:
+            for job in due:
+                lateness = max(0.0, self.loop.time() - job.next_due)
+                try:
+                    value = await client.read_gatt_char(job.characteristic)
+                except (BleakError, asyncio.TimeoutError) as e:
+                    logger.debug("Reading {0} failed: {1}".format(job, e))
+                    job.lateness.observe(lateness)
+                    job.errors += 1
+                    discard = True
+                else:
+                    job.lateness.observe(lateness)
+                    job.reads += 1
+                    if job.callback is not None:
+                        try:
+                            job.callback(job, value)
+                        except Exception:
+                            logger.exception("Error in callback of {0}".format(job))
+                job.advance(self.loop.time())
+        finally:
+            await self.pool.release(address, discard)
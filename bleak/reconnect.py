@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Automatic reconnection of clients.
+
+A client created with a ``reconnect`` keyword argument is supervised: when the
+peripheral drops the connection, the client connects again by itself, waiting
+between attempts according to a :py:class:`Backoff`, instead of freeing its
+resources. The services already discovered are kept, and notifications on all
+the characteristics the client was subscribed to are started again at once, so
+the callbacks given to ``start_notify`` keep receiving data after the link is back.
+
+Every disconnection is recorded as an :py:class:`Incident`, with the time the
+peripheral was unreachable:
+
+.. code-block:: python
+
+    def on_incident(client, incident):
+        print("{0} was down for {1:.1f} s".format(client.address, incident.downtime))
+
+    client = BleakClient(address, reconnect=Backoff(initial=0.5, maximum=30.0))
+    client.set_incident_callback(on_incident)
+    await client.connect()
+    await client.start_notify(CHAR_UUID, callback)
+
+Currently only the BlueZ backend supports reconnecting.
+
+"""
+import random
+from collections import namedtuple
+from typing import Iterator
+
+Incident = namedtuple(
+    "Incident",
+    ["disconnected_at", "downtime", "attempts", "restored", "reconnected", "error"],
+)
+Incident.__doc__ = """A disconnection of a supervised client.
+
+Attributes:
+    disconnected_at (float): Event loop time of the disconnection.
+    downtime (float): Seconds until the client was connected again, with its
+      notifications restored, or until it gave up.
+    attempts (int): Connection attempts made.
+    restored (int): Notifications started again.
+    reconnected (bool): If the client is connected again.
+    error (Exception): Error of the last failed attempt, or ``None``.
+
+"""
+
+
+class Backoff(object):
+    """Jittered exponential backoff between reconnection attempts.
+
+    The n:th attempt is made after ``min(maximum, initial * factor ** n)`` seconds,
+    shortened by a random fraction of up to ``jitter`` of it, so that many clients
+    losing their peripherals at the same time do not all retry in step.
+
+    Args:
+        initial (float): Delay before the first attempt, in seconds.
+        maximum (float): Longest delay between attempts, in seconds.
+        factor (float): Growth of the delay from one attempt to the next.
+        jitter (float): Largest fraction, from 0 to 1, taken off a delay at random.
+        max_attempts (int): Attempts made before giving up. ``None`` never gives up.
+        timeout (float): Seconds a ``Connect`` call of an attempt may take before
+          the attempt fails. ``None`` waits as long as BlueZ does.
+
+    """
+
+    def __init__(
+        self,
+        initial: float = 0.5,
+        maximum: float = 30.0,
+        factor: float = 2.0,
+        jitter: float = 0.5,
+        max_attempts: int = None,
+        timeout: float = 20.0,
+    ):
+        if not 0.0 <= jitter <= 1.0:
+            raise ValueError("jitter must be between 0 and 1")
+        self.initial = initial
+        self.maximum = maximum
+        self.factor = factor
+        self.jitter = jitter
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+
+    def __repr__(self):
+        return (
+            "Backoff(initial={0}, maximum={1}, factor={2}, jitter={3}, "
+            "max_attempts={4}, timeout={5})".format(
+                self.initial,
+                self.maximum,
+                self.factor,
+                self.jitter,
+                self.max_attempts,
+                self.timeout,
+            )
+        )
+
+    def delays(self) -> Iterator[float]:
+        """Delays before each attempt, in seconds."""
+        delay = self.initial
+        n = 0
+        while self.max_attempts is None or n < self.max_attempts:
+            yield delay * (1.0 - self.jitter * random.random())
+            delay = min(self.maximum, delay * self.factor)
+            n += 1
@@ -0,0 +1,512 @@
+# -*- coding: utf-8 -*-
+"""
+A scan cache daemon, sharing one continuous scan with many processes.
+
+Every process scanning on its own fights over the discovery state of BlueZ, and
+waits for devices to be detected again when it starts. ``bleak-scand`` runs one
+:py:class:`ScanDaemon` instead, which scans all the time and keeps the last
+detection of every device. Processes use a :py:class:`CachedScanner`, which gets
+the devices detected within the last ``max_age`` seconds from the daemon as soon
+as it starts, and the detections made afterwards as the daemon makes them::
+
+    bleak-scand -i hci0 --socket /run/bleak-scand.sock
+
+.. code-block:: python
+
+    async with CachedScanner(path="/run/bleak-scand.sock", max_age=10.0) as scanner:
+        devices = await scanner.get_discovered_devices()
+
+    device = await CachedScanner.find_device_by_address(address, timeout=5.0)
+
+The socket path defaults to the ``BLEAK_SCAND_SOCKET`` environment variable, or
+``/tmp/bleak-scand.sock``.
+
+The daemon and its clients talk over a Unix domain socket in frames of a one
+byte kind and a four byte big-endian payload length, followed by the payload.
+Clients send ``QUERY``, with the maximum age in seconds as a big-endian double,
+answered by ``DEVICES``, and ``SUBSCRIBE``, after which ``DETECTIONS`` are sent
+at most every ``interval`` seconds. Both carry detection records of:
+
+* the address as 6 bytes,
+* the ``time.time()`` of the detection as big-endian double,
+* the RSSI as big-endian signed 16-bit integer, -32768 if not available,
+* the name as one byte length and UTF-8 bytes,
+* the number of manufacturer data entries as one byte, each of a big-endian
+  16-bit manufacturer id, 16-bit length and the data,
+* the number of service UUIDs as one byte, each as 16 bytes.
+
+Subscribers reading too slowly miss detections instead of holding up the daemon.
+
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import struct
+import sys
+import time
+import uuid
+from typing import Callable, List
+
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import BaseBleakScanner
+from bleak.exc import BleakError
+from bleak.sinks import BaseScannerSink
+from bleak.utils import mac_int_2_str, mac_str_2_int
+
+logger = logging.getLogger(__name__)
+
+#: Socket of the daemon, unless given one.
+DEFAULT_SOCKET_PATH = os.environ.get("BLEAK_SCAND_SOCKET", "/tmp/bleak-scand.sock")
+
+# Frame kinds, requests from clients and messages from the daemon.
+QUERY = 0x01
+SUBSCRIBE = 0x02
+DEVICES = 0x81
+DETECTIONS = 0x82
+
+_HEADER = struct.Struct(">BI")
+_QUERY = struct.Struct(">d")
+_RECORD = struct.Struct(">6sdhB")
+_MANUFACTURER = struct.Struct(">HH")
+_RSSI_UNAVAILABLE = -32768
+# Bytes waiting to be sent to a subscriber before its detections are dropped.
+_MAX_BUFFERED = 1024 * 1024
+
+
+def pack_detection(timestamp, address, name, rssi, manufacturer_data, uuids) -> bytes:
+    """Encode a detection as record of the protocol of the daemon."""
+    name = (name or "").encode()[:255]
+    parts = [
+        _RECORD.pack(
+            mac_str_2_int(address).to_bytes(6, "big"),
+            timestamp,
+            _RSSI_UNAVAILABLE if rssi is None else rssi,
+            len(name),
+        ),
+        name,
+    ]
+    items = list(manufacturer_data.items())[:255]
+    parts.append(bytes([len(items)]))
+    for manufacturer_id, data in items:
+        data = bytes(data)
+        parts.append(_MANUFACTURER.pack(manufacturer_id, len(data)))
+        parts.append(data)
+    uuids = list(uuids)[:255]
+    parts.append(bytes([len(uuids)]))
+    parts.extend(uuid.UUID(u).bytes for u in uuids)
+    return b"".join(parts)
+
+
+def unpack_detections(data: bytes) -> List[tuple]:
+    """Decode the records of a ``DEVICES`` or ``DETECTIONS`` message.
+
+    Returns:
+        Tuples of timestamp, address, name, RSSI, manufacturer data and UUIDs, the
+        arguments of :py:meth:`bleak.sinks.BaseScannerSink.add`.
+
+    """
+    detections = []
+    offset = 0
+    while offset < len(data):
+        address, timestamp, rssi, length = _RECORD.unpack_from(data, offset)
+        offset += _RECORD.size
+        name = data[offset : offset + length].decode(errors="replace")
+        offset += length
+        manufacturer_data = {}
+        count = data[offset]
+        offset += 1
+        for _ in range(count):
+            manufacturer_id, length = _MANUFACTURER.unpack_from(data, offset)
+            offset += _MANUFACTURER.size
+            manufacturer_data[manufacturer_id] = data[offset : offset + length]
+            offset += length
+        uuids = []
+        count = data[offset]
+        offset += 1
+        for _ in range(count):
+            uuids.append(str(uuid.UUID(bytes=data[offset : offset + 16])))
+            offset += 16
+        detections.append(
+            (
+                timestamp,
+                mac_int_2_str(int.from_bytes(address, "big")),
+                name or None,
+                None if rssi == _RSSI_UNAVAILABLE else rssi,
+                manufacturer_data,
+                uuids,
+            )
+        )
+    return detections
+
+
+def _frame(kind: int, payload: bytes = b"") -> bytes:
+    return _HEADER.pack(kind, len(payload)) + payload
+
+
+class _FramedProtocol(asyncio.Protocol):
+    """Splits the received stream into frames."""
+
+    def __init__(self):
+        self.transport = None
+        self._buffer = bytearray()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self._buffer.extend(data)
+        while len(self._buffer) >= _HEADER.size:
+            kind, length = _HEADER.unpack_from(self._buffer)
+            end = _HEADER.size + length
+            if len(self._buffer) < end:
+                break
+            payload = bytes(self._buffer[_HEADER.size : end])
+            del self._buffer[:end]
+            self.frame_received(kind, payload)
+
+    def frame_received(self, kind: int, payload: bytes) -> None:
+        raise NotImplementedError()
+
+    def send(self, kind: int, payload: bytes = b"") -> None:
+        self.transport.write(_frame(kind, payload))
+
+
+class _DaemonConnection(_FramedProtocol):
+    def __init__(self, daemon):
+        super(_DaemonConnection, self).__init__()
+        self.daemon = daemon
+
+    def frame_received(self, kind, payload):
+        if kind == QUERY:
+            (max_age,) = _QUERY.unpack(payload)
+            self.send(DEVICES, self.daemon._query(max_age))
+        elif kind == SUBSCRIBE:
+            self.daemon._subscribers.add(self)
+        else:
+            logger.warning("Unknown request {0:#x}".format(kind))
+            self.transport.close()
+
+    def connection_lost(self, exc):
+        self.daemon._subscribers.discard(self)
+
+
+class _DaemonSink(BaseScannerSink):
+    def __init__(self, daemon):
+        self.daemon = daemon
+
+    def add(self, timestamp, address, name, rssi, manufacturer_data, uuids) -> None:
+        self.daemon._on_detection(
+            timestamp, address, name, rssi, manufacturer_data, uuids
+        )
+
+
+class ScanDaemon(object):
+    """Scans continuously and serves the detections to clients on a Unix socket.
+
+    Args:
+        path (str): Path of the socket. Defaults to ``DEFAULT_SOCKET_PATH``.
+        loop (asyncio.AbstractEventLoop): The event loop to use.
+        retention (float): Seconds devices are kept after their last detection.
+          Defaults to 300.0.
+        interval (float): Seconds detections are batched for subscribers.
+          Defaults to 0.05.
+        scanner_factory (callable): Creates the scanner from ``loop`` and
+          ``scanner_kwargs``. Defaults to :py:class:`bleak.BleakScanner`.
+        scanner_kwargs (dict): Keyword arguments of the scanner, e.g. ``device``
+          and ``filters``.
+
+    Attributes:
+        dropped (int): Batches of detections not sent to slow subscribers.
+
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        loop: asyncio.AbstractEventLoop = None,
+        retention: float = 300.0,
+        interval: float = 0.05,
+        scanner_factory: Callable = None,
+        scanner_kwargs: dict = None,
+    ):
+        self.path = path or DEFAULT_SOCKET_PATH
+        self.loop = loop if loop else asyncio.get_event_loop()
+        self.retention = retention
+        self.interval = interval
+        if scanner_factory is None:
+            from bleak import BleakScanner as scanner_factory
+        self.scanner = scanner_factory(loop=self.loop, **(scanner_kwargs or {}))
+        self.dropped = 0
+        # Address -> (timestamp, record) of the last detection of every device.
+        self._devices = {}
+        self._subscribers = set()
+        self._pending = []
+        self._flush_handle = None
+        self._prune_handle = None
+        self._server = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    @property
+    def subscribers(self) -> int:
+        """Number of subscribed clients"""
+        return len(self._subscribers)
+
+    async def start(self) -> None:
+        """Start scanning and serving.
+
+        Raises:
+            BleakError: If another daemon is serving on the socket already.
+
+        """
+        if os.path.exists(self.path):
+            # A socket left behind by a daemon that has exited is replaced.
+            try:
+                transport, _ = await self.loop.create_unix_connection(
+                    asyncio.Protocol, self.path
+                )
+            except OSError:
+                os.unlink(self.path)
+            else:
+                transport.close()
+                raise BleakError(
+                    "bleak-scand is already serving on {0}".format(self.path)
+                )
+        self.scanner.register_sink(_DaemonSink(self))
+        await self.scanner.start()
+        self._server = await self.loop.create_unix_server(
+            lambda: _DaemonConnection(self), self.path
+        )
+        self._prune_handle = self.loop.call_later(self.retention / 4, self._prune)
+
+    async def stop(self) -> None:
+        """Stop serving and scanning."""
+        if self._server is not None:
+            self._server.close()
+            for subscriber in list(self._subscribers):
+                subscriber.transport.close()
+            await self._server.wait_closed()
+            self._server = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        for handle in (self._flush_handle, self._prune_handle):
+            if handle is not None:
+                handle.cancel()
+        self._flush_handle = self._prune_handle = None
+        await self.scanner.stop()
+
+    def _on_detection(self, timestamp, address, name, rssi, manufacturer_data, uuids):
+        try:
+            record = pack_detection(
+                timestamp, address, name, rssi, manufacturer_data, uuids
+            )
+        except (ValueError, OverflowError, struct.error) as e:
+            logger.debug("Cannot serve detection of {0}: {1}".format(address, e))
+            return
+        self._devices[address] = (timestamp, record)
+        if self._subscribers:
+            self._pending.append(record)
+            if self._flush_handle is None:
+                self._flush_handle = self.loop.call_later(self.interval, self._flush)
+
+    def _flush(self) -> None:
+        self._flush_handle = None
+        message = _frame(DETECTIONS, b"".join(self._pending))
+        self._pending = []
+        for subscriber in self._subscribers:
+            if subscriber.transport.get_write_buffer_size() > _MAX_BUFFERED:
+                self.dropped += 1
+            else:
+                subscriber.transport.write(message)
+
+    def _query(self, max_age: float) -> bytes:
+        if max_age <= 0:
+            return b"".join(record for _, record in self._devices.values())
+        oldest = time.time() - max_age
+        return b"".join(
+            record
+            for timestamp, record in self._devices.values()
+            if timestamp >= oldest
+        )
+
+    def _prune(self) -> None:
+        oldest = time.time() - self.retention
+        for address in [a for a, (t, _) in self._devices.items() if t < oldest]:
+            del self._devices[address]
+        self._prune_handle = self.loop.call_later(self.retention / 4, self._prune)
+
+
+class _ScannerConnection(_FramedProtocol):
+    def __init__(self, scanner):
+        super(_ScannerConnection, self).__init__()
+        self.scanner = scanner
+
+    def frame_received(self, kind, payload):
+        if kind == DEVICES:
+            self.scanner._on_devices(unpack_detections(payload))
+        elif kind == DETECTIONS:
+            self.scanner._on_detections(unpack_detections(payload))
+
+    def connection_lost(self, exc):
+        self.scanner._on_connection_lost(exc)
+
+
+class CachedScanner(BaseBleakScanner):
+    """A scanner getting its detections from a :py:class:`ScanDaemon`.
+
+    Devices detected by the daemon within the last ``max_age`` seconds are
+    discovered as soon as the scanner is started. Detection callbacks are called
+    with the ``BLEDevice`` detected.
+
+    Args:
+        loop (asyncio.events.AbstractEventLoop): The event loop to use.
+
+    Keyword Args:
+        path (str): Path of the socket of the daemon. Defaults to
+          ``DEFAULT_SOCKET_PATH``.
+        max_age (float): Seconds since their last detection devices are
+          discovered for. Defaults to 10.0.
+
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop = None, **kwargs):
+        super(CachedScanner, self).__init__(loop, **kwargs)
+        self.path = kwargs.get("path") or DEFAULT_SOCKET_PATH
+        self.max_age = kwargs.get("max_age", 10.0)
+        self._devices = {}
+        self._callback = None
+        self._connection = None
+        self._ready = None
+
+    async def start(self) -> None:
+        self._ready = self.loop.create_future()
+        try:
+            _, self._connection = await self.loop.create_unix_connection(
+                lambda: _ScannerConnection(self), self.path
+            )
+        except OSError as e:
+            raise BleakError(
+                "Could not connect to bleak-scand at {0}: {1}".format(self.path, e)
+            )
+        self._connection.transport.write(
+            _frame(QUERY, _QUERY.pack(self.max_age)) + _frame(SUBSCRIBE)
+        )
+        await self._ready
+
+    async def stop(self) -> None:
+        if self._connection is not None:
+            self._connection.transport.close()
+            self._connection = None
+        self._flush_sinks()
+
+    async def set_scanning_filter(self, **kwargs) -> None:
+        raise BleakError("The scan is shared; give bleak-scand the filters instead")
+
+    async def get_discovered_devices(self) -> List[BLEDevice]:
+        oldest = time.time() - self.max_age
+        return [
+            self._device(detection)
+            for detection in self._devices.values()
+            if detection[0] >= oldest
+        ]
+
+    def register_detection_callback(self, callback: Callable) -> None:
+        self._callback = callback
+
+    @staticmethod
+    def _device(detection) -> BLEDevice:
+        timestamp, address, name, rssi, manufacturer_data, uuids = detection
+        props = {
+            "Address": address,
+            "Name": name,
+            "RSSI": rssi,
+            "ManufacturerData": manufacturer_data,
+            "UUIDs": uuids,
+        }
+        return BLEDevice(
+            address,
+            name,
+            {"timestamp": timestamp, "props": props},
+            uuids=uuids,
+            manufacturer_data=manufacturer_data,
+        )
+
+    def _on_devices(self, detections) -> None:
+        for detection in detections:
+            self._devices[detection[1]] = detection
+        if not self._ready.done():
+            self._ready.set_result(None)
+
+    def _on_detections(self, detections) -> None:
+        for detection in detections:
+            previous = self._devices.get(detection[1])
+            if previous is not None and previous[0] > detection[0]:
+                continue
+            self._devices[detection[1]] = detection
+            timestamp, address, name, rssi, manufacturer_data, uuids = detection
+            self._dispatch_to_sinks(
+                address, name, rssi, manufacturer_data, uuids, timestamp=timestamp
+            )
+            if self._callback is not None:
+                try:
+                    self._callback(self._device(detection))
+                except Exception:
+                    logger.exception("Error in detection callback")
+
+    def _on_connection_lost(self, exc) -> None:
+        if self._ready is not None and not self._ready.done():
+            self._ready.set_exception(
+                BleakError("bleak-scand closed the connection: {0}".format(exc))
+            )
+        elif self._connection is not None:
+            logger.warning("Lost the connection to bleak-scand: {0}".format(exc))
+        self._connection = None
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="bleak-scand", description=__doc__.strip().split("\n")[0]
+    )
+    parser.add_argument(
+        "--socket", default=DEFAULT_SOCKET_PATH, help="Path of the Unix socket"
+    )
+    parser.add_argument("-i", dest="adapter", default="hci0", help="HCI device")
+    parser.add_argument(
+        "--retention",
+        type=float,
+        default=300.0,
+        help="Seconds devices are kept after their last detection",
+    )
+    parser.add_argument("-d", "--debug", action="store_true", help="Log debug output")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
+
+    loop = asyncio.get_event_loop()
+    daemon = ScanDaemon(
+        args.socket,
+        loop,
+        retention=args.retention,
+        scanner_kwargs={"device": args.adapter},
+    )
+    stopped = asyncio.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stopped.set)
+
+    async def _run():
+        async with daemon:
+            logger.info("Serving {0} on {1}".format(args.adapter, args.socket))
+            await stopped.wait()
+
+    loop.run_until_complete(_run())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,625 @@
+# -*- coding: utf-8 -*-
+"""
+Scanning and connecting with one worker process per Bluetooth adapter.
+
+A single process handles its D-Bus messages, event loop and Python objects on one
+core, which caps how many advertisements a gateway with several adapters can take
+in. A :py:class:`Supervisor` starts a worker process per adapter instead, each
+running its own scanner and clients on its own event loop. Detections and
+notifications are sent back over a socket pair in batches, at most one per
+``interval`` seconds for each worker, and dispatched on the event loop of the
+supervisor by a :py:class:`ShardedScanner` and :py:class:`ShardedClient`, which
+are used like :py:class:`bleak.BleakScanner` and :py:class:`bleak.BleakClient`:
+
+.. code-block:: python
+
+    async with Supervisor(["hci0", "hci1", "hci2", "hci3"]) as supervisor:
+        scanner = ShardedScanner(supervisor=supervisor)
+        scanner.register_sink(ring_buffer)
+        await scanner.start()
+        ...
+        async with ShardedClient(address, supervisor=supervisor) as client:
+            await client.start_notify(CHAR_UUID, callback)
+
+Clients connect through the adapter their device was last detected on, unless
+given one. Characteristics are given by UUID or handle, and all values passed to
+and returned by the workers must be picklable. Workers are started with the
+``spawn`` method by default, so the main module of the program must be importable
+without side effects, see :py:mod:`multiprocessing`.
+
+Currently only the BlueZ backend, which has several adapters to shard on, is
+supported.
+
+"""
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import pickle
+import socket
+import struct
+from functools import partial
+from typing import Callable, Iterable, List
+
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import BaseBleakScanner
+from bleak.exc import BleakError
+from bleak.sinks import BaseScannerSink
+
+logger = logging.getLogger(__name__)
+
+
+def _portable(e: Exception) -> Exception:
+    """The exception if it can be sent to another process, or a stand-in."""
+    try:
+        pickle.loads(pickle.dumps(e))
+    except Exception:
+        return BleakError("{0}: {1}".format(type(e).__name__, e))
+    return e
+
+
+_header = struct.Struct("!I")
+
+
+class _Channel(asyncio.Protocol):
+    """Pickled messages over a stream socket, read and written by the event loop.
+
+    Writes are buffered by the transport, so sending never blocks the loop on a
+    peer that is slow to read.
+    """
+
+    def __init__(self, loop, on_message: Callable, on_closed: Callable):
+        self._on_message = on_message
+        self._on_closed = on_closed
+        self._transport = None
+        self._buffer = bytearray()
+        self._closed = loop.create_future()
+
+    def connection_made(self, transport) -> None:
+        self._transport = transport
+
+    def data_received(self, data) -> None:
+        buf = self._buffer
+        buf.extend(data)
+        offset = 0
+        try:
+            while len(buf) - offset >= _header.size:
+                (n,) = _header.unpack_from(buf, offset)
+                start = offset + _header.size
+                if len(buf) - start < n:
+                    break
+                offset = start + n
+                self._on_message(pickle.loads(bytes(buf[start:offset])))
+        finally:
+            del buf[:offset]
+
+    def connection_lost(self, exc) -> None:
+        self._transport = None
+        if not self._closed.done():
+            self._closed.set_result(None)
+        self._on_closed()
+
+    def send(self, message) -> None:
+        if self._transport is None or self._transport.is_closing():
+            raise BrokenPipeError("The channel is closed")
+        data = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+        self._transport.write(_header.pack(len(data)) + data)
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+
+    async def wait_closed(self) -> None:
+        """Close the channel once the messages sent have been written."""
+        self.close()
+        await self._closed
+
+
+async def _open_channel(loop, sock, on_message, on_closed) -> _Channel:
+    _, channel = await loop.create_unix_connection(
+        lambda: _Channel(loop, on_message, on_closed), sock=sock
+    )
+    return channel
+
+
+class _Batcher(object):
+    """Collects items and sends them in one message per ``interval`` seconds."""
+
+    def __init__(self, loop, interval: float, send: Callable, kind: str):
+        self.loop = loop
+        self.interval = interval
+        self._send = send
+        self._kind = kind
+        self._pending = []
+        self._handle = None
+
+    def add(self, item) -> None:
+        self._pending.append(item)
+        if self._handle is None:
+            self._handle = self.loop.call_later(self.interval, self.flush)
+
+    def flush(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._pending:
+            batch, self._pending = self._pending, []
+            self._send((self._kind, batch))
+
+
+class _ChannelSink(BaseScannerSink):
+    def __init__(self, batcher: _Batcher):
+        self._batcher = batcher
+
+    def add(self, timestamp, address, name, rssi, manufacturer_data, uuids) -> None:
+        self._batcher.add((timestamp, address, name, rssi, manufacturer_data, uuids))
+
+    def flush(self) -> None:
+        self._batcher.flush()
+
+
+class _Worker(object):
+    """The scanner and clients of an adapter, in a worker process."""
+
+    def __init__(self, adapter, sock, loop, interval, scanner_kwargs, client_kwargs):
+        from bleak import BleakClient, BleakScanner
+
+        self.adapter = adapter
+        self.sock = sock
+        self.channel = None
+        self.loop = loop
+        self.client_kwargs = client_kwargs
+        self._client_factory = BleakClient
+        self.scanner = BleakScanner(loop, device=adapter, **scanner_kwargs)
+        self.detections = _Batcher(loop, interval, self.send, "detections")
+        self.notifications = _Batcher(loop, interval, self.send, "notifications")
+        self.scanner.register_sink(_ChannelSink(self.detections))
+        self.clients = {}
+        self._closed = loop.create_future()
+
+    def send(self, message) -> None:
+        try:
+            self.channel.send(message)
+        except OSError:
+            self._on_closed()
+
+    async def run(self) -> None:
+        self.channel = await _open_channel(
+            self.loop, self.sock, self._on_message, self._on_closed
+        )
+        try:
+            await self._closed
+        finally:
+            for client in self.clients.values():
+                try:
+                    await client.disconnect()
+                except Exception as e:
+                    logger.debug("Disconnecting {0} failed: {1}".format(client, e))
+            await self.channel.wait_closed()
+
+    def _on_message(self, message) -> None:
+        request_id, command, args = message
+        asyncio.ensure_future(self._handle(request_id, command, args), loop=self.loop)
+
+    def _on_closed(self) -> None:
+        # The supervisor is gone, or has asked to close.
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    async def _handle(self, request_id, command, args) -> None:
+        try:
+            result = await getattr(self, "_" + command)(*args)
+        except Exception as e:
+            self.send(("reply", request_id, _portable(e), None))
+        else:
+            self.send(("reply", request_id, None, result))
+
+    async def _ping(self) -> str:
+        return self.adapter
+
+    async def _close(self) -> None:
+        self.detections.flush()
+        self.notifications.flush()
+        self.loop.call_soon(self._closed.set_result, None)
+
+    async def _start_scan(self) -> None:
+        await self.scanner.start()
+
+    async def _stop_scan(self) -> None:
+        await self.scanner.stop()
+
+    async def _set_scanning_filter(self, kwargs) -> None:
+        await self.scanner.set_scanning_filter(**kwargs)
+
+    async def _client(self, address, method, args, kwargs):
+        client = self.clients.get(address)
+        if client is None:
+            client = self._client_factory(
+                address, loop=self.loop, device=self.adapter, **self.client_kwargs
+            )
+            self.clients[address] = client
+        if method == "start_notify":
+            # The supervisor gives a token to route the notifications back with.
+            args = (args[0], partial(self._notify, address, args[1]))
+        result = await getattr(client, method)(*args, **kwargs)
+        if method == "disconnect":
+            del self.clients[address]
+        return result
+
+    def _notify(self, address, token, sender, data, info=None) -> None:
+        self.notifications.add((address, token, sender, data, info))
+
+
+def _worker_main(adapter, sock, interval, scanner_kwargs, client_kwargs):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        worker = _Worker(adapter, sock, loop, interval, scanner_kwargs, client_kwargs)
+        loop.run_until_complete(worker.run())
+    finally:
+        loop.close()
+        sock.close()
+
+
+class _WorkerHandle(object):
+    """A worker process, seen from the supervisor."""
+
+    def __init__(self, adapter, process):
+        self.adapter = adapter
+        self.process = process
+        self.channel = None
+        self.pending = {}
+        self.clients = 0
+        self.detections = 0
+        self.closing = False
+
+
+class Supervisor(object):
+    """Runs a worker process for each adapter.
+
+    Args:
+        adapters (iterable): The adapters, e.g. ``["hci0", "hci1"]``.
+        loop (asyncio.events.AbstractEventLoop): The event loop to use.
+        interval (float): Seconds detections and notifications are collected in a
+          worker before being sent to the supervisor. Defaults to 0.05.
+        context (str): The :py:mod:`multiprocessing` start method of the workers.
+          Defaults to ``"spawn"``.
+        scanner_kwargs (dict): Keyword arguments of the scanners of the workers.
+        client_kwargs (dict): Keyword arguments of the clients of the workers.
+
+    """
+
+    def __init__(
+        self,
+        adapters: Iterable[str] = ("hci0",),
+        loop: asyncio.AbstractEventLoop = None,
+        interval: float = 0.05,
+        context: str = "spawn",
+        scanner_kwargs: dict = None,
+        client_kwargs: dict = None,
+    ):
+        self.adapters = list(adapters)
+        self.loop = loop if loop else asyncio.get_event_loop()
+        self.interval = interval
+        self._context = multiprocessing.get_context(context)
+        self._scanner_kwargs = scanner_kwargs or {}
+        self._client_kwargs = client_kwargs or {}
+        self._workers = {}
+        self._requests = itertools.count()
+        self._scanners = []
+        self._clients = {}
+        # Adapter each address was last detected on.
+        self._seen = {}
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    @property
+    def detections(self) -> dict:
+        """Detections received from each adapter."""
+        return {a: w.detections for a, w in self._workers.items()}
+
+    async def start(self) -> None:
+        """Start the worker processes, and wait for them to be ready."""
+        for adapter in self.adapters:
+            if adapter in self._workers:
+                continue
+            sock, child_sock = socket.socketpair()
+            process = self._context.Process(
+                target=_worker_main,
+                args=(
+                    adapter,
+                    child_sock,
+                    self.interval,
+                    self._scanner_kwargs,
+                    self._client_kwargs,
+                ),
+                name="bleak-{0}".format(adapter),
+                daemon=True,
+            )
+            process.start()
+            child_sock.close()
+            worker = _WorkerHandle(adapter, process)
+            worker.channel = await _open_channel(
+                self.loop,
+                sock,
+                partial(self._on_message, worker),
+                partial(self._on_closed, worker),
+            )
+            self._workers[adapter] = worker
+        await asyncio.gather(*(self._request(a, "ping") for a in self._workers))
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Stop the worker processes, disconnecting their clients."""
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.closing = True
+            try:
+                await asyncio.wait_for(self._request(worker.adapter, "close"), timeout)
+            except (BleakError, asyncio.TimeoutError) as e:
+                logger.debug("Closing {0} failed: {1}".format(worker.adapter, e))
+        for worker in workers:
+            await self.loop.run_in_executor(None, worker.process.join, timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            self._drop(worker)
+
+    def _drop(self, worker: _WorkerHandle) -> None:
+        if self._workers.get(worker.adapter) is not worker:
+            return
+        del self._workers[worker.adapter]
+        worker.channel.close()
+        for future in worker.pending.values():
+            if not future.done():
+                future.set_exception(
+                    BleakError("Worker of {0} has exited".format(worker.adapter))
+                )
+
+    async def _request(self, adapter: str, command: str, *args):
+        worker = self._workers.get(adapter)
+        if worker is None:
+            raise BleakError("No worker for adapter {0}".format(adapter))
+        request_id = next(self._requests)
+        future = self.loop.create_future()
+        worker.pending[request_id] = future
+        try:
+            worker.channel.send((request_id, command, args))
+            return await future
+        finally:
+            worker.pending.pop(request_id, None)
+
+    async def _broadcast(self, command: str, *args) -> None:
+        await asyncio.gather(*(self._request(a, command, *args) for a in self._workers))
+
+    def _on_message(self, worker: _WorkerHandle, message) -> None:
+        getattr(self, "_on_" + message[0])(worker, *message[1:])
+
+    def _on_closed(self, worker: _WorkerHandle) -> None:
+        if not worker.closing:
+            logger.warning("Worker of {0} has exited".format(worker.adapter))
+        self._drop(worker)
+
+    def _on_reply(self, worker, request_id, error, result) -> None:
+        future = worker.pending.get(request_id)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _on_detections(self, worker, batch) -> None:
+        worker.detections += len(batch)
+        for detection in batch:
+            self._seen[detection[1]] = worker.adapter
+        for scanner in self._scanners:
+            scanner._on_detections(worker.adapter, batch)
+
+    def _on_notifications(self, worker, batch) -> None:
+        for address, token, sender, data, info in batch:
+            client = self._clients.get((worker.adapter, address))
+            callback = client._callbacks.get(token) if client else None
+            if callback is None:
+                continue
+            try:
+                if info is None:
+                    callback(sender, data)
+                else:
+                    callback(sender, data, info)
+            except Exception:
+                logger.exception(
+                    "Error in notification callback of {0}".format(client)
+                )
+
+    def _adapter_for(self, address: str) -> str:
+        adapter = self._seen.get(address.upper())
+        if adapter in self._workers:
+            return adapter
+        if not self._workers:
+            raise BleakError("The supervisor is not started")
+        return min(self._workers.values(), key=lambda w: w.clients).adapter
+
+
+class ShardedScanner(BaseBleakScanner):
+    """A scanner aggregating the detections of all workers of a supervisor.
+
+    Sinks added with :py:meth:`register_sink` receive the detections of all
+    adapters, in batches from each worker. Detection callbacks are called with the
+    ``BLEDevice`` detected and the adapter it was detected on.
+
+    Args:
+        loop (asyncio.events.AbstractEventLoop): The event loop to use.
+
+    Keyword Args:
+        supervisor (Supervisor): The started supervisor of the workers.
+
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop = None, **kwargs):
+        super(ShardedScanner, self).__init__(loop, **kwargs)
+        self.supervisor = kwargs.get("supervisor")
+        if self.supervisor is None:
+            raise BleakError("A ShardedScanner needs a supervisor")
+        self._devices = {}
+        self._callback = None
+
+    async def start(self) -> None:
+        if self not in self.supervisor._scanners:
+            self.supervisor._scanners.append(self)
+        await self.supervisor._broadcast("start_scan")
+
+    async def stop(self) -> None:
+        if self in self.supervisor._scanners:
+            self.supervisor._scanners.remove(self)
+        if not self.supervisor._scanners:
+            await self.supervisor._broadcast("stop_scan")
+        self._flush_sinks()
+
+    async def set_scanning_filter(self, **kwargs) -> None:
+        await self.supervisor._broadcast("set_scanning_filter", kwargs)
+
+    async def get_discovered_devices(self) -> List[BLEDevice]:
+        return [
+            self._device(adapter, detection)
+            for adapter, detection in self._devices.values()
+        ]
+
+    def register_detection_callback(self, callback: Callable) -> None:
+        self._callback = callback
+
+    @staticmethod
+    def _device(adapter, detection) -> BLEDevice:
+        _, address, name, rssi, manufacturer_data, uuids = detection
+        props = {
+            "Address": address,
+            "Name": name,
+            "RSSI": rssi,
+            "ManufacturerData": manufacturer_data,
+            "UUIDs": uuids,
+        }
+        return BLEDevice(
+            address,
+            name,
+            {"adapter": adapter, "props": props},
+            uuids=uuids,
+            manufacturer_data=manufacturer_data,
+        )
+
+    def _on_detections(self, adapter, batch) -> None:
+        for detection in batch:
+            previous = self._devices.get(detection[1])
+            if detection[2] is None and previous is not None:
+                # Keep the name of the device when only its RSSI changed.
+                detection = detection[:2] + (previous[1][2],) + detection[3:]
+            self._devices[detection[1]] = (adapter, detection)
+            timestamp, address, name, rssi, manufacturer_data, uuids = detection
+            self._dispatch_to_sinks(
+                address, name, rssi, manufacturer_data, uuids, timestamp=timestamp
+            )
+            if self._callback is not None:
+                try:
+                    self._callback(self._device(adapter, detection), adapter)
+                except Exception:
+                    logger.exception("Error in detection callback")
+
+
+class ShardedClient(object):
+    """A client running in the worker of an adapter.
+
+    Takes the same arguments as :py:class:`bleak.BleakClient`, and has its
+    ``connect``, ``disconnect``, ``is_connected``, ``read_gatt_char``,
+    ``read_gatt_descriptor``, ``write_gatt_char``, ``write_gatt_descriptor``,
+    ``start_notify`` and ``stop_notify`` methods, with characteristics given by
+    UUID or handle. The services, MTU and disconnected callback of the client
+    stay in the worker and are not available.
+
+    Args:
+        address (str): The address of the device.
+        loop (asyncio.events.AbstractEventLoop): Not used, for compatibility.
+
+    Keyword Args:
+        supervisor (Supervisor): The started supervisor of the workers.
+        adapter (str): The adapter to connect through. Defaults to the one the
+          device was last detected on, or the one with the fewest clients.
+
+    """
+
+    def __init__(self, address: str, loop: asyncio.AbstractEventLoop = None, **kwargs):
+        self.address = address
+        self.supervisor = kwargs.get("supervisor")
+        if self.supervisor is None:
+            raise BleakError("A ShardedClient needs a supervisor")
+        self.adapter = kwargs.get("adapter")
+        self._callbacks = {}
+        self._registered = False
+
+    def __str__(self):
+        return "ShardedClient, {0} on {1}".format(self.address, self.adapter)
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
+
+    async def _call(self, method: str, *args, **kwargs):
+        return await self.supervisor._request(
+            self.adapter, "client", self.address, method, args, kwargs
+        )
+
+    async def connect(self, **kwargs) -> bool:
+        supervisor = self.supervisor
+        if self.adapter is None:
+            self.adapter = supervisor._adapter_for(self.address)
+        if not self._registered:
+            supervisor._clients[(self.adapter, self.address)] = self
+            supervisor._workers[self.adapter].clients += 1
+            self._registered = True
+        return await self._call("connect", **kwargs)
+
+    async def disconnect(self) -> bool:
+        try:
+            return await self._call("disconnect")
+        finally:
+            if self._registered:
+                del self.supervisor._clients[(self.adapter, self.address)]
+                worker = self.supervisor._workers.get(self.adapter)
+                if worker is not None:
+                    worker.clients -= 1
+                self._registered = False
+            self._callbacks.clear()
+
+    async def is_connected(self) -> bool:
+        return await self._call("is_connected")
+
+    async def read_gatt_char(self, _uuid, **kwargs) -> bytearray:
+        return await self._call("read_gatt_char", _uuid, **kwargs)
+
+    async def read_gatt_descriptor(self, handle: int, **kwargs) -> bytearray:
+        return await self._call("read_gatt_descriptor", handle, **kwargs)
+
+    async def write_gatt_char(
+        self, _uuid, data: bytearray, response: bool = False, **kwargs
+    ) -> None:
+        await self._call("write_gatt_char", _uuid, data, response, **kwargs)
+
+    async def write_gatt_descriptor(self, handle: int, data: bytearray) -> None:
+        await self._call("write_gatt_descriptor", handle, data)
+
+    async def start_notify(self, _uuid, callback: Callable, **kwargs) -> None:
+        token = str(_uuid)
+        self._callbacks[token] = callback
+        try:
+            await self._call("start_notify", _uuid, token, **kwargs)
+        except BaseException:
+            del self._callbacks[token]
+            raise
+
+    async def stop_notify(self, _uuid) -> None:
+        await self._call("stop_notify", _uuid)
+        self._callbacks.pop(str(_uuid), None)
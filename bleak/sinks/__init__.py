@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Scanner sinks, receiving every detection made by a scanner.
+
+A sink is added to a scanner with
+:py:meth:`bleak.backends.scanner.BaseBleakScanner.register_sink` and will then
+have its ``add`` method called for each received advertisement or device
+property change, without any ``BLEDevice`` objects being created.
+
+"""
+import abc
+
+
+class BaseScannerSink(abc.ABC):
+    """Interface for scanner sinks."""
+
+    @abc.abstractmethod
+    def add(self, timestamp, address, name, rssi, manufacturer_data, uuids) -> None:
+        """Append a detection to the sink.
+
+        Args:
+            timestamp (float): Wall clock time of the detection, as from ``time.time()``.
+            address (str): Address of the detected device.
+            name (str): Name of the detected device.
+            rssi (int): Signal strength in dBm, or ``None`` if not available.
+            manufacturer_data (dict): Manufacturer ids mapped to data.
+            uuids (list): Advertised service UUIDs.
+
+        """
+        raise NotImplementedError()
+
+    def flush(self) -> None:
+        """Flush any buffered detections. Called when the scanner stops."""
+        pass
+
+    def close(self) -> None:
+        """Flush and release any resources held by the sink."""
+        self.flush()
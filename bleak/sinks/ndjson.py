@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Newline delimited JSON export of detections, for log shippers.
+
+Every detection is written as one JSON object on a line of its own, so the cost
+of the export grows with the detections made, not with the devices known:
+
+.. code-block:: json
+
+    {"timestamp":1590000000.5,"address":"24:71:89:CC:09:05","name":"Sensor",
+     "rssi":-52,"manufacturer_data":{"76":"0215"},"uuids":[]}
+
+Lines are buffered and written when ``buffer_size`` bytes have been buffered,
+``flush_interval`` seconds after the first of them was buffered, by a timer on
+the event loop, and when the scanner stops. When the file would grow beyond
+``max_bytes``, it is rotated like by
+:py:class:`logging.handlers.RotatingFileHandler`, to ``path.1``, ``path.2`` and so
+on, keeping ``backup_count`` files.
+
+.. code-block:: python
+
+    sink = NDJSONFileSink("/var/log/bleak/detections.ndjson", max_bytes=2 ** 26)
+    scanner = BleakScanner()
+    scanner.register_sink(sink)
+
+"""
+import asyncio
+import json
+import os
+
+from bleak.sinks import BaseScannerSink
+
+
+class NDJSONFileSink(BaseScannerSink):
+    """Sink appending detections to a file as newline delimited JSON.
+
+    Args:
+        path (str): The file to append to.
+        max_bytes (int): Size the file is rotated at. ``0`` never rotates it.
+          Defaults to 64 MiB.
+        backup_count (int): Rotated files kept. Defaults to 5.
+        flush_interval (float): Seconds detections are buffered at most.
+          Defaults to 1.0.
+        buffer_size (int): Bytes buffered at most. Defaults to 64 KiB.
+        loop (asyncio.events.AbstractEventLoop): The event loop of the scanner,
+          running the flush timer. Defaults to ``asyncio.get_event_loop()``.
+
+    Attributes:
+        lines (int): Detections written.
+        rotations (int): Times the file was rotated.
+
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        backup_count: int = 5,
+        flush_interval: float = 1.0,
+        buffer_size: int = 64 * 1024,
+        loop: asyncio.AbstractEventLoop = None,
+    ):
+        self.loop = loop if loop else asyncio.get_event_loop()
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.lines = 0
+        self.rotations = 0
+        self._buffer = []
+        self._buffered = 0
+        self._timer = None
+        self._file = None
+        self._size = 0
+
+    def add(self, timestamp, address, name, rssi, manufacturer_data, uuids) -> None:
+        line = json.dumps(
+            {
+                "timestamp": timestamp,
+                "address": address,
+                "name": name,
+                "rssi": rssi,
+                "manufacturer_data": {
+                    str(k): bytes(v).hex() for k, v in manufacturer_data.items()
+                },
+                "uuids": list(uuids),
+            },
+            separators=(",", ":"),
+        )
+        line = (line + "\n").encode()
+        self._buffer.append(line)
+        self._buffered += len(line)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = self.loop.call_later(self.flush_interval, self.flush)
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        lines, self._buffer, self._buffered = self._buffer, [], 0
+        if not lines:
+            return
+        if self._file is None:
+            self._open()
+        chunk = []
+        size = 0
+        for line in lines:
+            if self.max_bytes and self._size + size + len(line) > self.max_bytes:
+                if chunk or self._size:
+                    self._write(chunk)
+                    chunk, size = [], 0
+                    self._rotate()
+            chunk.append(line)
+            size += len(line)
+        self._write(chunk)
+        self._file.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _open(self):
+        self._file = open(self.path, "ab")
+        self._size = self._file.tell()
+
+    def _write(self, chunk):
+        data = b"".join(chunk)
+        self._file.write(data)
+        self._size += len(data)
+        self.lines += len(chunk)
+
+    def _rotate(self):
+        self._file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                source = "{0}.{1}".format(self.path, i)
+                if os.path.exists(source):
+                    os.replace(source, "{0}.{1}".format(self.path, i + 1))
+            os.replace(self.path, self.path + ".1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+        self._open()
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Columnar ring buffer for advertisement telemetry, backed by NumPy.
+
+Every detection is stored as one 22 byte record in a preallocated NumPy structured
+array, instead of as a ``BLEDevice`` object. When the buffer is full, the oldest
+records are overwritten. Addresses are stored as 48-bit integers, see
+:py:func:`bleak.utils.mac_str_2_int`.
+
+Requires `NumPy <https://numpy.org/>`_, e.g. installed by ``pip install bleak[numpy]``.
+
+.. code-block:: python
+
+    buffer = AdvertisementRingBuffer(capacity=1000000)
+    scanner = BleakScanner()
+    scanner.register_sink(buffer)
+    await scanner.start()
+    await asyncio.sleep(60.0)
+    await scanner.stop()
+    timestamps, rssi = buffer.rssi_series("24:71:89:CC:09:05")
+
+"""
+from typing import Tuple, Union
+
+import numpy as np
+
+from bleak.sinks import BaseScannerSink
+from bleak.utils import mac_str_2_int
+
+#: Value stored as RSSI when no signal strength was available.
+RSSI_UNAVAILABLE = -32768
+#: Value stored as manufacturer id when no manufacturer data was advertised.
+MANUFACTURER_UNAVAILABLE = -1
+
+ADVERTISEMENT_DTYPE = np.dtype(
+    [
+        ("timestamp", "<f8"),
+        ("address", "<u8"),
+        ("rssi", "<i2"),
+        ("manufacturer_id", "<i4"),
+    ],
+    align=False,
+)
+
+LAST_SEEN_DTYPE = np.dtype(
+    [("address", "<u8"), ("timestamp", "<f8"), ("rssi", "<i2")], align=False
+)
+
+
+def _address_to_int(address: Union[str, int]) -> int:
+    return address if isinstance(address, int) else mac_str_2_int(address)
+
+
+class AdvertisementRingBuffer(BaseScannerSink):
+    """Ring buffer sink storing (timestamp, address, RSSI, manufacturer id) records.
+
+    Only backends using MAC addresses are supported, i.e. not the macOS one.
+    Detections with addresses that cannot be parsed are counted in ``dropped``.
+
+    Args:
+        capacity (int): Maximum number of records kept. Defaults to 100000.
+
+    """
+
+    def __init__(self, capacity: int = 100000):
+        if capacity <= 0:
+            raise ValueError("Capacity must be a positive integer.")
+        self._data = np.zeros(capacity, dtype=ADVERTISEMENT_DTYPE)
+        self._head = 0
+        self._size = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of records kept"""
+        return len(self._data)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the preallocated records"""
+        return self._data.nbytes
+
+    def add(self, timestamp, address, name, rssi, manufacturer_data, uuids) -> None:
+        try:
+            address = mac_str_2_int(address)
+        except (ValueError, AttributeError):
+            self.dropped += 1
+            return
+
+        if manufacturer_data:
+            manufacturer_id = next(iter(manufacturer_data))
+        else:
+            manufacturer_id = MANUFACTURER_UNAVAILABLE
+
+        self._data[self._head] = (
+            timestamp,
+            address,
+            RSSI_UNAVAILABLE if rssi is None else rssi,
+            manufacturer_id,
+        )
+        self._head = (self._head + 1) % len(self._data)
+        self._size = min(self._size + 1, len(self._data))
+
+    def clear(self) -> None:
+        """Remove all records."""
+        self._head = 0
+        self._size = 0
+
+    def records(self) -> np.ndarray:
+        """All stored records in chronological order.
+
+        Returns:
+            A structured array with dtype ``ADVERTISEMENT_DTYPE``. It is a view into
+            the buffer unless the buffer has wrapped around, in which case it is a copy.
+
+        """
+        if self._size < len(self._data):
+            return self._data[: self._size]
+        return np.concatenate((self._data[self._head :], self._data[: self._head]))
+
+    def rssi_series(self, address: Union[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the RSSI time series of one device.
+
+        Args:
+            address (str or int): Address of the device, as string or 48-bit integer.
+
+        Returns:
+            Tuple of timestamp and RSSI arrays, in chronological order. Records
+            without signal strength are left out.
+
+        """
+        r = self.records()
+        mask = (r["address"] == _address_to_int(address)) & (
+            r["rssi"] != RSSI_UNAVAILABLE
+        )
+        return r["timestamp"][mask], r["rssi"][mask]
+
+    def last_seen(self) -> np.ndarray:
+        """Get the last record of every device in the buffer.
+
+        Returns:
+            A structured array with dtype ``LAST_SEEN_DTYPE``, sorted by address.
+            Use :py:func:`bleak.utils.mac_int_2_str` to convert addresses to strings.
+
+        """
+        r = self.records()
+        # Unique on the reversed records gives the index of the latest record.
+        addresses, idx = np.unique(r["address"][::-1], return_index=True)
+        idx = len(r) - 1 - idx
+        out = np.empty(len(addresses), dtype=LAST_SEEN_DTYPE)
+        out["address"] = addresses
+        out["timestamp"] = r["timestamp"][idx]
+        out["rssi"] = r["rssi"][idx]
+        return out
+
+    def counts_per_window(
+        self,
+        window: float,
+        start: float = None,
+        end: float = None,
+        address: Union[str, int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Count records per time window.
+
+        Args:
+            window (float): Window length in seconds.
+            start (float): Start of the first window. Defaults to the oldest record.
+            end (float): End of the last window. Defaults to the newest record.
+            address (str or int): Only count records of this device, if given.
+
+        Returns:
+            Tuple of window start times and record counts per window.
+
+        """
+        if window <= 0:
+            raise ValueError("Window must be positive.")
+        r = self.records()
+        if address is not None:
+            r = r[r["address"] == _address_to_int(address)]
+        t = r["timestamp"]
+        if start is None:
+            start = float(t.min()) if len(t) else 0.0
+        if end is None:
+            end = float(t.max()) if len(t) else start
+        n_windows = max(int(np.floor((end - start) / window)) + 1, 1)
+
+        t = t[(t >= start) & (t < start + n_windows * window)]
+        idx = ((t - start) // window).astype(np.intp)
+        counts = np.bincount(idx, minlength=n_windows)
+        return start + window * np.arange(n_windows), counts
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+Use of bleak from synchronous code.
+
+Instead of running each call to completion with ``loop.run_until_complete``,
+which blocks the caller and everything else on the loop, the clients of this
+module run on one event loop in a thread of its own, an :py:class:`EventLoopThread`.
+Their methods return at once with a :py:class:`concurrent.futures.Future`, so
+that many operations, on many devices, can be in flight at a time:
+
+.. code-block:: python
+
+    from bleak.sync import SyncClient
+
+    with SyncClient(address) as client:
+        futures = [client.read_gatt_char(uuid) for uuid in uuids]
+        values = [f.result() for f in futures]
+
+        client.start_notify(CHAR_UUID).result()
+        while True:
+            for sender, data in client.notifications.get(timeout=1.0):
+                print(sender, data)
+
+Notifications are put in a :py:class:`NotificationQueue`, which collects those
+arriving on the event loop and hands them to the calling thread in batches, one
+per ``interval`` seconds at most, instead of one at a time.
+
+"""
+import asyncio
+import concurrent.futures
+import logging
+import queue
+import threading
+from typing import Any, Awaitable, Callable, List, Tuple, Union
+from uuid import UUID
+
+from bleak.backends.characteristic import BleakGATTCharacteristic
+
+logger = logging.getLogger(__name__)
+
+_default_thread = None
+_default_lock = threading.Lock()
+
+
+class EventLoopThread(object):
+    """An event loop running in a daemon thread.
+
+    Args:
+        name (str): Name of the thread.
+
+    Attributes:
+        loop (asyncio.events.AbstractEventLoop): The event loop of the thread.
+
+    """
+
+    def __init__(self, name: str = "bleak"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """Run a coroutine on the event loop.
+
+        Returns:
+            A :py:class:`concurrent.futures.Future` of its result. Cancelling it
+            cancels the coroutine.
+
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, function: Callable, *args) -> Any:
+        """Call a function on the event loop, and wait for its result."""
+
+        async def _call():
+            return function(*args)
+
+        return self.submit(_call()).result()
+
+    def stop(self, timeout: float = None) -> None:
+        """Stop the event loop and wait for the thread to end."""
+        if self.running:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout)
+
+
+def get_loop_thread() -> EventLoopThread:
+    """The :py:class:`EventLoopThread` shared by default, started if need be."""
+    global _default_thread
+    with _default_lock:
+        if _default_thread is None or not _default_thread.running:
+            _default_thread = EventLoopThread()
+        return _default_thread
+
+
+class NotificationQueue(object):
+    """Notifications collected on an event loop, read in batches from any thread.
+
+    Notifications are added on the event loop with :py:meth:`put`. The first one
+    of a batch schedules its delivery ``interval`` seconds later, or right after
+    the callbacks currently ready on the loop if zero, and the whole batch is
+    then put in a :py:class:`queue.Queue` in one go. A batch reaching
+    ``max_batch`` notifications is delivered at once.
+
+    Args:
+        loop (asyncio.events.AbstractEventLoop): The event loop notifications are
+          added on.
+        interval (float): Seconds notifications are collected before delivery.
+          Defaults to 0.01.
+        max_batch (int): Most notifications in a batch. Defaults to 1024.
+        maxsize (int): Most undelivered batches; further batches are dropped.
+          Zero keeps them all.
+
+    Attributes:
+        batches (int): Batches delivered.
+        dropped (int): Notifications dropped because the queue was full.
+
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        interval: float = 0.01,
+        max_batch: int = 1024,
+        maxsize: int = 0,
+    ):
+        self.loop = loop
+        self.interval = interval
+        self.max_batch = max_batch
+        self.batches = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize)
+        self._pending = []
+        self._handle = None
+
+    def put(self, sender: Union[int, str], data: bytearray, info=None) -> None:
+        """Add a notification. Called on the event loop, e.g. as notification
+        callback. Notifications started with ``extended=True`` are added as
+        ``(sender, data, info)``."""
+        self._pending.append((sender, data) if info is None else (sender, data, info))
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._handle is None:
+            if self.interval > 0:
+                self._handle = self.loop.call_later(self.interval, self.flush)
+            else:
+                self._handle = self.loop.call_soon(self.flush)
+
+    def flush(self) -> None:
+        """Deliver the notifications collected. Called on the event loop."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            self._queue.put_nowait(batch)
+        except queue.Full:
+            self.dropped += len(batch)
+        else:
+            self.batches += 1
+
+    def get(self, block: bool = True, timeout: float = None) -> List[Tuple]:
+        """Take the next batch of notifications.
+
+        Returns:
+            A list of ``(sender, data)`` tuples, in the order they arrived.
+
+        Raises:
+            queue.Empty: If no batch was delivered within ``timeout`` seconds, or
+              at once if not ``block``.
+
+        """
+        return self._queue.get(block, timeout)
+
+    def get_all(self) -> List[Tuple]:
+        """Take all notifications delivered so far, without blocking."""
+        out = []
+        while True:
+            try:
+                out.extend(self._queue.get_nowait())
+            except queue.Empty:
+                return out
+
+
+class SyncClient(object):
+    """A client running on an :py:class:`EventLoopThread`.
+
+    The methods of the client return a :py:class:`concurrent.futures.Future` of
+    the result of the corresponding method of :py:class:`bleak.BleakClient`. The
+    client can be used as context manager, connecting and disconnecting.
+
+    Args:
+        address (str): The address of the device.
+        loop_thread (EventLoopThread): The thread to run on. Defaults to the one
+          of :py:func:`get_loop_thread`.
+        interval (float): Notification batching interval of ``notifications``.
+        client_factory (callable): Called with the address, ``loop`` and the
+          keyword arguments to create the client, on the event loop. Defaults to
+          :py:class:`bleak.BleakClient`.
+        **kwargs: Keyword arguments of the client.
+
+    Attributes:
+        client: The underlying client, only to be used on the event loop.
+        notifications (NotificationQueue): Notifications of all characteristics
+          notifications were started on without a queue of their own.
+
+    """
+
+    def __init__(
+        self,
+        address: str,
+        loop_thread: EventLoopThread = None,
+        interval: float = 0.01,
+        client_factory: Callable = None,
+        **kwargs
+    ):
+        if client_factory is None:
+            from bleak import BleakClient as client_factory
+        self.loop_thread = loop_thread if loop_thread else get_loop_thread()
+        self.loop = self.loop_thread.loop
+        self.client = self.loop_thread.call(
+            lambda: client_factory(address, loop=self.loop, **kwargs)
+        )
+        self.notifications = NotificationQueue(self.loop, interval)
+
+    def __enter__(self):
+        self.connect().result()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.disconnect().result()
+
+    @property
+    def address(self) -> str:
+        return self.client.address
+
+    def _submit(self, method: str, *args, **kwargs) -> concurrent.futures.Future:
+        return self.loop_thread.submit(getattr(self.client, method)(*args, **kwargs))
+
+    def connect(self, **kwargs) -> concurrent.futures.Future:
+        return self._submit("connect", **kwargs)
+
+    def disconnect(self) -> concurrent.futures.Future:
+        return self._submit("disconnect")
+
+    def is_connected(self) -> concurrent.futures.Future:
+        return self._submit("is_connected")
+
+    def get_services(self) -> concurrent.futures.Future:
+        return self._submit("get_services")
+
+    def read_gatt_char(
+        self, char_specifier: Union[BleakGATTCharacteristic, int, str, UUID], **kwargs
+    ) -> concurrent.futures.Future:
+        return self._submit("read_gatt_char", char_specifier, **kwargs)
+
+    def read_gatt_descriptor(self, handle: int, **kwargs) -> concurrent.futures.Future:
+        return self._submit("read_gatt_descriptor", handle, **kwargs)
+
+    def write_gatt_char(
+        self,
+        char_specifier: Union[BleakGATTCharacteristic, int, str, UUID],
+        data: bytearray,
+        response: bool = False,
+        **kwargs
+    ) -> concurrent.futures.Future:
+        return self._submit("write_gatt_char", char_specifier, data, response, **kwargs)
+
+    def write_gatt_descriptor(
+        self, handle: int, data: bytearray, **kwargs
+    ) -> concurrent.futures.Future:
+        return self._submit("write_gatt_descriptor", handle, data, **kwargs)
+
+    def start_notify(
+        self,
+        char_specifier: Union[BleakGATTCharacteristic, int, str, UUID],
+        notifications: NotificationQueue = None,
+        **kwargs
+    ) -> concurrent.futures.Future:
+        """Start notifications, put in ``notifications``, or the client's
+        :py:attr:`notifications` if not given."""
+        if notifications is None:
+            notifications = self.notifications
+        return self._submit("start_notify", char_specifier, notifications.put, **kwargs)
+
+    def stop_notify(
+        self, char_specifier: Union[BleakGATTCharacteristic, int, str, UUID], **kwargs
+    ) -> concurrent.futures.Future:
+        return self._submit("stop_notify", char_specifier, **kwargs)
+
+
+def discover(
+    timeout: float = 5.0, loop_thread: EventLoopThread = None, **kwargs
+) -> concurrent.futures.Future:
+    """Scan for devices on an :py:class:`EventLoopThread`.
+
+    Returns:
+        A :py:class:`concurrent.futures.Future` of the list of devices found.
+
+    """
+    from bleak import discover as _discover
+
+    loop_thread = loop_thread if loop_thread else get_loop_thread()
+    return loop_thread.submit(
+        _discover(timeout=timeout, loop=loop_thread.loop, **kwargs)
+    )
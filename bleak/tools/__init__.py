@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+Command line tools for qualifying devices and gateways.
+
+Each tool is a module with a ``main`` function, run with ``python -m``, e.g.
+``python -m bleak.tools.latency``, or its console script.
+
+"""
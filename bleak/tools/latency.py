@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+Round-trip latency of a command written to a device and its notified response.
+
+Each round trip writes a request to one characteristic and waits for the
+response notified on another. The latency is measured from just before the write
+until the notification was received, as timestamped by the backend when it
+supports ``extended`` notification callbacks, which excludes the time the
+callback waited for the event loop:
+
+.. code-block:: python
+
+    async with BleakClient(address) as client:
+        result = await measure_latency(client, REQUEST_UUID, RESPONSE_UUID, count=1000)
+    print(result.summary())
+
+With ``concurrency`` above 1, several requests are in flight at a time. Responses
+are then matched to requests in the order the requests were written, unless a
+``key`` function tells which request a response belongs to, e.g. from a sequence
+number the device echoes back; see ``--tagged`` of the command line tool::
+
+    bleak-latency AA:BB:CC:DD:EE:FF --write <uuid> --notify <uuid> -n 1000 -c 4
+    bleak-latency --mock --notification-latency 0.005 -n 1000
+
+``--mock`` runs against :py:class:`bleak.backends.bluezdbus.mock.MockBlueZ` on a
+private D-Bus daemon instead of a device, using its echo characteristics.
+
+"""
+import argparse
+import asyncio
+import collections
+import json
+import logging
+import math
+import struct
+import sys
+import time
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+def _default_payload(index: int) -> bytes:
+    return struct.pack(">H", index % 0x10000)
+
+
+def _tag(data: bytearray) -> int:
+    return struct.unpack_from(">H", bytes(data))[0]
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    """The ``p`` th percentile of sorted values, by the nearest-rank method."""
+    if not ordered:
+        return float("nan")
+    rank = max(1, int(math.ceil(p / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+class LatencyResult(object):
+    """Round-trip latencies measured by :py:func:`measure_latency`.
+
+    Attributes:
+        samples (list): Latency of each completed round trip, in seconds, in the
+          order they were started.
+        timeouts (int): Round trips without a response in time.
+        errors (int): Round trips whose write failed.
+        elapsed (float): Seconds the measurement took.
+
+    """
+
+    def __init__(self):
+        self.samples = []
+        self.timeouts = 0
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def summary(self) -> dict:
+        """Count, percentiles, maximum and jitter of the latencies, in seconds.
+
+        The jitter is the mean absolute difference between successive latencies,
+        as for RTP (RFC 3550), and ``stdev`` their standard deviation.
+
+        """
+        samples = self.samples
+        ordered = sorted(samples)
+        n = len(samples)
+        mean = sum(samples) / n if n else float("nan")
+        diffs = [abs(b - a) for a, b in zip(samples, samples[1:])]
+        return {
+            "count": n,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "round_trips_per_sec": n / self.elapsed if self.elapsed > 0 else 0.0,
+            "min": ordered[0] if n else float("nan"),
+            "mean": mean,
+            "p50": percentile(ordered, 50),
+            "p95": percentile(ordered, 95),
+            "p99": percentile(ordered, 99),
+            "max": ordered[-1] if n else float("nan"),
+            "jitter": sum(diffs) / len(diffs) if diffs else 0.0,
+            "stdev": math.sqrt(sum((s - mean) ** 2 for s in samples) / (n - 1))
+            if n > 1
+            else 0.0,
+        }
+
+
+async def measure_latency(
+    client,
+    write_uuid: str,
+    notify_uuid: str,
+    count: int = 100,
+    concurrency: int = 1,
+    payload: Callable[[int], bytes] = _default_payload,
+    key: Callable[[bytearray], int] = None,
+    response: bool = True,
+    timeout: float = 5.0,
+) -> LatencyResult:
+    """Measure round trips from a write to the response notification.
+
+    Args:
+        client: A connected client.
+        write_uuid (str): The characteristic requests are written to.
+        notify_uuid (str): The characteristic responses are notified on.
+        count (int): Round trips to make. Defaults to 100.
+        concurrency (int): Round trips in flight at a time. Defaults to 1.
+        payload (callable): Called with the index of a round trip, returns the
+          request to write. Defaults to the index as 16-bit big-endian integer.
+        key (callable): Called with a response, returns the index, modulo 65536,
+          of the round trip it answers. Responses are matched to requests in order
+          if not given.
+        response (bool): Write with response. Defaults to ``True``.
+        timeout (float): Seconds to wait for a response. Defaults to 5.0.
+
+    Returns:
+        A :py:class:`LatencyResult`.
+
+    """
+    loop = asyncio.get_event_loop()
+    result = LatencyResult()
+    # Futures of the round trips in flight, in the order they were written, or by
+    # their index when responses are matched by key.
+    in_order = collections.deque()
+    by_key = {}
+    indices = iter(range(count))
+
+    def _on_response(sender, data, info=None):
+        received_at = info.timestamp if info is not None else time.monotonic()
+        if key is not None:
+            future = by_key.pop(key(data) % 0x10000, None)
+        else:
+            future = in_order.popleft() if in_order else None
+        if future is None:
+            logger.debug("Unexpected response: {0}".format(data))
+        elif not future.done():
+            future.set_result(received_at)
+
+    async def _round_trips():
+        for index in indices:
+            future = loop.create_future()
+            if key is not None:
+                by_key[index % 0x10000] = future
+            else:
+                in_order.append(future)
+            start = time.monotonic()
+            try:
+                await client.write_gatt_char(write_uuid, payload(index), response)
+                received_at = await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                result.timeouts += 1
+                _forget(future, index)
+            except Exception as e:
+                logger.debug("Round trip {0} failed: {1}".format(index, e))
+                result.errors += 1
+                _forget(future, index)
+            else:
+                result.samples.append(received_at - start)
+
+    def _forget(future, index):
+        if key is not None:
+            by_key.pop(index % 0x10000, None)
+        elif future in in_order:
+            in_order.remove(future)
+
+    await client.start_notify(notify_uuid, _on_response, extended=True)
+    t = time.monotonic()
+    try:
+        await asyncio.gather(*(_round_trips() for _ in range(max(1, concurrency))))
+    finally:
+        result.elapsed = time.monotonic() - t
+        await client.stop_notify(notify_uuid)
+    return result
+
+
+async def _run(args, loop) -> dict:
+    from bleak import BleakClient
+
+    key = _tag if args.tagged else None
+    if args.payload:
+        template = bytes.fromhex(args.payload)
+
+        def payload(index):
+            return (_default_payload(index) + template[2:]) if args.tagged else template
+
+    else:
+
+        def payload(index):
+            return _default_payload(index) + bytes(max(0, args.size - 2))
+
+    async with BleakClient(args.address, loop=loop, device=args.adapter) as client:
+        result = await measure_latency(
+            client,
+            args.write,
+            args.notify,
+            count=args.count,
+            concurrency=args.concurrency,
+            payload=payload,
+            key=key,
+            response=not args.no_response,
+            timeout=args.timeout,
+        )
+    return result.summary()
+
+
+async def _run_mock(args, loop) -> dict:
+    from bleak.backends.bluezdbus.mock import (
+        ECHO_NOTIFY_UUID,
+        ECHO_WRITE_UUID,
+        MockBlueZ,
+        PrivateBus,
+    )
+
+    with PrivateBus() as bus:
+        bus.set_as_system_bus()
+        mock = MockBlueZ(
+            bus.address,
+            loop,
+            latency=args.call_latency,
+            notification_latency=args.notification_latency,
+        )
+        await mock.start()
+        args.address = mock.add_device().address
+        args.write, args.notify = ECHO_WRITE_UUID, ECHO_NOTIFY_UUID
+        try:
+            return await _run(args, loop)
+        finally:
+            await mock.stop()
+
+
+def _print_summary(summary: dict) -> None:
+    print(
+        "{0} round trips, {1} timeouts, {2} errors, {3:.1f} per second".format(
+            summary["count"],
+            summary["timeouts"],
+            summary["errors"],
+            summary["round_trips_per_sec"],
+        )
+    )
+    for name in ("min", "mean", "p50", "p95", "p99", "max", "jitter", "stdev"):
+        print("{0:>8}: {1:9.3f} ms".format(name, summary[name] * 1e3))
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="bleak-latency", description=__doc__.strip().split("\n")[0]
+    )
+    parser.add_argument("address", nargs="?", help="Address of the device")
+    parser.add_argument("--write", help="UUID of the request characteristic")
+    parser.add_argument("--notify", help="UUID of the response characteristic")
+    parser.add_argument("-i", dest="adapter", default="hci0", help="HCI device")
+    parser.add_argument("-n", dest="count", type=int, default=100, help="Round trips")
+    parser.add_argument(
+        "-c", dest="concurrency", type=int, default=1, help="Round trips in flight"
+    )
+    parser.add_argument("--payload", help="Request as hexadecimal bytes")
+    parser.add_argument(
+        "--size", type=int, default=2, help="Request size, if no payload is given"
+    )
+    parser.add_argument(
+        "--tagged",
+        action="store_true",
+        help="Requests start with a 16-bit sequence number the response echoes",
+    )
+    parser.add_argument(
+        "--no-response", action="store_true", help="Write without response"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=5.0, help="Seconds to wait for a response"
+    )
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    parser.add_argument(
+        "--mock", action="store_true", help="Run against a BlueZ stand-in"
+    )
+    parser.add_argument(
+        "--call-latency",
+        type=float,
+        default=0.0,
+        help="Seconds the stand-in takes to reply to method calls",
+    )
+    parser.add_argument(
+        "--notification-latency",
+        type=float,
+        default=0.0,
+        help="Seconds from a write until the stand-in notifies it back",
+    )
+    args = parser.parse_args(argv)
+    if not args.mock and not (args.address and args.write and args.notify):
+        parser.error("address, --write and --notify are required without --mock")
+
+    logging.getLogger("bleak").setLevel(logging.WARNING)
+    loop = asyncio.get_event_loop()
+    summary = loop.run_until_complete(
+        _run_mock(args, loop) if args.mock else _run(args, loop)
+    )
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        _print_summary(summary)
+    return 0 if summary["count"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+Tracing of backend calls.
+
+A tracer gets its :py:meth:`Tracer.start` and :py:meth:`Tracer.finish` hooks called
+around every D-Bus method call made by the BlueZ client and scanner, and around
+connecting and service discovery. Tracers are given to a client or scanner with
+the ``tracer`` keyword argument, or installed for all of them with
+:py:func:`set_tracer`. Without a tracer, nothing is done.
+
+:py:class:`ChromeTracer` records the calls as
+`Chrome trace events <https://docs.google.com/document/d/1CvAClvFfyA5R-PhYUmn5OOQtYMH4h6I0nSsKchNAySU>`_,
+for viewing in ``chrome://tracing`` or `Perfetto <https://ui.perfetto.dev>`_:
+
+.. code-block:: python
+
+    tracer = ChromeTracer()
+    set_tracer(tracer)
+    async with BleakClient(address) as client:
+        await client.read_gatt_char(MODEL_NBR_UUID)
+    tracer.save("connect.json")
+
+"""
+import json
+import os
+import threading
+import time
+
+_tracer = None
+
+
+class Tracer(object):
+    """Base class of tracers, with hooks doing nothing."""
+
+    def start(self, method: str, path: str):
+        """Called when a call starts.
+
+        Args:
+            method (str): D-Bus method name, or ``connect`` or ``get_services``.
+            path (str): D-Bus object path the method is called on.
+
+        Returns:
+            Any object, which is passed back to :py:meth:`finish`.
+
+        """
+        return None
+
+    def finish(
+        self, span, method: str, path: str, elapsed: float, error: Exception = None
+    ) -> None:
+        """Called when a call has finished.
+
+        Args:
+            span: The object returned by :py:meth:`start`.
+            method (str): D-Bus method name, or ``connect`` or ``get_services``.
+            path (str): D-Bus object path the method is called on.
+            elapsed (float): Duration of the call in seconds.
+            error (Exception): The exception raised by the call, if any.
+
+        """
+        pass
+
+
+def set_tracer(tracer: Tracer) -> None:
+    """Install a tracer for all clients and scanners not given one explicitly.
+
+    Args:
+        tracer (Tracer): The tracer, or ``None`` to remove it.
+
+    """
+    global _tracer
+    _tracer = tracer
+
+
+def get_tracer() -> Tracer:
+    """Get the installed tracer, or ``None``."""
+    return _tracer
+
+
+class _Span(object):
+    """Context manager tracing a block of code."""
+
+    def __init__(self, tracer, method, path):
+        self._tracer = tracer
+        self._method = method
+        self._path = path
+
+    def __enter__(self):
+        if self._tracer is not None:
+            self._span = self._tracer.start(self._method, self._path)
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._tracer is not None:
+            self._tracer.finish(
+                self._span,
+                self._method,
+                self._path,
+                time.perf_counter() - self._start,
+                exc_val,
+            )
+
+
+def span(tracer: Tracer, method: str, path: str) -> _Span:
+    """Trace a block of code with a tracer, or the installed one if ``None``."""
+    return _Span(tracer if tracer is not None else _tracer, method, path)
+
+
+class ChromeTracer(Tracer):
+    """Records calls as complete ("X") events of the Chrome trace event format.
+
+    Overlapping calls, e.g. concurrent reads or the calls made while connecting,
+    are put on separate rows, as thread ids of the events.
+
+    Args:
+        max_events (int): Maximum number of events kept. Later events are
+          counted in ``dropped``. Defaults to 1000000.
+
+    """
+
+    def __init__(self, max_events: int = 1000000):
+        self.events = []
+        self.max_events = max_events
+        self.dropped = 0
+        self._start = time.perf_counter()
+        self._lanes = []
+        self._lock = threading.Lock()
+
+    def start(self, method, path):
+        with self._lock:
+            try:
+                lane = self._lanes.index(False)
+                self._lanes[lane] = True
+            except ValueError:
+                lane = len(self._lanes)
+                self._lanes.append(True)
+        return lane, time.perf_counter()
+
+    def finish(self, span, method, path, elapsed, error=None):
+        lane, start = span
+        args = {"path": path}
+        if error is not None:
+            args["error"] = "{0}: {1}".format(type(error).__name__, error)
+        with self._lock:
+            self._lanes[lane] = False
+            if len(self.events) >= self.max_events:
+                self.dropped += 1
+                return
+            self.events.append(
+                {
+                    "name": method,
+                    "cat": "dbus" if method[:1].isupper() else "bleak",
+                    "ph": "X",
+                    "ts": (start - self._start) * 1e6,
+                    "dur": elapsed * 1e6,
+                    "pid": os.getpid(),
+                    "tid": lane,
+                    "args": args,
+                }
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self.events = []
+            self.dropped = 0
+
+    def to_dict(self) -> dict:
+        """The recorded trace, as the JSON object format of Chrome traces."""
+        with self._lock:
+            return {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+
+    def save(self, f) -> None:
+        """Write the recorded trace as JSON.
+
+        Args:
+            f (str or file): Path or text file object to write to.
+
+        """
+        if hasattr(f, "write"):
+            json.dump(self.to_dict(), f)
+        else:
+            with open(str(f), "w") as fp:
+                json.dump(self.to_dict(), fp)
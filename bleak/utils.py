@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import sys
 
 
 def mac_str_2_int(mac):
@@ -26,3 +27,20 @@ def mac_int_2_str(mac):
     """
     m = hex(mac)[2:].upper().zfill(12)
     return ":".join([m[i : i + 2] for i in range(0, 12, 2)])
+
+
+def loop_kwargs(loop) -> dict:
+    """Keyword arguments binding an asyncio queue, event, lock or semaphore to a loop.
+
+    Before Python 3.10 these bind to the event loop given as ``loop``, or else to
+    the current one when they are created. Later versions removed the argument
+    and bind them to the loop they are first used on.
+
+    Args:
+        loop (asyncio.AbstractEventLoop): The event loop to bind to.
+
+    Returns:
+        ``{"loop": loop}``, or an empty dict on Python 3.10 and later.
+
+    """
+    return {"loop": loop} if sys.version_info < (3, 10) else {}
@@ -30,26 +30,26 @@ async def run(address, loop, debug=False):
         x = await client.is_connected()
         log.info("Connected: {0}".format(x))
 
-        for service in client.services:
-            log.info("[Service] {0}: {1}".format(service.uuid, service.description))
-            for char in service.characteristics:
-                if "read" in char.properties:
-                    try:
-                        value = bytes(await client.read_gatt_char(char.uuid))
-                    except Exception as e:
-                        value = str(e).encode()
-                else:
-                    value = None
+        gatt = await client.dump_gatt()
+        for service in gatt["services"]:
+            log.info(
+                "[Service] {0}: {1}".format(service["uuid"], service["description"])
+            )
+            for char in service["characteristics"]:
                 log.info(
                     "\t[Characteristic] {0}: ({1}) | Name: {2}, Value: {3} ".format(
-                        char.uuid, ",".join(char.properties), char.description, value
+                        char["uuid"],
+                        ",".join(char["properties"]),
+                        char["description"],
+                        char["error"] or char["value"],
                     )
                 )
-                for descriptor in char.descriptors:
-                    value = await client.read_gatt_descriptor(descriptor.handle)
+                for descriptor in char["descriptors"]:
                     log.info(
                         "\t\t[Descriptor] {0}: (Handle: {1}) | Value: {2} ".format(
-                            descriptor.uuid, descriptor.handle, bytes(value)
+                            descriptor["uuid"],
+                            descriptor["handle"],
+                            descriptor["error"] or descriptor["value"],
                         )
                     )
 
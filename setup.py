@@ -28,6 +28,13 @@ REQUIRED = [
     'pythonnet;platform_system=="Windows"',
 ]
 
+EXTRAS_REQUIRED = {
+    # Columnar advertisement telemetry, bleak.sinks.ringbuffer
+    "numpy": ["numpy"],
+    # CBOR encoded GATT snapshots, bleak.backends.snapshot
+    "cbor": ["cbor2"],
+}
+
 TEST_REQUIRED = ["pytest", "pytest-cov"]
 
 here = os.path.abspath(os.path.dirname(__file__))
@@ -86,8 +93,15 @@ setup(
     url=URL,
     packages=find_packages(exclude=("tests", "examples", "docs", "BleakUWPBridge")),
     package_data={"bleak.backends.dotnet": ["*.dll"]},
-    entry_points={"console_scripts": ["bleak-lescan=bleak:cli"]},
+    entry_points={
+        "console_scripts": [
+            "bleak-lescan=bleak:cli",
+            "bleak-latency=bleak.tools.latency:main",
+            "bleak-scand=bleak.scand:main",
+        ]
+    },
     install_requires=REQUIRED,
+    extras_require=EXTRAS_REQUIRED,
     test_suite="tests",
     tests_require=TEST_REQUIRED,
     include_package_data=True,
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.bluezdbus.aiodbus` package."""
+
+import asyncio
+import os
+import platform
+import shutil
+
+import pytest
+
+from bleak.backends.bluezdbus.aiodbus import Variant, parse_message
+from bleak.backends.bluezdbus.aiodbus.marshal import (
+    generic_decoder,
+    managed_objects_decoder,
+    marshal,
+    unmarshal,
+)
+from bleak.backends.bluezdbus.aiodbus.message import SIGNAL, Message
+
+
+def test_marshal_round_trip():
+    signature = "a{sv}ayoa(yv)"
+    values = [
+        {"RSSI": Variant("n", -70), "UUIDs": ["180a"], "Paired": False},
+        b"\x01\x02",
+        "/org/bluez/hci0",
+        [(1, "a"), (2, 2.5)],
+    ]
+    data = marshal(signature, values)
+    decoded, offset = unmarshal(signature, bytes(data))
+    assert offset == len(data)
+    assert decoded == [
+        {"RSSI": -70, "UUIDs": ["180a"], "Paired": False},
+        b"\x01\x02",
+        "/org/bluez/hci0",
+        [[1, "a"], [2, 2.5]],
+    ]
+
+
+def test_specialised_decoders():
+    objects = {
+        "/org/bluez/hci0": {"org.bluez.Adapter1": {"Powered": True}},
+        "/org/bluez/hci0/dev_AA_BB_CC_DD_EE_FF": {
+            "org.freedesktop.DBus.Introspectable": {},
+            "org.bluez.Device1": {
+                "Address": "AA:BB:CC:DD:EE:FF",
+                "RSSI": Variant("n", -60),
+                "ManufacturerData": Variant("a{qv}", {76: Variant("ay", b"\x02")}),
+                "UUIDs": ["0000180a-0000-1000-8000-00805f9b34fb"],
+                "Paired": False,
+            },
+        },
+    }
+    data = bytes(marshal("a{oa{sa{sv}}}", [objects]))
+    signature = "a{oa{sa{sv}}}"
+    (decoded,), _ = unmarshal(signature, data)
+    assert decoded == generic_decoder(signature)(data, 0, ())[0]
+    assert decoded["/org/bluez/hci0/dev_AA_BB_CC_DD_EE_FF"]["org.bluez.Device1"][
+        "ManufacturerData"
+    ] == {76: b"\x02"}
+
+    filtered, offset = managed_objects_decoder(
+        interfaces=["org.bluez.Device1"], keys=["Address", "RSSI"]
+    )(data, 0, ())
+    assert offset == len(data)
+    assert filtered == {
+        "/org/bluez/hci0/dev_AA_BB_CC_DD_EE_FF": {
+            "org.bluez.Device1": {"Address": "AA:BB:CC:DD:EE:FF", "RSSI": -60}
+        }
+    }
+
+
+def test_message_round_trip():
+    message = Message(
+        SIGNAL,
+        path="/org/bluez/hci0/dev_AA_BB_CC_DD_EE_FF",
+        interface="org.freedesktop.DBus.Properties",
+        member="PropertiesChanged",
+        signature="sa{sv}as",
+        body=["org.bluez.Device1", {"RSSI": Variant("n", -40)}, []],
+    )
+    data, fds = message.to_bytes(7)
+    parsed = parse_message(bytes(data))
+    assert fds == []
+    assert parsed.serial == 7
+    assert parsed.path == message.path
+    assert parsed.member == "PropertiesChanged"
+    assert parsed.body == ["org.bluez.Device1", {"RSSI": -40}, []]
+
+
+def test_parse_message_lookups():
+    from bleak.backends.bluezdbus.scanner import _interfaces_added_lookup
+
+    path = "/org/bluez/hci0/dev_AA_BB_CC_DD_EE_FF"
+    message = Message(
+        SIGNAL,
+        path="/",
+        interface="org.freedesktop.DBus.ObjectManager",
+        member="InterfacesAdded",
+        signature="oa{sa{sv}}",
+        body=[
+            path,
+            {
+                "org.bluez.Device1": {"RSSI": Variant("n", -40)},
+                "org.bluez.Battery1": {"Percentage": Variant("y", 90)},
+            },
+        ],
+    )
+    data = bytes(message.to_bytes(1)[0])
+    lookups = {
+        ("org.freedesktop.DBus.ObjectManager", "InterfacesAdded"): (
+            _interfaces_added_lookup
+        )
+    }
+    assert parse_message(data, (), lookups).body == [
+        path,
+        {"org.bluez.Device1": {"RSSI": -40}},
+    ]
+    assert len(parse_message(data).body[1]) == 2
+
+
+@pytest.mark.skipif(
+    platform.system() != "Linux" or shutil.which("dbus-daemon") is None,
+    reason="Requires Linux and dbus-daemon.",
+)
+def test_call_and_signal():
+    from bleak.backends.bluezdbus.aiodbus import connect
+    from bleak.backends.bluezdbus.mock import PrivateBus
+    from bleak.exc import BleakDBusError
+
+    async def _test(address):
+        bus = await connect(address)
+        other = await connect(address)
+        received = []
+        await bus.add_match(
+            received.append, interface="org.bleak.Test", path_namespace="/org"
+        )
+        other.send(
+            Message(
+                SIGNAL,
+                path="/org/bleak",
+                interface="org.bleak.Test",
+                member="Hello",
+                signature="s",
+                body=["hi"],
+            )
+        )
+        for _ in range(100):
+            if received:
+                break
+            await asyncio.sleep(0.01)
+        names = await bus.call_remote(
+            "/org/freedesktop/DBus",
+            "ListNames",
+            interface="org.freedesktop.DBus",
+            destination="org.freedesktop.DBus",
+        )
+        with pytest.raises(BleakDBusError) as e:
+            await bus.call_remote(
+                "/",
+                "Missing",
+                interface="org.bleak.Test",
+                destination=other.unique_name,
+            )
+        bus.disconnect()
+        other.disconnect()
+        return names, received, e.value
+
+    loop = asyncio.new_event_loop()
+    with PrivateBus() as private_bus:
+        names, received, error = loop.run_until_complete(_test(private_bus.address))
+    loop.close()
+
+    assert "org.freedesktop.DBus" in names
+    assert [m.body for m in received] == [["hi"]]
+    assert error.dbus_error == "org.freedesktop.DBus.Error.UnknownMethod"
+
+
+@pytest.mark.skipif(
+    platform.system() != "Linux" or shutil.which("dbus-daemon") is None,
+    reason="Requires Linux and dbus-daemon.",
+)
+def test_signal_hooks_and_fds():
+    from bleak.backends.bluezdbus.aiodbus import connect
+    from bleak.backends.bluezdbus.mock import PrivateBus
+
+    def _hook(raw):
+        hooked.append(raw)
+        raise OSError("Capture file full")
+
+    async def _test(address):
+        bus = await connect(address)
+        other = await connect(address)
+        bus.add_signal_hook(_hook)
+        await bus.add_match(received.append, interface="org.bleak.Test")
+        r, w = os.pipe()
+        for body in ([r], [r]):
+            other.send(
+                Message(
+                    SIGNAL,
+                    path="/org/bleak",
+                    interface="org.bleak.Test",
+                    member="Pipe",
+                    signature="h",
+                    body=body,
+                )
+            )
+        for _ in range(100):
+            if len(received) == 2:
+                break
+            await asyncio.sleep(0.01)
+        fds = [m.body[0] for m in received]
+        closed = []
+        for fd in fds:
+            try:
+                os.fstat(fd)
+            except OSError:
+                closed.append(fd)
+        os.close(r)
+        os.close(w)
+        bus.disconnect()
+        other.disconnect()
+        return fds, closed
+
+    hooked = []
+    received = []
+    loop = asyncio.new_event_loop()
+    with PrivateBus() as private_bus:
+        fds, closed = loop.run_until_complete(_test(private_bus.address))
+    loop.close()
+
+    # Dispatching went on after the hook raised.
+    assert len(hooked) == 2 and len(received) == 2
+    # The file descriptors received with the signals were closed.
+    assert all(fd >= 0 for fd in fds) and closed == fds
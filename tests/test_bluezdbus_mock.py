@@ -0,0 +1,621 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests of the BlueZ backend against `bleak.backends.bluezdbus.mock`."""
+
+import asyncio
+import platform
+import shutil
+
+import pytest
+
+pytestmark = pytest.mark.skipif(
+    platform.system() != "Linux" or shutil.which("dbus-daemon") is None,
+    reason="Requires Linux and dbus-daemon.",
+)
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+
+
+@pytest.fixture
+def mock_bluez():
+    from bleak.backends.bluezdbus.mock import MockBlueZ, PrivateBus
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    with PrivateBus() as bus:
+        bus.set_as_system_bus()
+        mock = MockBlueZ(bus.address, loop, advertisement_rate=500.0)
+        loop.run_until_complete(mock.start())
+        mock.add_devices(10)
+        mock.add_device(address=ADDRESS)
+        yield loop, mock
+        loop.run_until_complete(mock.stop())
+    loop.close()
+    asyncio.set_event_loop(None)
+
+
+def test_find_device(mock_bluez):
+    from bleak.backends.bluezdbus.scanner import BleakScannerBlueZDBus
+
+    loop, mock = mock_bluez
+    device = loop.run_until_complete(
+        BleakScannerBlueZDBus.find_device_by_address(ADDRESS, timeout=5.0, loop=loop)
+    )
+    assert device is not None
+    assert device.address == ADDRESS
+    assert mock.calls["StartDiscovery"] == 1
+
+
+def test_failing_sink(mock_bluez):
+    from bleak.backends.bluezdbus.scanner import BleakScannerBlueZDBus
+    from bleak.sinks import BaseScannerSink
+
+    class _Sink(BaseScannerSink):
+        def __init__(self, fail):
+            self.fail = fail
+            self.addresses = set()
+
+        def add(self, timestamp, address, name, rssi, manufacturer_data, uuids):
+            if self.fail:
+                raise RuntimeError("Sink failed")
+            self.addresses.add(address)
+
+    loop, mock = mock_bluez
+    failing, sink = _Sink(True), _Sink(False)
+    scanner = BleakScannerBlueZDBus(loop=loop)
+    scanner.register_sink(failing)
+    scanner.register_sink(sink)
+    detected = []
+    scanner.register_detection_callback(detected.append)
+
+    async def run():
+        async with scanner:
+            await asyncio.sleep(0.3)
+
+    loop.run_until_complete(run())
+    # The sinks after the failing one and the detection callback still get all.
+    assert ADDRESS in sink.addresses and detected
+
+
+def test_discover(mock_bluez):
+    from bleak.backends.bluezdbus.discovery import discover
+
+    loop, mock = mock_bluez
+    devices = loop.run_until_complete(discover(timeout=0.5, loop=loop))
+    assert sorted(d.address for d in devices) == sorted(
+        d.address for d in mock.devices
+    )
+    assert (mock.calls["StartDiscovery"], mock.calls["StopDiscovery"]) == (1, 1)
+
+
+def test_connect_read_write_notify(mock_bluez):
+    from bleak.backends.bluezdbus.client import BleakClientBlueZDBus
+    from bleak.backends.bluezdbus.mock import ECHO_NOTIFY_UUID, ECHO_WRITE_UUID
+
+    loop, mock = mock_bluez
+    client = BleakClientBlueZDBus(ADDRESS, loop=loop)
+    notifications = []
+
+    async def run():
+        assert await client.connect(timeout=5.0)
+        try:
+            model = await client.read_gatt_char("00002a24-0000-1000-8000-00805f9b34fb")
+            await client.start_notify(
+                ECHO_NOTIFY_UUID, lambda sender, data: notifications.append(data)
+            )
+            await client.write_gatt_char(ECHO_WRITE_UUID, bytearray(b"ping"), True)
+            for _ in range(100):
+                if notifications:
+                    break
+                await asyncio.sleep(0.01)
+            await client.stop_notify(ECHO_NOTIFY_UUID)
+        finally:
+            await client.disconnect()
+        return model
+
+    assert loop.run_until_complete(run()) == b"Mock Model"
+    assert notifications == [b"ping"]
+    assert not mock.device(ADDRESS).connected
+
+
+def test_reconnect(mock_bluez):
+    from bleak.backends.bluezdbus.client import BleakClientBlueZDBus
+    from bleak.backends.bluezdbus.mock import ECHO_NOTIFY_UUID, ECHO_WRITE_UUID
+    from bleak.reconnect import Backoff
+
+    loop, mock = mock_bluez
+    client = BleakClientBlueZDBus(
+        ADDRESS, loop=loop, reconnect=Backoff(initial=0.05, jitter=0.0)
+    )
+    notifications = []
+    incidents = []
+    client.set_incident_callback(lambda c, incident: incidents.append(incident))
+
+    async def run():
+        assert await client.connect(timeout=5.0)
+        try:
+            await client.start_notify(
+                ECHO_NOTIFY_UUID, lambda sender, data: notifications.append(data)
+            )
+            calls = client.metrics.counters["dbus_calls"]
+            get_managed_objects = calls["GetManagedObjects"]
+            mock.disconnect_device(ADDRESS)
+            for _ in range(200):
+                if incidents:
+                    break
+                await asyncio.sleep(0.01)
+            await client.write_gatt_char(ECHO_WRITE_UUID, bytearray(b"ping"), True)
+            for _ in range(100):
+                if notifications:
+                    break
+                await asyncio.sleep(0.01)
+            # The cached services were reused.
+            assert calls["GetManagedObjects"] == get_managed_objects
+        finally:
+            await client.disconnect()
+
+    loop.run_until_complete(run())
+    assert notifications == [b"ping"]
+    assert len(incidents) == 1
+    assert incidents[0].reconnected and incidents[0].restored == 1
+    assert incidents[0].downtime >= 0.05
+    assert client.metrics.as_dict()["counters"]["reconnects"] == 1
+
+
+def test_reconnect_gives_up(mock_bluez):
+    from bleak.backends.bluezdbus.client import BleakClientBlueZDBus
+    from bleak.reconnect import Backoff
+
+    loop, mock = mock_bluez
+    client = BleakClientBlueZDBus(
+        ADDRESS,
+        loop=loop,
+        reconnect=Backoff(initial=0.01, jitter=0.0, max_attempts=1, timeout=0.1),
+    )
+    incidents = []
+    client.set_incident_callback(lambda c, incident: incidents.append(incident))
+    disconnected = asyncio.Event()
+    client.set_disconnected_callback(lambda c, *args: disconnected.set())
+
+    async def run():
+        assert await client.connect(timeout=5.0)
+        # The Connect call of the attempt hangs and times out.
+        mock.latencies["Connect"] = 5.0
+        mock.disconnect_device(ADDRESS)
+        await asyncio.wait_for(disconnected.wait(), 2.0)
+        assert not incidents[0].reconnected
+        assert isinstance(incidents[0].error, asyncio.TimeoutError)
+
+        # An unexpected error while reconnecting tears the client down as well.
+        async def _reconnect():
+            raise RuntimeError("unexpected")
+
+        mock.latencies.pop("Connect")
+        assert await client.connect(timeout=5.0)
+        client._reconnect = _reconnect
+        disconnected.clear()
+        mock.disconnect_device(ADDRESS)
+        await asyncio.wait_for(disconnected.wait(), 2.0)
+        assert client._rules == {}
+
+    loop.run_until_complete(run())
+    assert len(incidents) == 1
+
+
+def test_mtu_and_long_writes(mock_bluez):
+    from bleak.backends.bluezdbus.client import BleakClientBlueZDBus
+    from bleak.backends.bluezdbus.mock import ECHO_NOTIFY_UUID, ECHO_WRITE_UUID
+    from bleak.exc import BleakError
+
+    loop, mock = mock_bluez
+    client = BleakClientBlueZDBus(ADDRESS, loop=loop)
+    notifications = []
+    data = bytes(range(256)) * 4
+
+    async def run():
+        assert await client.connect(timeout=5.0)
+        try:
+            await client.start_notify(
+                ECHO_NOTIFY_UUID, lambda sender, data: notifications.append(data)
+            )
+            await client.write_gatt_char(ECHO_WRITE_UUID, data, False)
+            await client.write_gatt_char(ECHO_WRITE_UUID, data[:512], True)
+            with pytest.raises(BleakError):
+                await client.write_gatt_char(ECHO_WRITE_UUID, data, True)
+            for _ in range(100):
+                if sum(map(len, notifications)) == len(data) + 512:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await client.disconnect()
+
+    loop.run_until_complete(run())
+    assert client.mtu_size == 247
+    assert [len(n) for n in notifications] == [244] * 4 + [48] + [512]
+    assert b"".join(notifications) == data + data[:512]
+
+
+def test_cached_device_properties(mock_bluez):
+    from bleak.backends.bluezdbus import defs
+    from bleak.backends.bluezdbus.client import BleakClientBlueZDBus
+
+    loop, mock = mock_bluez
+    device = mock.add_device(address="11:22:33:44:55:66", battery=80)
+    client = BleakClientBlueZDBus(device.address, loop=loop)
+    battery_level = "00002a19-0000-1000-8000-00805f9b34fb"
+
+    async def run():
+        assert await client.connect(timeout=5.0)
+        try:
+            calls = client.metrics.counters["dbus_calls"]
+            levels = [await client.read_gatt_char(battery_level)]
+            get_all = calls["GetAll"]
+            device.set(defs.BATTERY_INTERFACE, Percentage=75)
+            for _ in range(100):
+                levels.append(await client.read_gatt_char(battery_level))
+                if levels[-1] == bytearray([75]):
+                    break
+                await asyncio.sleep(0.01)
+            assert await client.is_connected()
+            assert calls["GetAll"] == get_all
+        finally:
+            await client.disconnect()
+        return levels
+
+    levels = loop.run_until_complete(run())
+    assert levels[0] == bytearray([80]) and levels[-1] == bytearray([75])
+
+
+def test_battery_level_notifications(mock_bluez):
+    from bleak.backends.bluezdbus import defs
+    from bleak.backends.bluezdbus.client import BleakClientBlueZDBus
+
+    loop, mock = mock_bluez
+    device = mock.add_device(address="11:22:33:44:55:66", battery=80)
+    client = BleakClientBlueZDBus(device.address, loop=loop)
+    battery_level = "00002a19-0000-1000-8000-00805f9b34fb"
+    notifications = []
+
+    async def run():
+        assert await client.connect(timeout=5.0)
+        try:
+            await client.start_notify(
+                battery_level, lambda sender, data: notifications.append((sender, data))
+            )
+            device.set(defs.BATTERY_INTERFACE, Percentage=70)
+            for _ in range(100):
+                if notifications:
+                    break
+                await asyncio.sleep(0.01)
+            await client.stop_notify(battery_level)
+            device.set(defs.BATTERY_INTERFACE, Percentage=60)
+            await asyncio.sleep(0.05)
+        finally:
+            await client.disconnect()
+
+    loop.run_until_complete(run())
+    assert notifications == [(battery_level, bytearray([70]))]
+
+
+def test_sharding(mock_bluez):
+    from bleak.backends.bluezdbus.mock import ECHO_NOTIFY_UUID, ECHO_WRITE_UUID
+    from bleak.sharding import ShardedClient, ShardedScanner, Supervisor
+
+    loop, mock = mock_bluez
+    notifications = []
+    detections = []
+
+    async def run():
+        async with Supervisor(["hci0"], loop, interval=0.01) as supervisor:
+            device = await ShardedScanner.find_device_by_address(
+                ADDRESS, timeout=10.0, loop=loop, supervisor=supervisor
+            )
+            assert device.details["adapter"] == "hci0"
+            detections.append(supervisor.detections["hci0"])
+
+            async with ShardedClient(ADDRESS, supervisor=supervisor) as client:
+                assert client.adapter == "hci0"
+                model = await client.read_gatt_char(
+                    "00002a24-0000-1000-8000-00805f9b34fb"
+                )
+                await client.start_notify(
+                    ECHO_NOTIFY_UUID, lambda sender, data: notifications.append(data)
+                )
+                await client.write_gatt_char(ECHO_WRITE_UUID, bytearray(b"ping"), True)
+                for _ in range(200):
+                    if notifications:
+                        break
+                    await asyncio.sleep(0.01)
+        return model
+
+    assert loop.run_until_complete(run()) == b"Mock Model"
+    assert detections[0] > 0
+    assert notifications == [b"ping"]
+    assert not mock.device(ADDRESS).connected
+
+
+def test_extended_notifications(mock_bluez):
+    import time
+
+    from bleak.backends.bluezdbus.client import BleakClientBlueZDBus
+    from bleak.backends.bluezdbus.mock import ECHO_NOTIFY_UUID, ECHO_WRITE_UUID
+
+    loop, mock = mock_bluez
+    client = BleakClientBlueZDBus(ADDRESS, loop=loop)
+    notifications = []
+
+    def callback(sender, data, info):
+        notifications.append((bytes(data), info, time.monotonic()))
+
+    async def run():
+        assert await client.connect(timeout=5.0)
+        try:
+            await client.start_notify(ECHO_NOTIFY_UUID, callback, extended=True)
+            for i in range(3):
+                await client.write_gatt_char(ECHO_WRITE_UUID, bytearray([i]), True)
+            for _ in range(100):
+                if len(notifications) == 3:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await client.disconnect()
+
+    start = time.monotonic()
+    loop.run_until_complete(run())
+    assert [data for data, _, _ in notifications] == [b"\x00", b"\x01", b"\x02"]
+    assert [info.sequence for _, info, _ in notifications] == [0, 1, 2]
+    assert all(start < info.timestamp <= t for _, info, t in notifications)
+
+
+def test_latency_tool(mock_bluez):
+    from bleak.backends.bluezdbus.client import BleakClientBlueZDBus
+    from bleak.backends.bluezdbus.mock import ECHO_NOTIFY_UUID, ECHO_WRITE_UUID
+    from bleak.tools.latency import _tag, measure_latency
+
+    loop, mock = mock_bluez
+    mock.notification_latency = 0.005
+    client = BleakClientBlueZDBus(ADDRESS, loop=loop)
+
+    async def run():
+        assert await client.connect(timeout=5.0)
+        try:
+            return await measure_latency(
+                client,
+                ECHO_WRITE_UUID,
+                ECHO_NOTIFY_UUID,
+                count=20,
+                concurrency=2,
+                key=_tag,
+            )
+        finally:
+            await client.disconnect()
+
+    summary = loop.run_until_complete(run()).summary()
+    assert (summary["count"], summary["timeouts"], summary["errors"]) == (20, 0, 0)
+    assert 0.005 <= summary["min"] <= summary["p50"] <= summary["p99"] <= summary["max"]
+    assert summary["jitter"] >= 0.0
+
+
+def test_dump_gatt(mock_bluez):
+    from bleak.backends.bluezdbus import defs
+    from bleak.backends.bluezdbus.client import BleakClientBlueZDBus
+    from bleak.backends.bluezdbus.mock import CCCD_UUID, ECHO_NOTIFY_UUID
+
+    loop, mock = mock_bluez
+    mock.latencies["ReadValue"] = 0.05
+    client = BleakClientBlueZDBus(ADDRESS, loop=loop, max_in_flight=4)
+    model = "00002a24-0000-1000-8000-00805f9b34fb"
+
+    async def run():
+        assert await client.connect(timeout=5.0)
+        try:
+            # The model number became unreadable since the services were resolved.
+            characteristic = mock.device(ADDRESS).characteristic(model)
+            characteristic.props[defs.GATT_CHARACTERISTIC_INTERFACE]["Flags"] = []
+            start = loop.time()
+            dump = await client.dump_gatt(concurrency=4)
+            return dump, loop.time() - start
+        finally:
+            await client.disconnect()
+
+    dump, elapsed = loop.run_until_complete(run())
+    characteristics = {
+        c["uuid"]: c for s in dump["services"] for c in s["characteristics"]
+    }
+    assert dump["address"] == ADDRESS and len(dump["services"]) == 3
+    assert characteristics["00002a00-0000-1000-8000-00805f9b34fb"]["value"] == (
+        b"Mock Device".hex()
+    )
+    assert characteristics[model]["value"] is None
+    assert "NotPermitted" in characteristics[model]["error"]
+    (cccd,) = characteristics[ECHO_NOTIFY_UUID]["descriptors"]
+    assert (cccd["uuid"], cccd["value"]) == (CCCD_UUID, "0000")
+    # 8 reads of 50 ms, 4 at a time.
+    assert elapsed < 8 * 0.05
+
+
+def test_gatt_snapshot(mock_bluez):
+    from bleak.backends.bluezdbus.client import BleakClientBlueZDBus
+    from bleak.backends.snapshot import dumps, load_services, loads
+
+    loop, mock = mock_bluez
+
+    async def dump(address):
+        async with BleakClientBlueZDBus(address, loop=loop) as client:
+            return await client.dump_gatt(), client.services
+
+    snapshot, services = loop.run_until_complete(dump(ADDRESS))
+    # A device seeded with the snapshot has the same GATT database.
+    seeded = mock.add_device(profile=loads(dumps(snapshot)), visible=True)
+    copy, _ = loop.run_until_complete(dump(seeded.address))
+    assert copy["services"] == snapshot["services"]
+
+    loaded = load_services(snapshot)
+    assert [(s.uuid, s.handle) for s in loaded] == [
+        (s.uuid, s.handle) for s in services
+    ]
+    assert sorted(loaded.descriptors) == sorted(services.descriptors)
+    char = loaded.get_characteristic("00002a00-0000-1000-8000-00805f9b34fb")
+    assert char.value == b"Mock Device"
+    assert char.handle == services.get_characteristic(char.uuid).handle
+
+
+def test_scan_daemon(mock_bluez, tmp_path):
+    import socket
+    import time
+
+    from bleak.backends.bluezdbus.scanner import BleakScannerBlueZDBus
+    from bleak.exc import BleakError
+    from bleak.scand import CachedScanner, ScanDaemon
+    from bleak.sinks import BaseScannerSink
+
+    class _FailingSink(BaseScannerSink):
+        def add(self, timestamp, address, name, rssi, manufacturer_data, uuids):
+            raise RuntimeError("Sink failed")
+
+    def _failing_callback(device):
+        failed.append(device)
+        raise RuntimeError("Callback failed")
+
+    loop, mock = mock_bluez
+    path = str(tmp_path / "scand.sock")
+    # The socket of a daemon that has exited.
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(path)
+    stale.close()
+    daemon = ScanDaemon(path, loop, scanner_factory=BleakScannerBlueZDBus)
+    detected = []
+    failed = []
+
+    async def run():
+        async with daemon:
+            other = ScanDaemon(path, loop, scanner_factory=BleakScannerBlueZDBus)
+            with pytest.raises(BleakError):
+                await other.start()
+            # An RSSI out of range of the protocol is left out.
+            daemon._on_detection(time.time(), ADDRESS, "Mock", 40000, {}, [])
+            await asyncio.sleep(0.3)
+            # Known devices are discovered without waiting for detections.
+            scanner = CachedScanner(loop, path=path, max_age=5.0)
+            scanner.register_detection_callback(detected.append)
+            await scanner.start()
+            cached = await scanner.get_discovered_devices()
+            await asyncio.sleep(0.2)
+            assert daemon.subscribers == 1
+            await scanner.stop()
+            # A failing sink or callback does not lose the connection.
+            scanner = CachedScanner(loop, path=path)
+            scanner.register_sink(_FailingSink())
+            scanner.register_detection_callback(_failing_callback)
+            await scanner.start()
+            await asyncio.sleep(0.2)
+            assert len(failed) > 1 and daemon.subscribers == 1
+            await scanner.stop()
+            found = await CachedScanner.find_device_by_address(
+                ADDRESS, timeout=0.5, loop=loop, path=path
+            )
+        return cached, found
+
+    cached, found = loop.run_until_complete(run())
+    assert sorted(d.address for d in cached) == sorted(
+        d.address for d in mock.devices
+    )
+    assert detected and found.address == ADDRESS
+    assert mock.calls["StartDiscovery"] == 1
+
+
+def test_call_remote_spans(mock_bluez):
+    from bleak.backends.bluezdbus import defs
+    from bleak.backends.bluezdbus.client import BleakClientBlueZDBus
+    from bleak.exc import BleakDBusError
+    from bleak.tracing import Tracer
+
+    class _Recorder(Tracer):
+        def __init__(self):
+            self.events = []
+
+        def start(self, method, path):
+            self.events.append(("start", method, path))
+            return len(self.events)
+
+        def finish(self, span, method, path, elapsed, error=None):
+            self.events.append(("finish", method, path, span, error))
+
+    loop, mock = mock_bluez
+    tracer = _Recorder()
+    client = BleakClientBlueZDBus(ADDRESS, loop=loop, tracer=tracer)
+    name, model = (
+        "00002a00-0000-1000-8000-00805f9b34fb",
+        "00002a24-0000-1000-8000-00805f9b34fb",
+    )
+
+    async def run():
+        async with client:
+            characteristic = mock.device(ADDRESS).characteristic(model)
+            characteristic.props[defs.GATT_CHARACTERISTIC_INTERFACE]["Flags"] = []
+            del tracer.events[:]
+            await client.read_gatt_char(name)
+            with pytest.raises(BleakDBusError):
+                await client.read_gatt_char(model)
+
+    loop.run_until_complete(run())
+    reads = [e for e in tracer.events if e[1] == "ReadValue"]
+    paths = [client.services.get_characteristic(u).path for u in (name, model)]
+    assert [e[:3] for e in reads] == [
+        ("start", "ReadValue", paths[0]),
+        ("finish", "ReadValue", paths[0]),
+        ("start", "ReadValue", paths[1]),
+        ("finish", "ReadValue", paths[1]),
+    ]
+    # Each finish gets the span of its start, and the error of a failed call.
+    assert reads[1][3] == tracer.events.index(reads[0]) + 1 and reads[1][4] is None
+    assert reads[3][3] == tracer.events.index(reads[2]) + 1
+    assert reads[3][4].dbus_error == "org.bluez.Error.NotPermitted"
+
+
+def test_sharding_failing_callbacks(mock_bluez):
+    from bleak.backends.bluezdbus.mock import ECHO_NOTIFY_UUID, ECHO_WRITE_UUID
+    from bleak.sharding import ShardedClient, ShardedScanner, Supervisor
+
+    loop, mock = mock_bluez
+    detections = []
+    notifications = []
+
+    def _detected(device, adapter):
+        detections.append(device.address)
+        raise ValueError("detection callback failed")
+
+    def _notified(sender, data):
+        notifications.append(bytes(data))
+        raise ValueError("notification callback failed")
+
+    async def run():
+        async with Supervisor(["hci0"], loop=loop, interval=0.01) as supervisor:
+            scanner = ShardedScanner(loop, supervisor=supervisor)
+            scanner.register_detection_callback(_detected)
+            await scanner.start()
+            for _ in range(200):
+                if len(detections) > 1:
+                    break
+                await asyncio.sleep(0.01)
+            await scanner.stop()
+
+            client = ShardedClient(ADDRESS, supervisor=supervisor)
+            assert await client.connect(timeout=5.0)
+            try:
+                await client.start_notify(ECHO_NOTIFY_UUID, _notified)
+                for data in (b"a", b"b"):
+                    await client.write_gatt_char(ECHO_WRITE_UUID, data, True)
+                    for _ in range(200):
+                        if data in notifications:
+                            break
+                        await asyncio.sleep(0.01)
+            finally:
+                await client.disconnect()
+            # The worker survived the callbacks raising.
+            assert await supervisor._request("hci0", "ping") == "hci0"
+
+    loop.run_until_complete(run())
+    assert len(detections) > 1
+    assert notifications == [b"a", b"b"]
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.metrics` module."""
+
+import asyncio
+
+from bleak.metrics import Metrics
+
+
+def test_counters_and_histograms():
+    metrics = Metrics(buckets=(0.01, 0.1))
+    metrics.inc("dbus_calls", label="ReadValue")
+    metrics.inc("dbus_calls", label="ReadValue")
+    metrics.inc("bytes_in", 20)
+    metrics.observe("ReadValue", 0.005)
+    metrics.observe("ReadValue", 0.05)
+    metrics.observe("ReadValue", 5.0)
+
+    d = metrics.as_dict()
+    assert d["counters"]["dbus_calls"] == {"ReadValue": 2}
+    assert d["counters"]["bytes_in"] == 20
+    assert d["counters"]["writes"] == 0
+    assert d["histograms"]["ReadValue"]["count"] == 3
+    assert d["histograms"]["ReadValue"]["buckets"] == {
+        0.01: 1,
+        0.1: 2,
+        float("inf"): 3,
+    }
+
+    metrics.reset()
+    assert metrics.as_dict()["counters"]["dbus_calls"] == {}
+
+
+def test_prometheus_text():
+    metrics = Metrics(buckets=(0.01,))
+    metrics.inc("errors", label='org.bluez.Error."Failed"')
+    metrics.observe("get_services", 0.02)
+    text = metrics.to_prometheus(labels={"address": "24:71:89:CC:09:05"})
+    lines = text.splitlines()
+    assert "# TYPE bleak_errors_total counter" in lines
+    assert (
+        'bleak_errors_total{address="24:71:89:CC:09:05",'
+        'type="org.bluez.Error.\\"Failed\\""} 1' in lines
+    )
+    assert (
+        'bleak_get_services_seconds_bucket{address="24:71:89:CC:09:05",le="0.01"} 0'
+        in lines
+    )
+    assert (
+        'bleak_get_services_seconds_bucket{address="24:71:89:CC:09:05",le="+Inf"} 1'
+        in lines
+    )
+    assert 'bleak_read_value_seconds_count{address="24:71:89:CC:09:05"} 0' in lines
+
+
+def test_scanner_counts_device_detections_only():
+    from bleak.backends.bluezdbus.aiodbus.message import SIGNAL, Message
+    from bleak.backends.bluezdbus.scanner import BleakScannerBlueZDBus
+
+    device = "/org/bluez/hci0/dev_AA_BB_CC_DD_EE_FF"
+
+    def _signal(path, member, body):
+        return Message(SIGNAL, path=path, member=member, body=body)
+
+    loop = asyncio.new_event_loop()
+    scanner = BleakScannerBlueZDBus(loop=loop)
+    for message in (
+        _signal("/", "InterfacesAdded", [device, {"org.bluez.Device1": {}}]),
+        _signal(device, "PropertiesChanged", ["org.bluez.Device1", {"RSSI": -60}, []]),
+        _signal("/", "InterfacesAdded", [device + "/service000a", {"x": {}}]),
+        _signal("/org/bluez/hci0", "PropertiesChanged", ["org.bluez.Adapter1", {}, []]),
+        _signal(device, "PropertiesChanged", ["org.bluez.Battery1", {}, []]),
+    ):
+        scanner.parse_msg(message)
+    loop.close()
+    assert scanner.metrics.as_dict()["counters"]["detections"] == 2
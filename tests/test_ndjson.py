@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.sinks.ndjson` module."""
+
+import asyncio
+import json
+
+from bleak.sinks.ndjson import NDJSONFileSink
+
+A = "24:71:89:CC:09:05"
+
+
+def test_ndjson_sink_buffers_and_rotates(tmp_path):
+    path = str(tmp_path / "detections.ndjson")
+    loop = asyncio.new_event_loop()
+    sink = NDJSONFileSink(
+        path,
+        max_bytes=1000,
+        backup_count=2,
+        flush_interval=60.0,
+        buffer_size=400,
+        loop=loop,
+    )
+    sink.add(1.5, A, "A", -50, {76: b"\x02\x15"}, ["180d"])
+    # Buffered until enough is buffered to write.
+    assert not (tmp_path / "detections.ndjson").exists()
+    for i in range(99):
+        sink.add(2.0 + i, A, "A", -50, {}, [])
+    sink.close()
+
+    assert sink.lines == 100 and sink.rotations > 2
+    files = [path + ".2", path + ".1", path]
+    lines = [line for f in files for line in open(f).read().splitlines()]
+    assert all(len(open(f, "rb").read()) <= 1000 for f in files)
+    assert not (tmp_path / "detections.ndjson.3").exists()
+    records = [json.loads(line) for line in lines]
+    assert [r["timestamp"] for r in records] == [
+        2.0 + i for i in range(99 - len(records), 99)
+    ]
+    sink = NDJSONFileSink(path, max_bytes=0, loop=loop)
+    sink.add(1.5, A, "A", None, {76: b"\x02\x15"}, ["180d"])
+    sink.flush()
+    assert json.loads(open(path).read().splitlines()[-1]) == {
+        "timestamp": 1.5,
+        "address": A,
+        "name": "A",
+        "rssi": None,
+        "manufacturer_data": {"76": "0215"},
+        "uuids": ["180d"],
+    }
+    loop.close()
+
+
+def test_ndjson_sink_flush_timer(tmp_path):
+    path = tmp_path / "detections.ndjson"
+    loop = asyncio.new_event_loop()
+    sink = NDJSONFileSink(str(path), flush_interval=0.05, loop=loop)
+
+    async def run():
+        sink.add(1.5, A, "A", -50, {}, [])
+        sink.add(2.5, A, "A", -50, {}, [])
+        await asyncio.sleep(0.02)
+        assert not path.exists()
+        # Written without any detection made since, when the interval is up.
+        await asyncio.sleep(0.1)
+        assert sink.lines == 2
+        sink.add(3.5, A, "A", -50, {}, [])
+        sink.close()
+        assert sink._timer is None
+
+    loop.run_until_complete(run())
+    loop.close()
+    assert len(path.read_text().splitlines()) == 3
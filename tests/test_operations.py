@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.bluezdbus.operations` module."""
+
+import asyncio
+
+from bleak.backends.bluezdbus.operations import (
+    IN_PROGRESS,
+    PRIORITY_HIGH,
+    PRIORITY_LOW,
+    OperationQueue,
+)
+from bleak.exc import BleakDBusError
+from bleak.metrics import Metrics
+
+
+def test_priorities_and_retries():
+    loop = asyncio.new_event_loop()
+    metrics = Metrics()
+    queue = OperationQueue(loop, max_in_flight=1, retry_delay=0.001, metrics=metrics)
+    order = []
+    busy = [2]
+
+    async def operation(name):
+        order.append(name)
+        if name == "control" and busy[0]:
+            busy[0] -= 1
+            raise BleakDBusError(IN_PROGRESS)
+        await asyncio.sleep(0.01)
+        return name
+
+    async def run():
+        bulk = [
+            loop.create_task(queue.run(lambda i=i: operation(i), PRIORITY_LOW))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0.001)
+        assert queue.in_flight == 1 and queue.depth == 2
+        control = queue.run(lambda: operation("control"), PRIORITY_HIGH)
+        return await asyncio.gather(control, *bulk)
+
+    results = loop.run_until_complete(run())
+    loop.close()
+
+    assert results == ["control", 0, 1, 2]
+    # The control write overtook the queued reads, and was retried twice.
+    assert order == [0, "control", "control", "control", 1, 2]
+    assert queue.in_flight == 0 and queue.max_depth == 3
+    assert metrics.counters["retries"] == 2
+    assert metrics.histograms["queue_wait"].count == 4
+
+
+def test_timeouts():
+    loop = asyncio.new_event_loop()
+    queue = OperationQueue(loop, max_in_flight=1)
+    wedged = loop.create_future()
+
+    async def run():
+        errors = []
+        for operation in (
+            queue.run(lambda: wedged, timeout=0.05, name="read_gatt_char"),
+            queue.run(lambda: asyncio.sleep(0), timeout=0.02, name="write_gatt_char"),
+        ):
+            errors.append(loop.create_task(operation))
+        await asyncio.wait(errors)
+        return [e.exception() for e in errors]
+
+    read_error, write_error = loop.run_until_complete(run())
+    assert (read_error.operation, read_error.phase) == ("read_gatt_char", "call")
+    assert (write_error.operation, write_error.phase) == ("write_gatt_char", "queue")
+    assert isinstance(read_error, asyncio.TimeoutError)
+    # Both gave their slot and place in the queue up.
+    assert queue.in_flight == 0 and queue.depth == 0
+    assert wedged.cancelled()
+    loop.close()
+
+
+def test_slot_released_before_acquire_starts():
+    loop = asyncio.new_event_loop()
+    queue = OperationQueue(loop, max_in_flight=1)
+
+    async def run():
+        release = loop.create_future()
+        first = loop.create_task(queue.run(lambda: release))
+        await asyncio.sleep(0)
+        second = loop.create_task(
+            queue.run(lambda: asyncio.sleep(0, "second"), timeout=1.0)
+        )
+        # The first completes after the second was queued, but before its wait
+        # for a slot starts.
+        release.set_result("first")
+        return await asyncio.gather(first, second)
+
+    assert loop.run_until_complete(run()) == ["first", "second"]
+    assert queue.in_flight == 0 and queue.depth == 0
+    loop.close()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.polling` module."""
+
+import asyncio
+
+from bleak.polling import Poller
+
+
+class FakeClient(object):
+    connected = []
+
+    def __init__(self, address, loop=None, delay=0.0):
+        self.address = address
+        self.delay = delay
+        self._connected = False
+
+    async def connect(self):
+        self._connected = True
+        FakeClient.connected.append(self.address)
+
+    async def disconnect(self):
+        self._connected = False
+        FakeClient.connected.remove(self.address)
+
+    async def is_connected(self):
+        return self._connected
+
+    async def read_gatt_char(self, uuid):
+        await asyncio.sleep(self.delay)
+        return bytearray(uuid.encode())
+
+
+def test_poller():
+    loop = asyncio.new_event_loop()
+    poller = Poller(
+        loop,
+        max_connections=2,
+        client_factory=FakeClient,
+        client_kwargs={"delay": 0.001},
+    )
+    values = []
+    for i in range(3):
+        address = "AA:BB:CC:DD:EE:0{0}".format(i)
+        poller.add_job(address, "a", 0.05, lambda job, data: values.append(data))
+        poller.add_job(address, "b", 0.1)
+
+    async def run():
+        await poller.start()
+        await asyncio.sleep(0.32)
+        assert len(FakeClient.connected) <= 2
+        await poller.stop()
+
+    loop.run_until_complete(run())
+    loop.close()
+
+    report = poller.report()
+    assert FakeClient.connected == []
+    assert report["errors"] == 0
+    # Every 0.05 s for "a", every 0.1 s for "b", from a random start.
+    jobs = report["jobs"]
+    assert all(5 <= j["reads"] <= 7 for j in jobs if j["characteristic"] == "a")
+    assert all(2 <= j["reads"] <= 4 for j in jobs if j["characteristic"] == "b")
+    assert values and all(v == bytearray(b"a") for v in values)
+    assert report["reads_per_sec"] > 0
+    # Both jobs of a device are read over one connection when due together.
+    assert report["connects"] + report["reuses"] < report["reads"]
+    assert all(j["lateness"]["count"] == j["reads"] for j in jobs)
+
+
+def test_failing_callback():
+    loop = asyncio.new_event_loop()
+    poller = Poller(loop, spread=False, client_factory=FakeClient)
+    values = []
+
+    def _callback(job, data):
+        values.append(data)
+        raise ValueError("callback failed")
+
+    job = poller.add_job("AA:BB:CC:DD:EE:00", "a", 0.05, _callback)
+
+    async def run():
+        await poller.start()
+        await asyncio.sleep(0.12)
+        await poller.stop()
+
+    loop.run_until_complete(run())
+    loop.close()
+    # Polling went on after the callback raised.
+    assert job.reads >= 2 and len(values) == job.reads
+    assert job.errors == 0
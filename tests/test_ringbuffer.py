@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.sinks.ringbuffer` module."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from bleak.sinks.ringbuffer import AdvertisementRingBuffer, RSSI_UNAVAILABLE  # noqa: E402
+from bleak.utils import mac_str_2_int  # noqa: E402
+
+A = "24:71:89:CC:09:05"
+B = "4D:41:D5:8C:7A:0B"
+
+
+def test_ring_buffer_wraps_around():
+    buffer = AdvertisementRingBuffer(capacity=3)
+    for i in range(5):
+        buffer.add(float(i), A, "A", -50 - i, {}, [])
+    assert len(buffer) == 3
+    assert list(buffer.records()["timestamp"]) == [2.0, 3.0, 4.0]
+
+
+def test_ring_buffer_queries():
+    buffer = AdvertisementRingBuffer(capacity=10)
+    buffer.add(0.0, A, "A", -40, {76: b"\x01"}, [])
+    buffer.add(0.5, B, "B", None, {}, [])
+    buffer.add(1.2, A, "A", -42, {}, [])
+    buffer.add(2.1, B, "B", -60, {}, [])
+    buffer.add(2.2, "not-an-address", "C", -60, {}, [])
+
+    assert buffer.dropped == 1
+    assert buffer.records()["manufacturer_id"][0] == 76
+
+    t, rssi = buffer.rssi_series(A)
+    assert list(t) == [0.0, 1.2]
+    assert list(rssi) == [-40, -42]
+    t, rssi = buffer.rssi_series(B)
+    assert list(rssi) == [-60]
+    assert RSSI_UNAVAILABLE not in rssi
+
+    last = buffer.last_seen()
+    seen = dict(zip(last["address"].tolist(), last["timestamp"].tolist()))
+    assert seen == {mac_str_2_int(A): 1.2, mac_str_2_int(B): 2.1}
+
+    starts, counts = buffer.counts_per_window(1.0)
+    assert list(starts) == [0.0, 1.0, 2.0]
+    assert list(counts) == [2, 1, 1]
+    _, counts = buffer.counts_per_window(1.0, address=A)
+    assert list(counts) == [1, 1]
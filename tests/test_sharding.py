@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.sharding` module."""
+
+import asyncio
+import platform
+import socket
+
+import pytest
+
+from bleak.sharding import _open_channel
+
+
+@pytest.mark.skipif(platform.system() == "Windows", reason="Requires Unix sockets.")
+def test_channel():
+    loop = asyncio.new_event_loop()
+    received = []
+    closed = []
+
+    async def run():
+        a, b = socket.socketpair()
+        sender = await _open_channel(loop, a, None, lambda: None)
+        receiver = await _open_channel(
+            loop, b, received.append, lambda: closed.append(True)
+        )
+        # Far more than the socket buffers, sent before anything is read.
+        messages = [("detections", [bytes(1024)] * 1024), ("reply", 1, None, "hci0")]
+        for message in messages:
+            sender.send(message)
+        await sender.wait_closed()
+        await receiver.wait_closed()
+        assert received == messages
+
+    loop.run_until_complete(run())
+    loop.close()
+    assert closed == [True]
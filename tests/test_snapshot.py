@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.snapshot` module."""
+
+import pytest
+
+from bleak.backends.snapshot import (
+    SNAPSHOT_VERSION,
+    dumps,
+    load_services,
+    loads,
+    snapshot_services,
+)
+from bleak.exc import BleakError
+
+
+def _snapshot(descriptor_handles):
+    return {
+        "version": SNAPSHOT_VERSION,
+        "address": None,
+        "mtu": None,
+        "services": [
+            {
+                "uuid": "0000180f-0000-1000-8000-00805f9b34fb",
+                "handle": None,
+                "description": "Battery Service",
+                "characteristics": [
+                    {
+                        "uuid": "00002a19-0000-1000-8000-00805f9b34fb",
+                        "handle": None,
+                        "description": "Battery Level",
+                        "properties": ["read", "notify"],
+                        "value": "5a",
+                        "error": None,
+                        "descriptors": [
+                            {
+                                "uuid": "00002902-0000-1000-8000-00805f9b34fb",
+                                "handle": handle,
+                                "value": None,
+                                "error": None,
+                            }
+                            for handle in descriptor_handles
+                        ],
+                    }
+                ],
+            }
+        ],
+    }
+
+
+def test_round_trip_without_handles():
+    snapshot = _snapshot([0x0010, 0x0011])
+    services = load_services(loads(dumps(snapshot)))
+    assert snapshot_services(services) == {
+        **snapshot,
+        "services": [
+            {
+                **snapshot["services"][0],
+                "characteristics": [
+                    {**snapshot["services"][0]["characteristics"][0], "value": None}
+                ],
+            }
+        ],
+    }
+    characteristic = services.get_characteristic(
+        "00002a19-0000-1000-8000-00805f9b34fb"
+    )
+    assert characteristic.handle is None and characteristic.value == b"\x5a"
+    assert sorted(services.descriptors) == [0x0010, 0x0011]
+
+    # Descriptors are told apart by their handles, so they must have one.
+    with pytest.raises(BleakError):
+        load_services(_snapshot([None, None]))
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.sync` module."""
+
+import asyncio
+
+from bleak.sync import EventLoopThread, SyncClient
+
+
+class FakeClient(object):
+    def __init__(self, address, loop=None):
+        self.address = address
+        self.loop = loop
+        self.connected = False
+        self.callbacks = {}
+
+    async def connect(self):
+        self.connected = True
+        return True
+
+    async def disconnect(self):
+        self.connected = False
+        return True
+
+    async def read_gatt_char(self, uuid):
+        assert asyncio.get_event_loop() is self.loop
+        await asyncio.sleep(0.01)
+        return bytearray(uuid.encode())
+
+    async def start_notify(self, uuid, callback):
+        self.callbacks[uuid] = callback
+
+        def _notify():
+            for i in range(1000):
+                callback(uuid, bytearray([i % 256]))
+
+        self.loop.call_soon(_notify)
+
+
+def test_sync_client():
+    loop_thread = EventLoopThread()
+    client = SyncClient(
+        "AA:BB:CC:DD:EE:FF", loop_thread, interval=0.01, client_factory=FakeClient
+    )
+    assert client.client.loop is loop_thread.loop
+    with client:
+        assert client.client.connected
+        futures = [client.read_gatt_char(str(i)) for i in range(10)]
+        # The reads run concurrently on the loop thread.
+        assert [f.result(timeout=0.5) for f in futures] == [
+            bytearray(str(i).encode()) for i in range(10)
+        ]
+        client.start_notify("n").result()
+        received = client.notifications.get(timeout=1.0)
+    loop_thread.stop()
+
+    assert not client.client.connected
+    assert not loop_thread.running
+    assert [data[0] for _, data in received] == [i % 256 for i in range(1000)]
+    # One batch, rather than one delivery per notification.
+    assert client.notifications.batches == 1
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.tracing` module."""
+
+import io
+import json
+
+from bleak.tracing import ChromeTracer
+
+
+def test_chrome_tracer_lanes_and_json():
+    tracer = ChromeTracer()
+    outer = tracer.start("connect", "/org/bluez/hci0/dev_24_71_89_CC_09_05")
+    inner = tracer.start("Connect", "/org/bluez/hci0/dev_24_71_89_CC_09_05")
+    tracer.finish(inner, "Connect", "/org/bluez/hci0/dev_24_71_89_CC_09_05", 0.01)
+    tracer.finish(
+        outer,
+        "connect",
+        "/org/bluez/hci0/dev_24_71_89_CC_09_05",
+        0.02,
+        error=ValueError("x"),
+    )
+    path = "/org/bluez/hci0/dev_24_71_89_CC_09_05/service000c/char000d"
+    tracer.finish(tracer.start("ReadValue", path), "ReadValue", path, 0.0)
+
+    f = io.StringIO()
+    tracer.save(f)
+    events = json.loads(f.getvalue())["traceEvents"]
+    assert [(e["name"], e["cat"], e["tid"]) for e in events] == [
+        ("Connect", "dbus", 1),
+        ("connect", "bleak", 0),
+        ("ReadValue", "dbus", 0),
+    ]
+    assert events[0]["dur"] == 10000.0
+    assert events[1]["args"]["error"] == "ValueError: x"